@@ -1,6 +1,8 @@
 """Document classifier using LLM"""
 from typing import Dict, Any, Optional
 from app.ai_engine.llm_client import llm_client
+from app.ai_engine.prompt_budget import prompt_budget
+from app.config import settings
 import json
 import structlog
 
@@ -27,8 +29,8 @@ class DocumentClassifier:
     async def classify(self, text: str, file_name: Optional[str] = None) -> Dict[str, Any]:
         """Classify document type with improved accuracy"""
         try:
-            # Check if LLM is available
-            llm_available = await llm_client.check_connection()
+            # Check if LLM is available (cached health state, no network call)
+            llm_available = llm_client.is_available()
             
             if not llm_available:
                 logger.warning("LLM not available, using keyword fallback")
@@ -54,13 +56,20 @@ Return ONLY a JSON object with:
 
 Be accurate and consider both filename and content."""
             
+            # Keep the highest-signal spans within the classification token budget
+            content = prompt_budget.fit_text(
+                text,
+                settings.AI_CLASSIFIER_TOKEN_BUDGET,
+                llm_client.primary_backend()
+            )["text"]
+            
             # Enhanced user prompt
             user_prompt = f"""Classify this document:
 
 Filename: {file_name or 'unknown'}
 
-Content (first 3000 characters):
-{text[:3000]}
+Content:
+{content}
 
 Analyze the document type based on both filename and content. Return JSON: {{"category": "...", "confidence": 0.0-1.0}}"""
             
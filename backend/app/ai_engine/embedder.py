@@ -0,0 +1,67 @@
+"""Local sentence embeddings for semantic search"""
+import asyncio
+import threading
+from typing import List
+import numpy as np
+from app.config import settings
+import structlog
+
+logger = structlog.get_logger()
+
+
+class Embedder:
+    """sentence-transformers model loaded lazily, encoding on CPU in batches"""
+
+    def __init__(self):
+        self._model = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _load(self):
+        """Load the model once per process; None when sentence-transformers or the model is unavailable"""
+        with self._lock:
+            if not self._loaded:
+                try:
+                    from sentence_transformers import SentenceTransformer
+                    self._model = SentenceTransformer(settings.EMBEDDING_MODEL, device="cpu")
+                    logger.info("Embedding model loaded", model=settings.EMBEDDING_MODEL)
+                except Exception as e:
+                    logger.warning("Embedding model unavailable, semantic search disabled", error=str(e))
+                    self._model = None
+                self._loaded = True
+        return self._model
+
+    @property
+    def model_name(self) -> str:
+        return settings.EMBEDDING_MODEL
+
+    @property
+    def dimension(self) -> int:
+        return self._load().get_sentence_embedding_dimension()
+
+    async def ready(self) -> bool:
+        """Whether semantic search can run (loads the model off the event loop)"""
+        if not settings.SEMANTIC_SEARCH_ENABLED:
+            return False
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._load) is not None
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Unit-length float32 vectors, one row per text"""
+        vectors = self._load().encode(
+            texts,
+            batch_size=settings.EMBEDDING_BATCH_SIZE,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        )
+        return np.asarray(vectors, dtype=np.float32)
+
+    async def encode_async(self, texts: List[str]) -> np.ndarray:
+        """encode() in a thread so the event loop keeps serving requests"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.encode, texts)
+
+
+# Global embedder instance
+embedder = Embedder()
@@ -0,0 +1,172 @@
+"""Content-addressed cache for LLM responses"""
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
+from app.config import settings
+import structlog
+
+logger = structlog.get_logger()
+
+
+def make_cache_key(
+    prompt: str,
+    system_prompt: Optional[str],
+    model: str,
+    temperature: float,
+    format: Optional[str],
+    max_tokens: Optional[int] = None
+) -> str:
+    """Hash the inputs that determine an LLM response"""
+    payload = json.dumps(
+        {
+            "prompt": prompt,
+            "system_prompt": system_prompt or "",
+            "model": model,
+            "temperature": round(float(temperature), 4),
+            "format": format or "",
+            "max_tokens": max_tokens,
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LRUResponseCache:
+    """In-process LRU with per-entry TTL"""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 86400.0, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[str]:
+        """Get a value, dropping it if expired"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if self._clock() >= expires_at:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        """Store a value, evicting the least recently used entries over the size limit"""
+        self._entries[key] = (self._clock() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop all entries"""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class LLMResponseCache:
+    """Two-tier response cache: in-process LRU plus an optional Redis tier"""
+
+    KEY_PREFIX = "llm_cache:"
+
+    def __init__(self):
+        self.enabled = settings.LLM_CACHE_ENABLED
+        self.memory = LRUResponseCache(
+            max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+        )
+        self._redis = None
+        self._redis_disabled = not settings.LLM_CACHE_REDIS_ENABLED
+        self._stats = {"memory_hits": 0, "redis_hits": 0, "misses": 0, "stores": 0}
+
+    def _get_redis(self):
+        """Get async Redis client (lazy initialization, disabled after a failure)"""
+        if self._redis_disabled:
+            return None
+        if self._redis is None:
+            try:
+                import redis.asyncio as aioredis
+                self._redis = aioredis.from_url(
+                    settings.REDIS_URL,
+                    socket_connect_timeout=2,
+                    socket_timeout=2,
+                )
+            except Exception as e:
+                logger.warning("LLM cache Redis tier unavailable", error=str(e))
+                self._redis_disabled = True
+                return None
+        return self._redis
+
+    def _disable_redis(self, error: Exception) -> None:
+        logger.warning("LLM cache Redis tier disabled", error=str(error))
+        self._redis_disabled = True
+        self._redis = None
+
+    async def get(self, key: str) -> Optional[str]:
+        """Look a response up in memory, then in Redis"""
+        if not self.enabled:
+            return None
+
+        value = self.memory.get(key)
+        if value is not None:
+            self._stats["memory_hits"] += 1
+            return value
+
+        redis_client = self._get_redis()
+        if redis_client is not None:
+            try:
+                raw = await redis_client.get(f"{self.KEY_PREFIX}{key}")
+                if raw is not None:
+                    value = raw.decode("utf-8") if isinstance(raw, bytes) else raw
+                    self.memory.set(key, value)
+                    self._stats["redis_hits"] += 1
+                    return value
+            except Exception as e:
+                self._disable_redis(e)
+
+        self._stats["misses"] += 1
+        return None
+
+    async def set(self, key: str, value: str) -> None:
+        """Store a response in both tiers"""
+        if not self.enabled or not value:
+            return
+
+        self.memory.set(key, value)
+        self._stats["stores"] += 1
+
+        redis_client = self._get_redis()
+        if redis_client is not None:
+            try:
+                await redis_client.setex(
+                    f"{self.KEY_PREFIX}{key}",
+                    int(settings.LLM_CACHE_TTL_SECONDS),
+                    value,
+                )
+            except Exception as e:
+                self._disable_redis(e)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters"""
+        lookups = self._stats["memory_hits"] + self._stats["redis_hits"] + self._stats["misses"]
+        hits = self._stats["memory_hits"] + self._stats["redis_hits"]
+        return {
+            **self._stats,
+            "enabled": self.enabled,
+            "entries": len(self.memory),
+            "evictions": self.memory.evictions,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "redis_enabled": not self._redis_disabled,
+        }
+
+
+# Global LLM response cache instance
+llm_cache = LLMResponseCache()
@@ -0,0 +1,224 @@
+"""LLM backend health monitor with circuit breakers"""
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Optional, Any
+from app.config import settings
+import structlog
+
+logger = structlog.get_logger()
+
+
+class CircuitBreaker:
+    """Per-backend circuit breaker (closed -> open -> half-open -> closed)"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 3,
+        reset_timeout: float = 60.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._half_open_in_flight = False
+        self._trial_started_at = 0.0
+
+    @property
+    def state(self) -> str:
+        """Current state, moving from open to half-open once the reset timeout elapsed"""
+        if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._half_open_in_flight = False
+        elif (
+            self._state == self.HALF_OPEN
+            and self._half_open_in_flight
+            and self._clock() - self._trial_started_at >= self.reset_timeout
+        ):
+            # The trial never reported back (cancelled or dropped) - count it as failed
+            logger.warning("LLM circuit trial unresolved", backend=self.name)
+            self.record_failure()
+        return self._state
+
+    def allow_request(self) -> bool:
+        """Whether a call may go to this backend right now"""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._half_open_in_flight:
+            # Let exactly one trial call through
+            self._half_open_in_flight = True
+            self._trial_started_at = self._clock()
+            return True
+        return False
+
+    def release_trial(self) -> None:
+        """Hand back the half-open trial when a call ends without a health signal"""
+        self._half_open_in_flight = False
+
+    def is_available(self) -> bool:
+        """Non-mutating availability check (does not consume the half-open trial)"""
+        state = self.state
+        return state == self.CLOSED or (state == self.HALF_OPEN and not self._half_open_in_flight)
+
+    def record_success(self) -> None:
+        """Close the breaker after a successful call"""
+        if self._state != self.CLOSED:
+            logger.info("LLM circuit closed", backend=self.name)
+        self._state = self.CLOSED
+        self._failures = 0
+        self._half_open_in_flight = False
+
+    def record_failure(self) -> None:
+        """Count a failure, opening the breaker at the threshold or on a failed trial"""
+        self._failures += 1
+        if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            if self._state != self.OPEN:
+                logger.warning("LLM circuit opened", backend=self.name, failures=self._failures)
+            self._state = self.OPEN
+            self._opened_at = self._clock()
+            self._half_open_in_flight = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Serializable breaker state"""
+        return {"state": self.state, "failures": self._failures}
+
+
+class LLMHealthMonitor:
+    """Background prober keeping a TTL'd availability state per LLM backend"""
+
+    def __init__(self, probes: Dict[str, Callable[[], Awaitable[bool]]]):
+        self.probes = probes
+        self.breakers: Dict[str, CircuitBreaker] = {
+            name: CircuitBreaker(
+                name,
+                failure_threshold=settings.LLM_BREAKER_FAILURE_THRESHOLD,
+                reset_timeout=settings.LLM_BREAKER_RESET_SECONDS,
+            )
+            for name in probes
+        }
+        self._checked_at: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    def breaker(self, backend: str) -> Optional[CircuitBreaker]:
+        """Breaker for a backend, if it is configured"""
+        return self.breakers.get(backend)
+
+    def is_available(self, backend: Optional[str] = None) -> bool:
+        """Non-blocking availability read for one backend, or any backend if None"""
+        self._refresh_if_stale()
+        if backend is not None:
+            breaker = self.breakers.get(backend)
+            return breaker.is_available() if breaker else False
+        return any(breaker.is_available() for breaker in self.breakers.values())
+
+    def record_success(self, backend: str) -> None:
+        """Passive health signal from a real request"""
+        breaker = self.breakers.get(backend)
+        if breaker:
+            breaker.record_success()
+            self._checked_at[backend] = time.monotonic()
+
+    def record_failure(self, backend: str) -> None:
+        """Passive failure signal from a real request"""
+        breaker = self.breakers.get(backend)
+        if breaker:
+            breaker.record_failure()
+            self._checked_at[backend] = time.monotonic()
+
+    def release(self, backend: str) -> None:
+        """A request ended without saying anything about backend health"""
+        breaker = self.breakers.get(backend)
+        if breaker:
+            breaker.release_trial()
+
+    async def probe(self, backend: str) -> bool:
+        """Run the cheap probe for one backend and feed the breaker"""
+        probe = self.probes.get(backend)
+        if probe is None:
+            return False
+        try:
+            healthy = await probe()
+        except Exception as e:
+            logger.debug("LLM health probe error", backend=backend, error=str(e))
+            healthy = False
+        if healthy:
+            self.record_success(backend)
+        else:
+            self.record_failure(backend)
+        return healthy
+
+    async def probe_all(self) -> Dict[str, bool]:
+        """Probe every backend whose breaker allows a request"""
+        results = {}
+        for backend, breaker in self.breakers.items():
+            # An open breaker is not probed; a half-open one gets the probe as its trial
+            if not breaker.allow_request():
+                results[backend] = False
+                continue
+            results[backend] = await self.probe(backend)
+        return results
+
+    def _is_stale(self, backend: str) -> bool:
+        checked_at = self._checked_at.get(backend)
+        return checked_at is None or time.monotonic() - checked_at >= settings.LLM_HEALTH_TTL_SECONDS
+
+    def _refresh_if_stale(self) -> None:
+        """Schedule a background probe for stale backends without waiting on it"""
+        if self._task is not None and not self._task.done():
+            return  # The periodic loop keeps state fresh
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return
+        if not any(self._is_stale(backend) for backend in self.breakers):
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._refresh_task = loop.create_task(self.probe_all())
+
+    async def _run(self) -> None:
+        """Periodic probe loop"""
+        while True:
+            try:
+                await self.probe_all()
+            except Exception as e:
+                logger.warning("LLM health monitor error", error=str(e))
+            await asyncio.sleep(settings.LLM_HEALTH_PROBE_INTERVAL)
+
+    def start(self) -> None:
+        """Start the background probe loop on the running event loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background probe loop"""
+        for task in (self._task, self._refresh_task):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = None
+        self._refresh_task = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Availability state per backend"""
+        now = time.monotonic()
+        return {
+            backend: {
+                **breaker.snapshot(),
+                "checked_seconds_ago": round(now - self._checked_at[backend], 1) if backend in self._checked_at else None,
+            }
+            for backend, breaker in self.breakers.items()
+        }
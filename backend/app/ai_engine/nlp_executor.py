@@ -0,0 +1,113 @@
+"""Off-event-loop execution of CPU-bound NLP extraction"""
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional
+from app.config import settings
+import structlog
+
+logger = structlog.get_logger()
+
+
+def _init_worker() -> None:
+    """Pool initializer: load the spaCy model once per worker process"""
+    from app.ai_engine.nlp_extractor import _load_spacy_model
+    _load_spacy_model()
+
+
+def _warm_up() -> bool:
+    """No-op used to force worker processes to start"""
+    return True
+
+
+def _call(target: str, method: str, *args: Any) -> Any:
+    """Run an extractor method (executes inside the worker)"""
+    from app.ai_engine.nlp_extractor import nlp_extractor
+    from app.ai_engine.extractors import date_extractor, amount_extractor
+    extractors = {
+        "nlp": nlp_extractor,
+        "date": date_extractor,
+        "amount": amount_extractor,
+    }
+    return getattr(extractors[target], method)(*args)
+
+
+class NLPExecutor:
+    """Awaitable NLP APIs backed by a process pool with warm spaCy models"""
+
+    def __init__(self):
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def pool_size(self) -> int:
+        # Daemonic processes (e.g. Celery prefork children) cannot spawn a pool
+        if multiprocessing.current_process().daemon:
+            return 0
+        return settings.NLP_PROCESS_POOL_SIZE
+
+    def start(self) -> None:
+        """Start the pool and preload the model in every worker"""
+        if self._pool is not None or self.pool_size <= 0:
+            return
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.pool_size,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+        for _ in range(self.pool_size):
+            self._pool.submit(_warm_up)
+        logger.info("NLP process pool started", workers=self.pool_size)
+
+    def shutdown(self) -> None:
+        """Stop the pool"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+            logger.info("NLP process pool stopped")
+
+    async def _run(self, target: str, method: str, *args: Any) -> Any:
+        """Run an extractor method in the pool, or in a thread when no pool is configured"""
+        loop = asyncio.get_running_loop()
+        if self.pool_size > 0:
+            self.start()
+            try:
+                return await loop.run_in_executor(self._pool, _call, target, method, *args)
+            except BrokenProcessPool:
+                logger.warning("NLP process pool broken, restarting")
+                self.shutdown()
+        return await loop.run_in_executor(None, _call, target, method, *args)
+
+    async def analyze(self, text: str) -> Dict[str, Any]:
+        """Single-parse dates, entities, amounts and action items (NLPExtractor.analyze)"""
+        return await self._run("nlp", "analyze", text)
+
+    async def analyze_many(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """Batch analyze with nlp.pipe, split into one chunk per pool worker"""
+        if not texts:
+            return []
+        workers = max(self.pool_size, 1)
+        chunk_size = -(-len(texts) // workers)
+        chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+        results = await asyncio.gather(*(self._run("nlp", "analyze_many", chunk) for chunk in chunks))
+        return [analysis for chunk_results in results for analysis in chunk_results]
+
+    async def extract_dates(self, text: str) -> List[Dict[str, Any]]:
+        """spaCy + regex date mentions (NLPExtractor.extract_dates)"""
+        return await self._run("nlp", "extract_dates", text)
+
+    async def extract_entities(self, text: str) -> Dict[str, Any]:
+        """Named entities (NLPExtractor.extract_entities)"""
+        return await self._run("nlp", "extract_entities", text)
+
+    async def extract_action_items(self, text: str) -> List[str]:
+        """Imperative action sentences (NLPExtractor.extract_action_items)"""
+        return await self._run("nlp", "extract_action_items", text)
+
+    async def parse_dates(self, text: str) -> List[Dict[str, Any]]:
+        """Parsed due-date candidates (DateExtractor.extract_dates)"""
+        return await self._run("date", "extract_dates", text)
+
+
+# Global NLP executor instance
+nlp_executor = NLPExecutor()
@@ -11,13 +11,31 @@ logger = structlog.get_logger()
 _nlp_model = None
 _nlp_model_loaded = False
 
+DATE_PATTERNS = [
+    re.compile(r'\d{1,2}[/-]\d{1,2}[/-]\d{2,4}'),
+    re.compile(r'\d{1,2}\s+(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{2,4}', re.IGNORECASE),
+    re.compile(r'(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{1,2},?\s+\d{2,4}', re.IGNORECASE),
+]
+
+AMOUNT_PATTERNS = [
+    re.compile(r'\$[\d,]+\.?\d*'),
+    re.compile(r'[\d,]+\.?\d*\s*(dollars?|USD|EUR|GBP|INR)', re.IGNORECASE),
+    re.compile(r'(dollars?|USD|EUR|GBP|INR)\s*[\d,]+\.?\d*', re.IGNORECASE),
+]
+
+ACTION_KEYWORDS = [
+    "please", "need to", "should", "must", "required",
+    "action", "task", "todo", "reminder", "follow up"
+]
+
 
 def _load_spacy_model():
     """Load spaCy model lazily (only when needed)"""
     global _nlp_model, _nlp_model_loaded
     if not _nlp_model_loaded:
         try:
-            _nlp_model = spacy.load("en_core_web_sm")
+            # Lemmas are never read; NER, parser (sentences) and tagger (POS) are
+            _nlp_model = spacy.load("en_core_web_sm", exclude=["lemmatizer"])
             logger.info("spaCy model loaded successfully")
         except OSError:
             logger.warning("spaCy model not found. Install with: python -m spacy download en_core_web_sm")
@@ -40,13 +58,48 @@ class NLPExtractor:
             self._nlp = _load_spacy_model()
         return self._nlp
     
+    def analyze(self, text: str) -> Dict[str, Any]:
+        """Parse text once and return dates, entities, amounts and action items from the same Doc"""
+        doc = self.nlp(text) if self.nlp else None
+        return self._analyze_doc(doc, text)
+    
+    def analyze_many(self, texts: List[str], batch_size: int = 32) -> List[Dict[str, Any]]:
+        """Batch variant of analyze using nlp.pipe"""
+        if not self.nlp:
+            return [self._analyze_doc(None, text) for text in texts]
+        return [
+            self._analyze_doc(doc, text)
+            for doc, text in zip(self.nlp.pipe(texts, batch_size=batch_size), texts)
+        ]
+    
+    def _analyze_doc(self, doc, text: str) -> Dict[str, Any]:
+        """Build the combined analysis from an already parsed Doc"""
+        amounts = self.extract_amounts(text)
+        entities = self._entities_from_doc(doc) if doc is not None else {}
+        if entities:
+            entities["amounts"] = amounts
+        return {
+            "dates": self._dates_from_doc(doc, text),
+            "entities": entities,
+            "amounts": amounts,
+            "action_items": self._action_items_from_doc(doc) if doc is not None else [],
+        }
+    
     def extract_entities(self, text: str) -> Dict[str, Any]:
         """Extract named entities from text"""
         if not self.nlp:
             return {}
         
-        doc = self.nlp(text)
+        entities = self._entities_from_doc(self.nlp(text))
+        
+        # Extract amounts
+        amounts = self._extract_amounts(text)
+        entities["amounts"] = amounts
         
+        return entities
+    
+    def _entities_from_doc(self, doc) -> Dict[str, Any]:
+        """Group a Doc's named entities by type"""
         entities = {
             "people": [],
             "organizations": [],
@@ -65,19 +118,18 @@ class NLPExtractor:
             elif ent.label_ == "DATE":
                 entities["dates"].append(ent.text)
         
-        # Extract amounts
-        amounts = self._extract_amounts(text)
-        entities["amounts"] = amounts
-        
         return entities
     
     def extract_dates(self, text: str) -> List[Dict[str, Any]]:
         """Extract dates from text"""
+        return self._dates_from_doc(self.nlp(text) if self.nlp else None, text)
+    
+    def _dates_from_doc(self, doc, text: str) -> List[Dict[str, Any]]:
+        """spaCy DATE entities from a parsed Doc plus regex date patterns"""
         dates = []
         
         # Use spaCy for date extraction
-        if self.nlp:
-            doc = self.nlp(text)
+        if doc is not None:
             for ent in doc.ents:
                 if ent.label_ == "DATE":
                     dates.append({
@@ -88,15 +140,8 @@ class NLPExtractor:
                     })
         
         # Also use regex for common date patterns
-        date_patterns = [
-            r'\d{1,2}[/-]\d{1,2}[/-]\d{2,4}',
-            r'\d{1,2}\s+(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{2,4}',
-            r'(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{1,2},?\s+\d{2,4}',
-        ]
-        
-        for pattern in date_patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
+        for pattern in DATE_PATTERNS:
+            for match in pattern.finditer(text):
                 dates.append({
                     "text": match.group(),
                     "start": match.start(),
@@ -111,15 +156,8 @@ class NLPExtractor:
         amounts = []
         
         # Pattern for currency amounts
-        patterns = [
-            r'\$[\d,]+\.?\d*',
-            r'[\d,]+\.?\d*\s*(dollars?|USD|EUR|GBP|INR)',
-            r'(dollars?|USD|EUR|GBP|INR)\s*[\d,]+\.?\d*',
-        ]
-        
-        for pattern in patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
+        for pattern in AMOUNT_PATTERNS:
+            for match in pattern.finditer(text):
                 amounts.append({
                     "text": match.group(),
                     "start": match.start(),
@@ -131,25 +169,21 @@ class NLPExtractor:
     
     def extract_action_items(self, text: str) -> List[str]:
         """Extract potential action items from text"""
+        if not self.nlp:
+            return []
+        return self._action_items_from_doc(self.nlp(text))
+    
+    def _action_items_from_doc(self, doc) -> List[str]:
+        """Action sentences from a parsed Doc"""
         action_items = []
         
         # Look for imperative verbs and action phrases
-        if self.nlp:
-            doc = self.nlp(text)
-            sentences = [sent.text for sent in doc.sents]
-            
-            action_keywords = [
-                "please", "need to", "should", "must", "required",
-                "action", "task", "todo", "reminder", "follow up"
-            ]
-            
-            for sentence in sentences:
-                sentence_lower = sentence.lower()
-                if any(keyword in sentence_lower for keyword in action_keywords):
-                    # Check if sentence starts with imperative verb
-                    sent_doc = self.nlp(sentence)
-                    if sent_doc and sent_doc[0].pos_ == "VERB":
-                        action_items.append(sentence.strip())
+        for sent in doc.sents:
+            sentence_lower = sent.text.lower()
+            if any(keyword in sentence_lower for keyword in ACTION_KEYWORDS):
+                # Check if sentence starts with imperative verb (tags come from the same parse)
+                if len(sent) and sent[0].pos_ == "VERB":
+                    action_items.append(sent.text.strip())
         
         return action_items
     
@@ -183,7 +183,8 @@ class PlanGenerator:
 
 Provide practical, actionable recommendations. Keep it under 100 words."""
             
-            response = await llm_client.generate(prompt=prompt)
+            # Recommendations should vary day to day - never serve them from cache
+            response = await llm_client.generate(prompt=prompt, cache=False)
             return response.strip() if response else None
         except Exception as e:
             logger.warning("Recommendation generation error", error=str(e))
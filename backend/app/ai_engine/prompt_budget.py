@@ -0,0 +1,183 @@
+"""Token-budget aware prompt text fitting"""
+import math
+import re
+from typing import Any, Dict, List, Optional, Tuple
+from app.config import settings
+from app.ai_engine.nlp_extractor import DATE_PATTERNS, AMOUNT_PATTERNS, ACTION_KEYWORDS
+import structlog
+
+logger = structlog.get_logger()
+
+# Average characters per sub-word token, by model family (first match wins)
+MODEL_CHARS_PER_TOKEN: List[Tuple[str, float]] = [
+    ("gemini", 4.0),
+    ("llama3", 4.2),  # 128k-entry vocabulary
+    ("llama", 3.5),
+    ("mistral", 3.5),
+    ("mixtral", 3.5),
+    ("qwen", 4.0),
+    ("phi", 3.8),
+]
+DEFAULT_CHARS_PER_TOKEN = 3.8
+
+OMISSION_MARKER = "[...]"
+QUOTED_MARKER = "--- quoted reply ---"
+
+_TOKEN_RE = re.compile(r"[^\W\d_]+|\d+|[^\w\s]|_", re.UNICODE)
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+
+# Extra date words the regex patterns above do not cover (relative dates, weekdays)
+_RELATIVE_DATE_RE = re.compile(
+    r"\b(today|tomorrow|tonight|next week|next month|deadline|due|by (monday|tuesday|wednesday|thursday|friday|saturday|sunday)"
+    r"|monday|tuesday|wednesday|thursday|friday|saturday|sunday)\b",
+    re.IGNORECASE,
+)
+
+_QUOTE_START_RES = [
+    re.compile(r"^\s*On .{0,300}wrote:\s*$", re.IGNORECASE),
+    re.compile(r"^\s*-{2,}\s*(Original|Forwarded) Message\s*-{2,}", re.IGNORECASE),
+    re.compile(r"^\s*_{10,}\s*$"),
+    re.compile(r"^\s*>"),
+]
+_HEADER_BLOCK_RE = re.compile(r"^\s*From:\s", re.IGNORECASE)
+_HEADER_FOLLOW_RE = re.compile(r"^\s*(Sent|Date|To|Subject):\s", re.IGNORECASE)
+
+
+class PromptBudget:
+    """Count tokens with an approximate per-model tokenizer and fit text into a token budget"""
+
+    def model_for(self, backend: Optional[str] = None) -> str:
+        """Configured model name for a backend"""
+        if backend == "gemini":
+            return settings.GEMINI_MODEL
+        return settings.OLLAMA_MODEL
+
+    def budget_for(self, backend: Optional[str] = None) -> int:
+        """Input text token budget for a backend"""
+        if backend == "gemini":
+            return settings.AI_PROMPT_TOKEN_BUDGET_GEMINI
+        return settings.AI_PROMPT_TOKEN_BUDGET_OLLAMA
+
+    def chars_per_token(self, backend: Optional[str] = None) -> float:
+        """Average characters per token for the backend's model family"""
+        model = self.model_for(backend).lower()
+        for family, ratio in MODEL_CHARS_PER_TOKEN:
+            if family in model:
+                return ratio
+        return DEFAULT_CHARS_PER_TOKEN
+
+    def count_tokens(self, text: str, backend: Optional[str] = None) -> int:
+        """Approximate token count: words split into sub-word pieces, digits in groups of three"""
+        if not text:
+            return 0
+        # Common words are a single token; longer ones split roughly every 2x the average piece size
+        word_chars = self.chars_per_token(backend) * 2
+        tokens = 0
+        for match in _TOKEN_RE.finditer(text):
+            piece = match.group()
+            if piece.isdigit():
+                tokens += math.ceil(len(piece) / 3)
+            elif len(piece) <= word_chars:
+                tokens += 1
+            else:
+                tokens += math.ceil(len(piece) / word_chars)
+        return tokens
+
+    def split_quoted_reply(self, text: str) -> Tuple[str, str]:
+        """Split an email body at the quoted-reply boundary into (new text, quoted history)"""
+        lines = text.splitlines(keepends=True)
+        offset = 0
+        for index, line in enumerate(lines):
+            boundary = any(pattern.match(line) for pattern in _QUOTE_START_RES)
+            if not boundary and _HEADER_BLOCK_RE.match(line):
+                boundary = any(_HEADER_FOLLOW_RE.match(following) for following in lines[index + 1:index + 5])
+            if boundary and text[:offset].strip():
+                return text[:offset], text[offset:]
+            offset += len(line)
+        return text, ""
+
+    def _sentences(self, text: str) -> List[str]:
+        return [sentence.strip() for sentence in _SENTENCE_SPLIT_RE.split(text) if sentence and sentence.strip()]
+
+    def _score(self, sentence: str) -> int:
+        """Signal score: dates and amounts highest, then action phrases"""
+        if any(pattern.search(sentence) for pattern in DATE_PATTERNS) or _RELATIVE_DATE_RE.search(sentence):
+            return 3
+        if any(pattern.search(sentence) for pattern in AMOUNT_PATTERNS):
+            return 3
+        lowered = sentence.lower()
+        if any(keyword in lowered for keyword in ACTION_KEYWORDS):
+            return 2
+        return 1
+
+    def fit_text(self, text: str, max_tokens: Optional[int] = None, backend: Optional[str] = None) -> Dict[str, Any]:
+        """Fit text into max_tokens, keeping the highest-signal sentences in their original order
+
+        The new part of an email thread is preferred over quoted history; quoted
+        sentences are only kept when they mention a date or amount. Returns a dict
+        with the fitted "text", its "tokens", the "original_tokens" and "truncated".
+        """
+        if max_tokens is None:
+            max_tokens = self.budget_for(backend)
+        original_tokens = self.count_tokens(text, backend)
+        if original_tokens <= max_tokens:
+            return {"text": text, "tokens": original_tokens, "original_tokens": original_tokens, "truncated": False}
+
+        body, quoted = self.split_quoted_reply(text)
+        candidates = []  # (score, position, in_quote, sentence, tokens)
+        for in_quote, part in ((False, body), (True, quoted)):
+            for sentence in self._sentences(part):
+                position = len(candidates)
+                score = self._score(sentence)
+                if in_quote:
+                    if score < 3:
+                        continue
+                    score = 1
+                elif position < 2:
+                    # Opening lines carry the subject of the message
+                    score = max(score, 2)
+                candidates.append((score, position, in_quote, sentence, self.count_tokens(sentence, backend)))
+
+        marker_tokens = self.count_tokens(OMISSION_MARKER, backend)
+        quoted_marker_tokens = self.count_tokens(QUOTED_MARKER, backend)
+        selected = []
+        used = 0
+        for candidate in sorted(candidates, key=lambda c: (-c[0], c[1])):
+            cost = candidate[4] + marker_tokens + (quoted_marker_tokens if candidate[2] else 0)
+            if used + cost <= max_tokens:
+                selected.append(candidate)
+                used += cost
+
+        if not selected:
+            # A single sentence is larger than the budget - hard cut it
+            first = candidates[0][3] if candidates else text
+            fitted = first[:int(max_tokens * self.chars_per_token(backend))]
+        else:
+            parts = []
+            previous_position = -1
+            quote_started = False
+            for _, position, in_quote, sentence, _ in sorted(selected, key=lambda c: c[1]):
+                if in_quote and not quote_started:
+                    parts.append(QUOTED_MARKER)
+                    quote_started = True
+                elif position != previous_position + 1:
+                    parts.append(OMISSION_MARKER)
+                parts.append(sentence)
+                previous_position = position
+            if previous_position != len(candidates) - 1:
+                parts.append(OMISSION_MARKER)
+            fitted = "\n".join(parts)
+
+        tokens = self.count_tokens(fitted, backend)
+        logger.debug(
+            "Prompt text fitted to token budget",
+            backend=backend,
+            original_tokens=original_tokens,
+            tokens=tokens,
+            budget=max_tokens,
+        )
+        return {"text": fitted, "tokens": tokens, "original_tokens": original_tokens, "truncated": True}
+
+
+# Global prompt budget instance
+prompt_budget = PromptBudget()
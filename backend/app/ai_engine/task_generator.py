@@ -1,39 +1,19 @@
 """AI task generator"""
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator
 from datetime import datetime
 from app.ai_engine.llm_client import llm_client
-from app.ai_engine.nlp_extractor import nlp_extractor
-from app.ai_engine.extractors import date_extractor
+from app.ai_engine.nlp_executor import nlp_executor
+from app.ai_engine.prompt_budget import prompt_budget
+from app.config import settings
+import asyncio
+import contextlib
 import json
 import structlog
 
 logger = structlog.get_logger()
 
-
-class TaskGenerator:
-    """Generate tasks from text using AI"""
-    
-    async def extract_tasks(
-        self,
-        text: str,
-        source_type: str = "email",
-        context: Optional[Dict[str, Any]] = None
-    ) -> List[Dict[str, Any]]:
-        """Extract tasks from text with improved prompts and accuracy"""
-        try:
-            # First, use NLP to find potential action items and dates
-            action_items = nlp_extractor.extract_action_items(text)
-            dates = date_extractor.extract_dates(text)
-            
-            # Check if LLM is available
-            llm_available = await llm_client.check_connection()
-            
-            if not llm_available:
-                logger.warning("LLM not available, using NLP fallback")
-                return self._fallback_extract_tasks(text)
-            
-            # Enhanced system prompt with better instructions
-            system_prompt = """You are an expert task extraction assistant. Your job is to identify actionable tasks from text.
+# Enhanced system prompt with better instructions
+TASK_SYSTEM_PROMPT = """You are an expert task extraction assistant. Your job is to identify actionable tasks from text.
 
 CRITICAL RULES:
 1. Only extract tasks that are ACTIONABLE (something someone needs to DO)
@@ -54,96 +34,454 @@ CRITICAL RULES:
 11. Return ONLY valid JSON array, no additional text
 
 Return format: [{"title": "Task title", "description": "Optional details", "consequences": "What happens if missed", "confidence_score": 0-1, "due_date": "YYYY-MM-DD or null", "priority": 0-100, "estimated_duration": minutes or null, "goal_category": "Health/Career/etc", "institution_name": "Name of institution or null"}]"""
+
+BATCH_INSTRUCTIONS = """
+BATCH MODE:
+You will receive several items, each introduced by a line "### ITEM <id>".
+Extract tasks for each item independently - never mix tasks between items.
+Return ONLY a JSON object mapping every item id to its JSON array of tasks (use [] when an item has no tasks).
+Return format: {"1": [tasks for item 1], "2": [tasks for item 2]}"""
+
+BATCH_SYSTEM_PROMPT = f"{TASK_SYSTEM_PROMPT}\n{BATCH_INSTRUCTIONS}"
+
+
+class IncrementalJSONArrayParser:
+    """Yield the objects of a streamed JSON array as soon as each one is complete
+    
+    The first "[" in the stream is taken as the task array, so markdown fences,
+    leading prose and a {"tasks": [...]} wrapper are all tolerated. Only objects
+    that are direct elements of that array are emitted.
+    """
+    
+    def __init__(self):
+        self.buffer = ""
+        self.emitted = 0
+        self._pos = 0
+        self._stack: List[str] = []
+        self._array_depth: Optional[int] = None
+        self._object_start: Optional[int] = None
+        self._in_string = False
+        self._escape = False
+    
+    def feed(self, chunk: str) -> List[Any]:
+        """Add a chunk and return the array elements it completed"""
+        self.buffer += chunk
+        completed = []
+        
+        while self._pos < len(self.buffer):
+            char = self.buffer[self._pos]
             
-            # Enhanced user prompt with context
-            context_info = ""
-            if context:
-                if context.get("sender_email"):
-                    context_info += f"\nSender: {context.get('sender_email')}\n"
-                if context.get("subject"):
-                    context_info += f"Subject: {context.get('subject')}\n"
-                if dates:
-                    context_info += f"Dates found in text: {[d.get('text', '') for d in dates[:3]]}\n"
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "[{":
+                if char == "[" and self._array_depth is None:
+                    self._array_depth = len(self._stack) + 1
+                elif char == "{" and self._array_depth is not None and len(self._stack) == self._array_depth:
+                    self._object_start = self._pos
+                self._stack.append(char)
+            elif char in "]}" and self._stack:
+                self._stack.pop()
+                if (
+                    char == "}"
+                    and self._object_start is not None
+                    and len(self._stack) == self._array_depth
+                ):
+                    try:
+                        completed.append(json.loads(self.buffer[self._object_start:self._pos + 1]))
+                    except json.JSONDecodeError:
+                        pass
+                    self._object_start = None
+                elif char == "]" and self._array_depth is not None and len(self._stack) < self._array_depth:
+                    # Task array closed - ignore anything after it
+                    self._array_depth = -1
             
-            user_prompt = f"""Extract actionable tasks from this {source_type}:
-{context_info}
----
-Text:
-{text[:4000]}
+            self._pos += 1
+        
+        self.emitted += len(completed)
+        return completed
+    
+    def close(self) -> List[Any]:
+        """Parse the whole response if streaming found no array elements (e.g. a single object)"""
+        if self.emitted:
+            return []
+        start = min((i for i in (self.buffer.find("["), self.buffer.find("{")) if i >= 0), default=0)
+        end = max(self.buffer.rfind("]"), self.buffer.rfind("}")) + 1 or len(self.buffer)
+        parsed = json.loads(self.buffer[start:end])
+        if isinstance(parsed, dict) and isinstance(parsed.get("tasks"), list):
+            return parsed["tasks"]
+        return parsed if isinstance(parsed, list) else [parsed]
 
-Analyze the text and extract all actionable tasks. Return a JSON array of tasks."""
+
+class TaskGenerator:
+    """Generate tasks from text using AI"""
+    
+    async def extract_tasks(
+        self,
+        text: str,
+        source_type: str = "email",
+        context: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """Extract tasks from text with improved prompts and accuracy"""
+        try:
+            # First, use NLP to find potential due dates (off the event loop)
+            dates = await nlp_executor.parse_dates(text)
+            
+            # Check if LLM is available (cached health state, no network call)
+            llm_available = llm_client.is_available()
+            
+            if not llm_available:
+                logger.warning("LLM not available, using NLP fallback")
+                return await self._fallback_extract_tasks(text)
             
             response = await llm_client.generate(
-                prompt=user_prompt,
-                system_prompt=system_prompt,
+                prompt=self._build_task_prompt(text, source_type, context, dates),
+                system_prompt=TASK_SYSTEM_PROMPT,
                 format="json",
                 temperature=0.3  # Lower temperature for more consistent task extraction
             )
             
             try:
-                # Clean response - remove markdown code blocks if present
-                cleaned_response = response.strip()
-                if cleaned_response.startswith("```json"):
-                    cleaned_response = cleaned_response[7:]
-                if cleaned_response.startswith("```"):
-                    cleaned_response = cleaned_response[3:]
-                if cleaned_response.endswith("```"):
-                    cleaned_response = cleaned_response[:-3]
-                cleaned_response = cleaned_response.strip()
-                
-                tasks = json.loads(cleaned_response)
+                tasks = json.loads(self._clean_json_response(response))
                 if not isinstance(tasks, list):
                     tasks = [tasks]
                 
-                # Validate and clean tasks with improved logic
-                validated_tasks = []
-                for task in tasks:
-                    if isinstance(task, dict) and "title" in task:
-                        title = task.get("title", "").strip()
-                        
-                        # Skip if title is too short or seems invalid
-                        if len(title) < 3:
-                            continue
-                        
-                        # Skip if it looks like a completed task
-                        if any(word in title.lower() for word in ["completed", "done", "finished", "sent", "received"]):
-                            continue
-                        
-                        validated_task = {
-                            "title": title,
-                            "description": self._clean_description(task.get("description", "").strip()),
-                            "consequences": task.get("consequences", "").strip(),
-                            "confidence_score": self._validate_confidence(task.get("confidence_score", 1.0)),
-                            "due_date": self._parse_due_date(task.get("due_date"), dates),
-                            "priority": self._validate_priority(task.get("priority", 50)),
-                            "estimated_duration": self._validate_duration(task.get("estimated_duration")),
-                            "goal_category": task.get("goal_category"),
-                            "institution_name": task.get("institution_name"),
-                            "ai_generated": True,
-                            "is_approved": False  # New tasks need approval
-                        }
-                        
-                        if validated_task["title"]:
-                            validated_tasks.append(validated_task)
-                
-                # Remove duplicates based on title similarity
-                validated_tasks = self._deduplicate_tasks(validated_tasks)
+                validated_tasks = self._validate_tasks(tasks, dates)
                 
                 logger.info(f"Extracted {len(validated_tasks)} tasks from {source_type}")
                 return validated_tasks
             except json.JSONDecodeError as e:
                 logger.warning(f"Failed to parse LLM task response: {e}, using NLP fallback")
                 logger.debug(f"LLM response was: {response[:500]}")
-                return self._fallback_extract_tasks(text)
+                return await self._fallback_extract_tasks(text)
                 
         except Exception as e:
             logger.error("Task extraction error", error=str(e))
-            return self._fallback_extract_tasks(text)
+            return await self._fallback_extract_tasks(text)
     
-    def _fallback_extract_tasks(self, text: str) -> List[Dict[str, Any]]:
+    async def extract_tasks_stream(
+        self,
+        text: str,
+        source_type: str = "email",
+        context: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield validated tasks one by one as the LLM streams them"""
+        dates = await nlp_executor.parse_dates(text)
+        
+        if not llm_client.is_available():
+            logger.warning("LLM not available, using NLP fallback")
+            for task in await self._fallback_extract_tasks(text):
+                yield task
+            return
+        
+        parser = IncrementalJSONArrayParser()
+        seen_titles: List[str] = []
+        count = 0
+        
+        def accept(task: Any) -> Optional[Dict[str, Any]]:
+            # Same duplicate rule as _deduplicate_tasks, checked against tasks already yielded
+            validated_task = self._validate_task(task, dates)
+            if not validated_task:
+                return None
+            title_lower = validated_task["title"].lower().strip()
+            if self._is_duplicate_title(title_lower, seen_titles):
+                return None
+            seen_titles.append(title_lower)
+            return validated_task
+        
+        async for chunk in llm_client.generate_stream(
+            prompt=self._build_task_prompt(text, source_type, context, dates),
+            system_prompt=TASK_SYSTEM_PROMPT,
+            format="json",
+            temperature=0.3
+        ):
+            for task in parser.feed(chunk):
+                validated_task = accept(task)
+                if validated_task:
+                    count += 1
+                    yield validated_task
+        
+        try:
+            remaining = parser.close()
+        except json.JSONDecodeError as e:
+            remaining = []
+            if count == 0:
+                logger.warning(f"Failed to parse streamed LLM task response: {e}, using NLP fallback")
+                for task in await self._fallback_extract_tasks(text):
+                    yield task
+                return
+        
+        for task in remaining:
+            validated_task = accept(task)
+            if validated_task:
+                count += 1
+                yield validated_task
+        
+        logger.info(f"Streamed {count} tasks from {source_type}")
+    
+    def _build_task_prompt(
+        self,
+        text: str,
+        source_type: str,
+        context: Optional[Dict[str, Any]],
+        dates: List[Dict[str, Any]]
+    ) -> str:
+        """Single-item task extraction prompt with context, text fitted to the backend's token budget"""
+        context_info = self._build_context_info(context, dates)
+        fitted = prompt_budget.fit_text(text, backend=llm_client.primary_backend())
+        
+        return f"""Extract actionable tasks from this {source_type}:
+{context_info}
+---
+Text:
+{fitted["text"]}
+
+Analyze the text and extract all actionable tasks. Return a JSON array of tasks."""
+    
+    async def extract_tasks_batch(
+        self,
+        items: List[Dict[str, Any]],
+        source_type: str = "email",
+        limit: Optional[asyncio.Semaphore] = None
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Extract tasks for several texts, packing them into as few LLM calls as the token budget allows
+        
+        Each item is a dict with "id", "text" and an optional "context". Returns
+        a mapping of item id to its validated task list. Items whose results
+        are missing from a batch response fall back to a per-item call. When
+        `limit` is given, each batch holds it for the duration of its calls.
+        """
+        items = [item for item in items if item.get("text")]
+        if not items:
+            return {}
+        
+        if not llm_client.is_available():
+            logger.warning("LLM not available, using NLP fallback")
+            fallbacks = await asyncio.gather(*(self._fallback_extract_tasks(item["text"]) for item in items))
+            return {str(item["id"]): tasks for item, tasks in zip(items, fallbacks)}
+        
+        # Fit each text to its token budget once; packing and batch prompts reuse it
+        backend = llm_client.primary_backend()
+        item_budget = min(prompt_budget.budget_for(backend), settings.AI_BATCH_TOKEN_BUDGET)
+        items = [
+            {**item, "prompt_text": prompt_budget.fit_text(item["text"], item_budget, backend)["text"]}
+            for item in items
+        ]
+        
+        async def run_batch(batch: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+            async with limit or contextlib.nullcontext():
+                if len(batch) == 1:
+                    item = batch[0]
+                    return {str(item["id"]): await self.extract_tasks(item["text"], source_type, item.get("context"))}
+                return await self._extract_batch(batch, source_type)
+        
+        # Batches run concurrently under the caller's limit; LLMClient bounds in-flight calls per backend
+        results: Dict[str, List[Dict[str, Any]]] = {}
+        for batch_results in await asyncio.gather(
+            *(run_batch(batch) for batch in self._pack_batches(items, source_type))
+        ):
+            results.update(batch_results)
+        
+        return results
+    
+    async def _extract_batch(
+        self,
+        batch: List[Dict[str, Any]],
+        source_type: str
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Run one multi-item LLM call, falling back per item on unparseable output"""
+        # Short positional keys keep the prompt small and are easy for the model to echo back
+        keyed = {str(index): item for index, item in enumerate(batch, start=1)}
+        parsed_dates = await asyncio.gather(*(nlp_executor.parse_dates(item["text"]) for item in keyed.values()))
+        dates_by_key = dict(zip(keyed.keys(), parsed_dates))
+        
+        user_prompt = f"Extract actionable tasks from each of these {len(batch)} {source_type} items.\n\n"
+        user_prompt += "\n\n".join(
+            self._format_batch_item(key, item, dates_by_key[key], source_type)
+            for key, item in keyed.items()
+        )
+        user_prompt += "\n\nReturn a JSON object mapping each item id to its array of tasks."
+        
+        response = await llm_client.generate(
+            prompt=user_prompt,
+            system_prompt=BATCH_SYSTEM_PROMPT,
+            format="json",
+            temperature=0.3,
+            max_tokens=self._batch_output_tokens(len(batch))
+        )
+        
+        parsed: Dict[str, Any] = {}
+        try:
+            parsed = json.loads(self._clean_json_response(response))
+            if not isinstance(parsed, dict):
+                parsed = {}
+        except json.JSONDecodeError as e:
+            logger.warning(f"Failed to parse batch task response: {e}, falling back to per-item extraction")
+        
+        results: Dict[str, List[Dict[str, Any]]] = {}
+        missing = []
+        for key, item in keyed.items():
+            item_tasks = parsed.get(key)
+            if isinstance(item_tasks, dict):
+                item_tasks = [item_tasks]
+            if isinstance(item_tasks, list):
+                results[str(item["id"])] = self._validate_tasks(item_tasks, dates_by_key[key])
+            else:
+                missing.append(item)
+        
+        # Items the batch answer left out fall back to concurrent per-item calls
+        fallbacks = await asyncio.gather(
+            *(self.extract_tasks(item["text"], source_type, item.get("context")) for item in missing)
+        )
+        for item, item_tasks in zip(missing, fallbacks):
+            results[str(item["id"])] = item_tasks
+        
+        logger.info(
+            f"Extracted tasks for {len(batch)} {source_type} items in one batch",
+            parsed_items=sum(1 for key in keyed if isinstance(parsed.get(key), (list, dict)))
+        )
+        return results
+    
+    def _pack_batches(
+        self,
+        items: List[Dict[str, Any]],
+        source_type: str
+    ) -> List[List[Dict[str, Any]]]:
+        """Greedily pack items into batches that fit the backend's token budget
+        
+        The budget covers the whole call: the batch system prompt, every item
+        section and the output reserved for each item's answer.
+        """
+        backend = llm_client.primary_backend()
+        budget = min(settings.AI_BATCH_TOKEN_BUDGET, prompt_budget.budget_for(backend))
+        budget -= prompt_budget.count_tokens(BATCH_SYSTEM_PROMPT, backend)
+        batches: List[List[Dict[str, Any]]] = []
+        current: List[Dict[str, Any]] = []
+        current_tokens = 0
+        
+        for item in items:
+            item_tokens = prompt_budget.count_tokens(
+                self._format_batch_item("00", item, [], source_type),
+                backend
+            ) + settings.AI_BATCH_OUTPUT_TOKENS_PER_ITEM
+            if current and (
+                current_tokens + item_tokens > budget
+                or len(current) >= settings.AI_BATCH_MAX_ITEMS
+            ):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(item)
+            current_tokens += item_tokens
+        
+        if current:
+            batches.append(current)
+        return batches
+    
+    def _batch_output_tokens(self, item_count: int) -> int:
+        """Output tokens for a batch call, matching what _pack_batches reserved"""
+        return min(settings.AI_BATCH_OUTPUT_TOKENS_PER_ITEM * item_count, settings.AI_BATCH_MAX_OUTPUT_TOKENS)
+    
+    def _format_batch_item(
+        self,
+        key: str,
+        item: Dict[str, Any],
+        dates: List[Dict[str, Any]],
+        source_type: str
+    ) -> str:
+        """Render one item section of a batch prompt"""
+        context_info = self._build_context_info(item.get("context"), dates)
+        return f"""### ITEM {key}
+{context_info}
+Text:
+{item.get("prompt_text", item["text"])}"""
+    
+    def _build_context_info(
+        self,
+        context: Optional[Dict[str, Any]],
+        dates: Optional[List[Dict[str, Any]]]
+    ) -> str:
+        """Sender/subject/date hints added to the user prompt"""
+        context_info = ""
+        if context:
+            if context.get("sender_email"):
+                context_info += f"\nSender: {context.get('sender_email')}\n"
+            if context.get("subject"):
+                context_info += f"Subject: {context.get('subject')}\n"
+            if dates:
+                context_info += f"Dates found in text: {[d.get('text', '') for d in dates[:3]]}\n"
+        return context_info
+    
+    def _clean_json_response(self, response: str) -> str:
+        """Clean response - remove markdown code blocks if present"""
+        cleaned_response = response.strip()
+        if cleaned_response.startswith("```json"):
+            cleaned_response = cleaned_response[7:]
+        if cleaned_response.startswith("```"):
+            cleaned_response = cleaned_response[3:]
+        if cleaned_response.endswith("```"):
+            cleaned_response = cleaned_response[:-3]
+        return cleaned_response.strip()
+    
+    def _validate_tasks(
+        self,
+        tasks: List[Any],
+        dates: Optional[List[Dict[str, Any]]] = None
+    ) -> List[Dict[str, Any]]:
+        """Validate and clean LLM task objects with improved logic"""
+        validated_tasks = []
+        for task in tasks:
+            validated_task = self._validate_task(task, dates)
+            if validated_task:
+                validated_tasks.append(validated_task)
+        
+        # Remove duplicates based on title similarity
+        return self._deduplicate_tasks(validated_tasks)
+    
+    def _validate_task(
+        self,
+        task: Any,
+        dates: Optional[List[Dict[str, Any]]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Validate a single LLM task object, returning None if it should be dropped"""
+        if not isinstance(task, dict) or "title" not in task:
+            return None
+        
+        title = (task.get("title") or "").strip()
+        
+        # Skip if title is too short or seems invalid
+        if len(title) < 3:
+            return None
+        
+        # Skip if it looks like a completed task
+        if any(word in title.lower() for word in ["completed", "done", "finished", "sent", "received"]):
+            return None
+        
+        return {
+            "title": title,
+            "description": self._clean_description((task.get("description") or "").strip()),
+            "consequences": (task.get("consequences") or "").strip(),
+            "confidence_score": self._validate_confidence(task.get("confidence_score", 1.0)),
+            "due_date": self._parse_due_date(task.get("due_date"), dates),
+            "priority": self._validate_priority(task.get("priority", 50)),
+            "estimated_duration": self._validate_duration(task.get("estimated_duration")),
+            "goal_category": task.get("goal_category"),
+            "institution_name": task.get("institution_name"),
+            "ai_generated": True,
+            "is_approved": False  # New tasks need approval
+        }
+    
+    async def _fallback_extract_tasks(self, text: str) -> List[Dict[str, Any]]:
         """Fallback task extraction using NLP"""
-        action_items = nlp_extractor.extract_action_items(text)
-        dates = date_extractor.extract_dates(text)
+        action_items, dates = await asyncio.gather(
+            nlp_executor.extract_action_items(text),
+            nlp_executor.parse_dates(text)
+        )
         
         tasks = []
         for item in action_items[:5]:  # Limit to 5 tasks
@@ -223,29 +561,23 @@ Analyze the text and extract all actionable tasks. Return a JSON array of tasks.
             return tasks
         
         unique_tasks = []
-        seen_titles = set()
+        seen_titles: List[str] = []
         
         for task in tasks:
             title_lower = task["title"].lower().strip()
-            # Simple deduplication - check for exact matches
-            if title_lower not in seen_titles:
-                seen_titles.add(title_lower)
+            if not self._is_duplicate_title(title_lower, seen_titles):
+                seen_titles.append(title_lower)
                 unique_tasks.append(task)
-            else:
-                # Check for very similar titles (fuzzy match)
-                is_duplicate = False
-                for seen_title in seen_titles:
-                    # Simple similarity check
-                    if self._titles_similar(title_lower, seen_title):
-                        is_duplicate = True
-                        break
-                
-                if not is_duplicate:
-                    seen_titles.add(title_lower)
-                    unique_tasks.append(task)
         
         return unique_tasks
     
+    def _is_duplicate_title(self, title_lower: str, seen_titles: List[str]) -> bool:
+        """Whether a lowercased title matches or closely resembles one already kept"""
+        return any(
+            title_lower == seen_title or self._titles_similar(title_lower, seen_title)
+            for seen_title in seen_titles
+        )
+    
     def _titles_similar(self, title1: str, title2: str, threshold: float = 0.8) -> bool:
         """Check if two task titles are similar"""
         # Simple word-based similarity
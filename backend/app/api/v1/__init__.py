@@ -1 +1 @@
-from . import auth, emails, documents, tasks, reminders, notifications, plans, settings, ai_los
+from . import auth, emails, documents, tasks, reminders, notifications, plans, settings, ai_los, search
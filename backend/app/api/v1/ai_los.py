@@ -4,7 +4,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from app.database import get_db
 from app.dependencies import get_current_user
-from app.models.user import User
+from app.services.user_cache import UserSnapshot
 from app.models.graph import ActionSuggestion, Goal
 from sqlalchemy import select
 import uuid
@@ -13,7 +13,7 @@ router = APIRouter()
 
 @router.get("/suggestions", response_model=List[dict])
 async def get_action_suggestions(
-    current_user: User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Get active AI action suggestions (Action Cards)"""
@@ -40,7 +40,7 @@ async def get_action_suggestions(
 @router.post("/suggestions/{suggestion_id}/dismiss")
 async def dismiss_suggestion(
     suggestion_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Dismiss an action suggestion"""
@@ -60,7 +60,7 @@ async def dismiss_suggestion(
 
 @router.get("/goals", response_model=List[dict])
 async def list_goals(
-    current_user: User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """List user goals"""
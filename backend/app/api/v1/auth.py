@@ -2,7 +2,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
-from app.dependencies import get_current_user
+from app.dependencies import get_current_user_model
 from app.models.user import User
 from app.schemas.auth import UserRegister, UserLogin, Token, UserResponse
 from app.services.auth_service import auth_service
@@ -133,7 +133,7 @@ async def refresh_token(
 
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_info(
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user_model)
 ):
     """Get current user information"""
     return UserResponse(
@@ -4,7 +4,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 from app.database import get_db
 from app.dependencies import get_current_user
-from app.models.user import User
+from app.services.user_cache import UserSnapshot
 from app.schemas.document import DocumentUploadResponse, DocumentResponse, DocumentListResponse
 from app.services.document_service import document_service
 from app.services.task_service import task_service
@@ -18,7 +18,7 @@ router = APIRouter()
 @router.post("/upload", response_model=DocumentUploadResponse, status_code=status.HTTP_201_CREATED)
 async def upload_document(
     file: UploadFile = File(...),
-    current_user: User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Upload a document"""
@@ -69,7 +69,8 @@ async def upload_document(
             
             # Extract tasks from document if OCR text available
             if document.ocr_text:
-                tasks = await task_generator.extract_tasks(
+                # Create tasks automatically - each one is persisted as soon as the LLM streams it
+                async for task_data in task_generator.extract_tasks_stream(
                     document.ocr_text,
                     "document",
                     context={
@@ -78,10 +79,7 @@ async def upload_document(
                         "file_type": document.file_type,
                         "classification": document.ai_classification
                     }
-                )
-                
-                # Create tasks automatically
-                for task_data in tasks:
+                ):
                     try:
                         # Resolve entities (Goal, etc.)
                         resolved_data = await task_service.resolve_ai_task_entities(db, current_user, task_data)
@@ -135,7 +133,7 @@ async def list_documents(
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
     search: Optional[str] = Query(None),
-    current_user: User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """List user's documents"""
@@ -173,7 +171,9 @@ async def list_documents(
                 ai_extracted_data=doc.ai_extracted_data,
                 uploaded_at=doc.uploaded_at,
                 processed_at=doc.processed_at,
-                presigned_url=presigned_url
+                presigned_url=presigned_url,
+                search_rank=getattr(doc, 'search_rank', None),
+                search_snippet=getattr(doc, 'search_snippet', None)
             )
         )
     
@@ -188,7 +188,7 @@ async def list_documents(
 @router.get("/{document_id}", response_model=DocumentResponse)
 async def get_document(
     document_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Get document details"""
@@ -229,7 +229,7 @@ async def get_document(
 @router.post("/{document_id}/process")
 async def process_document(
     document_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Trigger document processing"""
@@ -246,7 +246,8 @@ async def process_document(
     
     # Extract tasks from document if OCR text available
     if document.ocr_text:
-        tasks = await task_generator.extract_tasks(
+        # Create tasks - each one is persisted as soon as the LLM streams it
+        async for task_data in task_generator.extract_tasks_stream(
             document.ocr_text,
             "document",
             context={
@@ -255,10 +256,7 @@ async def process_document(
                 "file_type": document.file_type,
                 "classification": document.ai_classification
             }
-        )
-        
-        # Create tasks
-        for task_data in tasks:
+        ):
             # Resolve entities (Goal, etc.)
             resolved_data = await task_service.resolve_ai_task_entities(db, current_user, task_data)
             
@@ -287,7 +285,7 @@ async def process_document(
 @router.get("/file/{filename}")
 async def serve_local_file(
     filename: str,
-    current_user: User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Serve local file (fallback when S3 is not configured)"""
@@ -357,7 +355,7 @@ async def serve_local_file(
 @router.delete("/{document_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_document(
     document_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Delete document"""
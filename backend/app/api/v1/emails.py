@@ -1,20 +1,18 @@
 """Email routes"""
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from typing import Optional, List
 from app.database import get_db
 from app.dependencies import get_current_user
-from app.models.user import User
+from app.services.user_cache import UserSnapshot
 from app.models.email import EmailAccount, EmailItem
 from app.schemas.email import EmailAccountCreate, EmailAccountResponse, EmailItemResponse, EmailListResponse, EmailSyncRequest
-from app.services.gmail_service import gmail_service
-from app.services.outlook_service import outlook_service
-from app.services.imap_service import imap_service
 from app.utils.encryption import encrypt_token
-from app.ai_engine.task_generator import task_generator
-from app.ai_engine.priority_scorer import priority_scorer
-from app.ai_engine.nlp_extractor import nlp_extractor
+from app.services.email_sync_service import email_sync_service
+from app.services.sync_progress import sync_progress
+import json
 import uuid
 from datetime import datetime
 import structlog
@@ -26,7 +24,7 @@ router = APIRouter()
 
 @router.get("/oauth/gmail/authorize")
 async def gmail_oauth_authorize(
-    current_user: User = Depends(get_current_user)
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
     """Get Gmail OAuth authorization URL"""
     from app.config import settings
@@ -66,7 +64,7 @@ async def gmail_oauth_authorize(
 
 @router.get("/oauth/outlook/authorize")
 async def outlook_oauth_authorize(
-    current_user: User = Depends(get_current_user)
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
     """Get Outlook OAuth authorization URL"""
     from app.config import settings
@@ -102,7 +100,7 @@ async def oauth_callback(
     code: str = Query(...),
     state: str = Query(...),
     provider: str = Query(None),  # Optional - will be extracted from state
-    current_user: User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Handle OAuth callback and connect email account"""
@@ -425,7 +423,7 @@ async def oauth_callback(
 
 async def _create_email_account(
     account_data: EmailAccountCreate,
-    current_user: User,
+    current_user: UserSnapshot,
     db: AsyncSession
 ) -> EmailAccount:
     """Helper function to create email account"""
@@ -476,7 +474,7 @@ async def _create_email_account(
 @router.post("/connect", response_model=EmailAccountResponse, status_code=status.HTTP_201_CREATED)
 async def connect_email_account(
     account_data: EmailAccountCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Connect an email account"""
@@ -485,7 +483,7 @@ async def connect_email_account(
 
 @router.get("/accounts", response_model=List[EmailAccountResponse])
 async def list_email_accounts(
-    current_user: User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """List connected email accounts (deduplicated by email_address and provider)"""
@@ -520,7 +518,7 @@ async def list_email_accounts(
 
 @router.post("/accounts/cleanup")
 async def cleanup_duplicate_accounts(
-    current_user: User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Remove duplicate email accounts, keeping only the most recent one for each email+provider"""
@@ -563,116 +561,83 @@ async def cleanup_duplicate_accounts(
     return {"deleted_count": deleted_count, "message": f"Removed {deleted_count} duplicate account(s)"}
 
 
-@router.post("/sync")
+@router.post("/sync", status_code=status.HTTP_202_ACCEPTED)
 async def sync_emails(
     sync_request: EmailSyncRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Sync emails from connected accounts"""
-    if sync_request.account_id:
-        result = await db.execute(
-            select(EmailAccount).where(
-                EmailAccount.id == uuid.UUID(sync_request.account_id),
-                EmailAccount.user_id == current_user.id
-            )
-        )
-        accounts = [result.scalar_one_or_none()]
-    else:
-        result = await db.execute(
-            select(EmailAccount).where(
-                EmailAccount.user_id == current_user.id,
-                EmailAccount.sync_enabled == True
-            )
-        )
-        accounts = result.scalars().all()
+    """Start syncing emails from connected accounts
     
-    synced_count = 0
-    for account in accounts:
-        if not account:
-            continue
-        
-        # Get appropriate service
-        if account.provider == "gmail":
-            service = gmail_service
-        elif account.provider == "outlook":
-            service = outlook_service
-        else:
-            service = imap_service
-        
-        # Sync emails
-        email_items = await service.sync_emails(account, current_user)
-        
-        # Process and store emails
-        for email_item in email_items:
-            # Check if email already exists
-            existing = await db.execute(
-                select(EmailItem).where(
-                    EmailItem.provider_message_id == email_item.provider_message_id
-                )
-            )
-            if existing.scalar_one_or_none():
-                continue
-            
-            # AI processing
-            if email_item.body_text:
-                # Extract dates
-                dates = nlp_extractor.extract_dates(email_item.body_text)
-                email_item.ai_extracted_dates = {"dates": dates}
-                
-                # Calculate priority with enhanced factors
-                email_item.ai_priority_score = priority_scorer.calculate_email_priority(
-                    email_item.body_text or "",
-                    email_item.received_at,
-                    email_item.sender_email,
-                    email_item.subject,
-                    email_item.is_read,
-                    email_item.is_important
-                )
-                
-                # Extract tasks with context
-                tasks = await task_generator.extract_tasks(
-                    email_item.body_text,
-                    "email",
-                    context={
-                        "sender_email": email_item.sender_email,
-                        "sender_name": email_item.sender_name,
-                        "subject": email_item.subject,
-                        "received_at": email_item.received_at.isoformat() if email_item.received_at else None
-                    }
-                )
-                email_item.ai_extracted_tasks = {"tasks": tasks}
-            
-            db.add(email_item)
-            synced_count += 1
-        
-        # Update last sync time
-        account.last_sync_at = datetime.now()
-        await db.commit()
-
-        # Level 4: Generate Action Suggestions after sync
-        from app.services.action_service import action_engine
-        from app.models.graph import ActionSuggestion
-        
-        # Get latest emails to analyze
-        result = await db.execute(select(EmailItem).where(EmailItem.email_account_id == account.id).limit(10))
-        latest_emails = result.scalars().all()
-        
-        suggestions = await action_engine.suggest_follow_ups(str(current_user.id), latest_emails)
-        for s in suggestions:
-            new_s = ActionSuggestion(
-                user_id=current_user.id,
-                type=s["type"],
-                source_id=uuid.UUID(s["source_id"]),
-                title=s["title"],
-                description=s["description"],
-                draft_content=s["draft_content"],
-                action_label=s["action_label"]
-            )
-            db.add(new_s)
-        await db.commit()
+    Returns a job id right away; progress is streamed from /sync/{job_id}/events.
+    With the Celery backend the sync is queued to the worker pipeline instead
+    and no progress stream is available.
+    """
+    from app.config import settings
     
-    return {"synced_count": synced_count, "message": "Sync completed and AI insights generated"}
+    if settings.EMAIL_SYNC_BACKEND == "celery":
+        task_ids = await email_sync_service.enqueue_sync(db, current_user, sync_request.account_id)
+        return {
+            "job_id": None,
+            "status": "queued",
+            "task_ids": task_ids,
+            "message": f"Sync queued for {len(task_ids)} account(s)"
+        }
+    
+    job_id = await email_sync_service.start_job(current_user, sync_request.account_id)
+    return {
+        "job_id": job_id,
+        "status": "queued",
+        "events_url": f"/api/v1/emails/sync/{job_id}/events",
+        "message": "Sync started"
+    }
+
+
+async def _get_sync_job(job_id: str, current_user: UserSnapshot) -> str:
+    """Check the sync job exists and belongs to the user"""
+    if await sync_progress.get_owner(job_id) != str(current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Sync job not found"
+        )
+    return job_id
+
+
+@router.get("/sync/{job_id}")
+async def get_sync_job(
+    job_id: str,
+    current_user: UserSnapshot = Depends(get_current_user)
+):
+    """Get sync job status"""
+    await _get_sync_job(job_id, current_user)
+    return await sync_progress.get_status(job_id)
+
+
+@router.get("/sync/{job_id}/events")
+async def stream_sync_events(
+    job_id: str,
+    last_event_id: Optional[int] = Header(None, alias="Last-Event-ID"),
+    current_user: UserSnapshot = Depends(get_current_user)
+):
+    """Stream sync progress as server-sent events (resumable with Last-Event-ID)"""
+    await _get_sync_job(job_id, current_user)
+    
+    async def event_stream():
+        async for entry in sync_progress.stream(job_id, after=last_event_id or 0):
+            if entry is None:
+                # Heartbeat comment keeps idle connections open through proxies
+                yield ": keep-alive\n\n"
+                continue
+            yield f"id: {entry['id']}\nevent: {entry['event']}\ndata: {json.dumps(entry['data'], default=str)}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # Disable nginx response buffering
+        }
+    )
 
 
 @router.get("", response_model=EmailListResponse)
@@ -684,13 +649,20 @@ async def list_emails(
     important_only: Optional[bool] = Query(None),
     date_from: Optional[datetime] = Query(None),
     date_to: Optional[datetime] = Query(None),
-    current_user: User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """List emails with search and filters"""
-    from sqlalchemy import or_, func
+    """List emails with search and filters
+
+    A search term is matched against the full-text search_vector
+    (websearch syntax: quotes, OR, -word) or as a substring of the sender,
+    and results are ranked with a highlighted body snippet.
+    """
+    from sqlalchemy import func
+    from app.services import text_search
     
     offset = (page - 1) * page_size
+    search = search.strip() if search else None
     
     # Get user's email accounts
     accounts_result = await db.execute(
@@ -702,74 +674,56 @@ async def list_emails(
     if not account_ids:
         return EmailListResponse(emails=[], total=0, page=page, page_size=page_size)
     
-    # Build query with filters
-    query = select(EmailItem).where(EmailItem.email_account_id.in_(account_ids))
+    # Build filters once for both the count and the page
+    filters = [EmailItem.email_account_id.in_(account_ids)]
     
-    # Search filter (searches in subject, sender, and body)
     if search:
-        search_pattern = f"%{search.lower()}%"
-        # Use COALESCE to handle NULL values
-        from sqlalchemy import case
-        query = query.where(
-            or_(
-                func.lower(func.coalesce(EmailItem.subject, '')).like(search_pattern),
-                func.lower(func.coalesce(EmailItem.sender_name, '')).like(search_pattern),
-                func.lower(func.coalesce(EmailItem.sender_email, '')).like(search_pattern),
-                func.lower(func.coalesce(EmailItem.body_text, '')).like(search_pattern),
-                func.lower(func.coalesce(EmailItem.ai_summary, '')).like(search_pattern)
-            )
-        )
+        ts_query = text_search.search_query(search)
+        filters.append(text_search.search_filter(
+            EmailItem.search_vector,
+            ts_query,
+            search,
+            [EmailItem.sender_email, EmailItem.sender_name],
+        ))
     
     # Unread filter
     if unread_only is not None:
-        query = query.where(EmailItem.is_read == (not unread_only))
+        filters.append(EmailItem.is_read == (not unread_only))
     
     # Important filter
     if important_only is not None and important_only:
-        query = query.where(EmailItem.is_important == True)
+        filters.append(EmailItem.is_important == True)
     
     # Date range filters
     if date_from:
-        query = query.where(EmailItem.received_at >= date_from)
+        filters.append(EmailItem.received_at >= date_from)
     if date_to:
-        query = query.where(EmailItem.received_at <= date_to)
-    
-    # Get total count (before pagination)
-    count_query = select(func.count(EmailItem.id)).where(EmailItem.email_account_id.in_(account_ids))
-    
-    # Apply same filters to count query
-    if search:
-        search_pattern = f"%{search.lower()}%"
-        count_query = count_query.where(
-            or_(
-                func.lower(func.coalesce(EmailItem.subject, '')).like(search_pattern),
-                func.lower(func.coalesce(EmailItem.sender_name, '')).like(search_pattern),
-                func.lower(func.coalesce(EmailItem.sender_email, '')).like(search_pattern),
-                func.lower(func.coalesce(EmailItem.body_text, '')).like(search_pattern),
-                func.lower(func.coalesce(EmailItem.ai_summary, '')).like(search_pattern)
-            )
-        )
-    if unread_only is not None:
-        count_query = count_query.where(EmailItem.is_read == (not unread_only))
-    if important_only is not None and important_only:
-        count_query = count_query.where(EmailItem.is_important == True)
-    if date_from:
-        count_query = count_query.where(EmailItem.received_at >= date_from)
-    if date_to:
-        count_query = count_query.where(EmailItem.received_at <= date_to)
+        filters.append(EmailItem.received_at <= date_to)
     
     # Get total count
-    total_result = await db.execute(count_query)
+    total_result = await db.execute(select(func.count(EmailItem.id)).where(*filters))
     total = total_result.scalar_one() or 0
     
-    # Get paginated emails
-    result = await db.execute(
-        query
-        .order_by(EmailItem.received_at.desc())
-        .offset(offset)
-        .limit(page_size)
-    )
-    emails = result.scalars().all()
+    # Get paginated emails, best matches first when searching
+    query = select(EmailItem).where(*filters)
+    if search:
+        rank = text_search.search_rank(EmailItem.search_vector, ts_query)
+        query = query.add_columns(rank).order_by(rank.desc(), EmailItem.received_at.desc())
+    else:
+        query = query.order_by(EmailItem.received_at.desc())
+    result = await db.execute(query.offset(offset).limit(page_size))
+    
+    ranks = {}
+    snippets = {}
+    if search:
+        rows = result.all()
+        emails = [row[0] for row in rows]
+        ranks = {row[0].id: row[1] for row in rows}
+        snippets = await text_search.headlines(
+            db, EmailItem.id, EmailItem.body_text, [email.id for email in emails], ts_query
+        )
+    else:
+        emails = result.scalars().all()
     
     # Convert emails to response format (UUID to string)
     email_responses = [
@@ -787,6 +741,8 @@ async def list_emails(
             ai_extracted_dates=email.ai_extracted_dates,
             ai_priority_score=email.ai_priority_score,
             created_at=email.created_at,
+            search_rank=ranks.get(email.id),
+            search_snippet=snippets.get(email.id),
         )
         for email in emails
     ]
@@ -802,7 +758,7 @@ async def list_emails(
 @router.get("/{email_id}", response_model=EmailItemResponse)
 async def get_email(
     email_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Get email details"""
@@ -851,7 +807,7 @@ async def get_email(
 async def mark_email_read(
     email_id: str,
     read: bool = Query(True),
-    current_user: User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Mark email as read or unread"""
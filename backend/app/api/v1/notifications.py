@@ -4,7 +4,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 from app.database import get_db
 from app.dependencies import get_current_user
-from app.models.user import User
+from app.services.user_cache import UserSnapshot
 from app.schemas.notification import NotificationResponse, NotificationListResponse
 from app.services.notification_service import notification_service
 
@@ -16,29 +16,38 @@ async def list_notifications(
     unread_only: bool = Query(False),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
-    current_user: User = Depends(get_current_user),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page; replaces page"),
+    current_user: UserSnapshot = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """List user's notifications"""
-    notifications, total, unread_count = await notification_service.list_notifications(
-        db,
-        current_user,
-        unread_only,
-        page,
-        page_size
-    )
+    try:
+        notifications, total, unread_count, next_cursor = await notification_service.list_notifications(
+            db,
+            current_user,
+            unread_only,
+            page,
+            page_size,
+            cursor
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     
     return NotificationListResponse(
         notifications=notifications,
         total=total,
-        unread_count=unread_count
+        unread_count=unread_count,
+        next_cursor=next_cursor
     )
 
 
 @router.put("/{notification_id}/read", status_code=status.HTTP_204_NO_CONTENT)
 async def mark_notification_read(
     notification_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Mark notification as read"""
@@ -54,7 +63,7 @@ async def mark_notification_read(
 @router.delete("/{notification_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_notification(
     notification_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Delete notification"""
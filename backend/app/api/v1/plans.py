@@ -5,7 +5,7 @@ from datetime import date, datetime
 from typing import Optional
 from app.database import get_db
 from app.dependencies import get_current_user
-from app.models.user import User
+from app.services.user_cache import UserSnapshot
 from app.schemas.plan import DailyPlanResponse
 from app.services.task_service import task_service
 from app.ai_engine.plan_generator import plan_generator
@@ -17,7 +17,7 @@ router = APIRouter()
 
 @router.get("/today", response_model=DailyPlanResponse)
 async def get_today_plan(
-    current_user: User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Get today's action plan"""
@@ -27,12 +27,12 @@ async def get_today_plan(
 @router.get("/{target_date}", response_model=DailyPlanResponse)
 async def get_plan_for_date(
     target_date: date,
-    current_user: User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Get plan for a specific date"""
     # Get all tasks
-    tasks, _ = await task_service.list_tasks(
+    tasks, _, _ = await task_service.list_tasks(
         db,
         current_user,
         status="pending",
@@ -82,14 +82,14 @@ async def get_plan_for_date(
 @router.post("/regenerate")
 async def regenerate_plan(
     target_date: Optional[date] = Query(None),
-    current_user: User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Regenerate plan with AI"""
     target = target_date or date.today()
     
     # Get all tasks
-    tasks, _ = await task_service.list_tasks(
+    tasks, _, _ = await task_service.list_tasks(
         db,
         current_user,
         status="pending",
@@ -3,7 +3,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.dependencies import get_current_user
-from app.models.user import User
+from app.services.user_cache import UserSnapshot
 from app.schemas.reminder import ReminderCreate, ReminderUpdate, ReminderResponse, ReminderListResponse
 from app.services.reminder_service import reminder_service
 
@@ -13,7 +13,7 @@ router = APIRouter()
 @router.post("", response_model=ReminderResponse, status_code=status.HTTP_201_CREATED)
 async def create_reminder(
     reminder_data: ReminderCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Create a reminder"""
@@ -23,7 +23,7 @@ async def create_reminder(
 
 @router.get("", response_model=ReminderListResponse)
 async def list_reminders(
-    current_user: User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """List upcoming reminders"""
@@ -39,7 +39,7 @@ async def list_reminders(
 async def update_reminder(
     reminder_id: str,
     reminder_data: ReminderUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Update reminder"""
@@ -53,7 +53,7 @@ async def update_reminder(
 @router.delete("/{reminder_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_reminder(
     reminder_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Delete reminder"""
@@ -0,0 +1,47 @@
+"""Search routes"""
+import time
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from app.database import get_db
+from app.dependencies import get_current_user
+from app.services.user_cache import UserSnapshot
+from app.schemas.search import SemanticSearchResponse
+from app.services.semantic_search import semantic_search, KINDS
+
+router = APIRouter()
+
+
+@router.get("/semantic", response_model=SemanticSearchResponse)
+async def search_semantic(
+    q: str = Query(..., min_length=1, max_length=500),
+    k: int = Query(10, ge=1, le=50),
+    types: Optional[str] = Query(None, description="Comma-separated subset of email,document,task"),
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Emails, documents and tasks closest in meaning to the query"""
+    kinds = None
+    if types:
+        kinds = [kind.strip() for kind in types.split(",") if kind.strip()]
+        unknown = set(kinds) - set(KINDS)
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown types: {', '.join(sorted(unknown))}"
+            )
+
+    started = time.perf_counter()
+    try:
+        hits = await semantic_search.search(db, current_user.id, q, k, kinds)
+    except RuntimeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e)
+        )
+
+    return SemanticSearchResponse(
+        query=q,
+        hits=hits,
+        took_ms=round((time.perf_counter() - started) * 1000, 1)
+    )
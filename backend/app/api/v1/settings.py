@@ -4,7 +4,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from app.database import get_db
 from app.dependencies import get_current_user
-from app.models.user import User
+from app.services.user_cache import UserSnapshot
 from app.models.user_settings import UserSettings
 from app.schemas.settings import UserSettingsUpdate, UserSettingsResponse
 import uuid
@@ -14,7 +14,7 @@ router = APIRouter()
 
 @router.get("", response_model=UserSettingsResponse)
 async def get_settings(
-    current_user: User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Get user settings"""
@@ -41,7 +41,7 @@ async def get_settings(
 @router.put("", response_model=UserSettingsResponse)
 async def update_settings(
     settings_data: UserSettingsUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Update user settings"""
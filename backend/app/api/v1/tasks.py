@@ -5,7 +5,7 @@ from typing import Optional
 from datetime import date
 from app.database import get_db
 from app.dependencies import get_current_user
-from app.models.user import User
+from app.services.user_cache import UserSnapshot
 from app.schemas.task import TaskCreate, TaskUpdate, TaskResponse, TaskListResponse
 from app.services.task_service import task_service
 
@@ -15,7 +15,7 @@ router = APIRouter()
 @router.post("", response_model=TaskResponse, status_code=status.HTTP_201_CREATED)
 async def create_task(
     task_data: TaskCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Create a new task"""
@@ -49,19 +49,25 @@ async def list_tasks(
     is_approved: Optional[bool] = Query(None),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
-    current_user: User = Depends(get_current_user),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page; replaces page"),
+    current_user: UserSnapshot = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """List user's tasks"""
-    tasks, total = await task_service.list_tasks(
-        db,
-        current_user,
-        status,
-        due_date,
-        is_approved,
-        page,
-        page_size
-    )
+    try:
+        tasks, total, next_cursor = await task_service.list_tasks(
+            db,
+            current_user,
+            status,
+            due_date,
+            is_approved,
+            page,
+            page_size,
+            cursor
+        )
+    except ValueError as e:
+        # `status` is the query parameter here, not fastapi.status
+        raise HTTPException(status_code=400, detail=str(e))
     
     # Convert tasks to response format - explicitly convert UUIDs to strings
     task_responses = [
@@ -92,14 +98,15 @@ async def list_tasks(
         tasks=task_responses,
         total=total,
         page=page,
-        page_size=page_size
+        page_size=page_size,
+        next_cursor=next_cursor
     )
 
 
 @router.get("/{task_id}", response_model=TaskResponse)
 async def get_task(
     task_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Get task details"""
@@ -137,7 +144,7 @@ async def get_task(
 async def update_task(
     task_id: str,
     task_data: TaskUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Update task"""
@@ -174,7 +181,7 @@ async def update_task(
 @router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_task(
     task_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Delete task"""
@@ -190,7 +197,7 @@ async def delete_task(
 @router.post("/{task_id}/complete", response_model=TaskResponse)
 async def complete_task(
     task_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Mark task as completed"""
@@ -227,7 +234,7 @@ async def complete_task(
 @router.post("/{task_id}/approve", response_model=TaskResponse)
 async def approve_task(
     task_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Approve an AI-generated task"""
@@ -268,12 +275,12 @@ async def approve_task(
 
 @router.get("/predict", response_model=TaskListResponse)
 async def predict_tasks(
-    current_user: User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Get AI-predicted tasks for today"""
     from datetime import date
-    tasks, total = await task_service.list_tasks(
+    tasks, total, _ = await task_service.list_tasks(
         db,
         current_user,
         status="pending",
@@ -6,6 +6,8 @@ from jose import JWTError, jwt
 from app.database import get_db
 from app.config import settings
 from app.models.user import User
+from app.services.user_cache import UserSnapshot, user_cache
+import uuid
 
 security = HTTPBearer()
 
@@ -13,8 +15,13 @@ security = HTTPBearer()
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: AsyncSession = Depends(get_db)
-) -> User:
-    """Get current authenticated user from JWT token"""
+) -> UserSnapshot:
+    """Get current authenticated user from JWT token
+    
+    Returns a cached snapshot (id, is_active, timezone); the users table is
+    only queried when the snapshot is missing or expired. Routes that need
+    other user columns use get_current_user_model.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -29,16 +36,22 @@ async def get_current_user(
         user_id: str = payload.get("sub")
         if user_id is None:
             raise credentials_exception
-    except JWTError:
+        user_uuid = uuid.UUID(user_id)
+    except (JWTError, ValueError):
         raise credentials_exception
     
-    # Get user from database
-    from sqlalchemy import select
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
-    
+    user = await user_cache.get(user_id)
     if user is None:
-        raise credentials_exception
+        # Get user from database
+        from sqlalchemy import select
+        result = await db.execute(
+            select(User.id, User.is_active, User.timezone).where(User.id == user_uuid)
+        )
+        row = result.one_or_none()
+        if row is None:
+            raise credentials_exception
+        user = UserSnapshot(row.id, bool(row.is_active), row.timezone)
+        await user_cache.set(user)
     
     if not user.is_active:
         raise HTTPException(
@@ -47,3 +60,19 @@ async def get_current_user(
         )
     
     return user
+
+
+async def get_current_user_model(
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+) -> User:
+    """Get the full User row for the authenticated user"""
+    user = await db.get(User, current_user.id)
+    if user is None:
+        await user_cache.invalidate(str(current_user.id))
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user
@@ -14,12 +14,17 @@ from app.config import settings
 from app.database import Base
 from app.api.v1 import (
     auth, emails, documents, tasks, reminders, 
-    notifications, plans, settings as settings_router, ai_los
+    notifications, plans, settings as settings_router, ai_los, search
 )
 # Force reload to register new routes
 print("AI Life OS Routes Initialized")
 from app.middleware.error_handler import setup_error_handlers
 from app.middleware.rate_limit import RateLimitMiddleware
+from app.ai_engine.llm_client import llm_client
+from app.ai_engine.llm_cache import llm_cache
+from app.ai_engine.nlp_executor import nlp_executor
+from app.services.imap_service import imap_service
+from app.services.email_sync_service import email_sync_service
 
 logger = structlog.get_logger()
 
@@ -31,10 +36,22 @@ async def lifespan(app: FastAPI):
     print("Starting application...")
     print("Note: Database tables will be created on first use")
     
+    # Shared keep-alive HTTP client for the LLM backend
+    llm_client.open()
+    llm_client.health.start()
+    
+    # Process pool with a preloaded spaCy model per worker
+    nlp_executor.start()
+    
     yield
     
     # Shutdown
     print("Shutting down application")
+    await email_sync_service.shutdown()
+    await llm_client.health.stop()
+    await llm_client.aclose()
+    nlp_executor.shutdown()
+    imap_service.close_connections()
 
 
 app = FastAPI(
@@ -78,6 +95,7 @@ app.include_router(notifications.router, prefix="/api/v1/notifications", tags=["
 app.include_router(plans.router, prefix="/api/v1/plans", tags=["Daily Plans"])
 app.include_router(settings_router.router, prefix="/api/v1/settings", tags=["Settings"])
 app.include_router(ai_los.router, prefix="/api/v1/ai-los", tags=["AI-LOS Advanced"])
+app.include_router(search.router, prefix="/api/v1/search", tags=["Search"])
 
 
 @app.get("/")
@@ -99,6 +117,18 @@ async def health_check():
     }
 
 
+@app.get("/api/health/llm")
+async def llm_health_check():
+    """LLM client health, connection pool, cache and prompt token metrics"""
+    return {
+        "available": llm_client.is_available(),
+        "backends": llm_client.health.snapshot(),
+        "pool": llm_client.pool_stats(),
+        "cache": llm_cache.stats(),
+        "prompt_tokens": llm_client.token_stats()
+    }
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -1,14 +1,29 @@
 """Document model"""
-from sqlalchemy import Column, String, BigInteger, DateTime, Text, ForeignKey, func
-from sqlalchemy.dialects.postgresql import UUID, JSONB
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, BigInteger, DateTime, Text, ForeignKey, Index, Computed, DDL, event, func
+from sqlalchemy.dialects.postgresql import UUID, JSONB, TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 import uuid
 from app.database import Base
 
+# Weighted full-text document; OCR text is capped below the 1MB tsvector limit
+DOCUMENT_SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('english'::regconfig, coalesce(file_name, '')), 'A') || "
+    "setweight(to_tsvector('english'::regconfig, coalesce(ai_classification, '')), 'A') || "
+    "setweight(to_tsvector('english'::regconfig, coalesce(ai_summary, '')), 'B') || "
+    "setweight(to_tsvector('english'::regconfig, left(coalesce(ocr_text, ''), 200000)), 'C')"
+)
+
 
 class Document(Base):
     """Document model"""
     __tablename__ = "documents"
+    __table_args__ = (
+        Index("ix_documents_search_vector", "search_vector", postgresql_using="gin"),
+        Index(
+            "ix_documents_file_name_trgm", "file_name",
+            postgresql_using="gin", postgresql_ops={"file_name": "gin_trgm_ops"},
+        ),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
@@ -23,6 +38,14 @@ class Document(Base):
     ai_extracted_data = Column(JSONB)
     uploaded_at = Column(DateTime(timezone=True), server_default=func.now())
     processed_at = Column(DateTime(timezone=True))
+    search_vector = deferred(Column(TSVECTOR, Computed(DOCUMENT_SEARCH_VECTOR_SQL, persisted=True)))
     
     # Relationships
     user = relationship("User", back_populates="documents")
+
+
+event.listen(
+    Document.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
@@ -1,10 +1,18 @@
 """Email models"""
-from sqlalchemy import Column, String, Boolean, DateTime, Text, Integer, ForeignKey, JSON, func
-from sqlalchemy.dialects.postgresql import UUID, JSONB
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Boolean, DateTime, Text, Integer, Float, ForeignKey, Index, JSON, Computed, DDL, event, func
+from sqlalchemy.dialects.postgresql import UUID, JSONB, TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 import uuid
 from app.database import Base
 
+# Weighted full-text document; bodies are capped below the 1MB tsvector limit
+EMAIL_SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('english'::regconfig, coalesce(subject, '')), 'A') || "
+    "setweight(to_tsvector('english'::regconfig, coalesce(sender_name, '') || ' ' || coalesce(sender_email, '')), 'B') || "
+    "setweight(to_tsvector('english'::regconfig, coalesce(ai_summary, '')), 'B') || "
+    "setweight(to_tsvector('english'::regconfig, left(coalesce(body_text, ''), 200000)), 'C')"
+)
+
 
 class EmailAccount(Base):
     """Email account model for connected email providers"""
@@ -19,6 +27,9 @@ class EmailAccount(Base):
     provider_account_id = Column(String(255))
     last_sync_at = Column(DateTime(timezone=True))
     sync_enabled = Column(Boolean, default=True)
+    sync_state = Column(JSONB)  # Provider delta-sync cursor, e.g. Gmail {"history_id": ...}
+    sync_interval_seconds = Column(Integer)  # Adaptive periodic sync interval
+    message_rate = Column(Float)  # EWMA of new messages per hour
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
@@ -29,10 +40,24 @@ class EmailAccount(Base):
 class EmailItem(Base):
     """Email item model"""
     __tablename__ = "email_items"
+    __table_args__ = (
+        # Provider ids are only unique within one account (IMAP UIDs especially)
+        Index("uq_email_items_account_message", "email_account_id", "provider_message_id", unique=True),
+        Index("ix_email_items_search_vector", "search_vector", postgresql_using="gin"),
+        # Trigram indexes serve substring (ILIKE '%term%') matches on senders
+        Index(
+            "ix_email_items_sender_email_trgm", "sender_email",
+            postgresql_using="gin", postgresql_ops={"sender_email": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_email_items_sender_name_trgm", "sender_name",
+            postgresql_using="gin", postgresql_ops={"sender_name": "gin_trgm_ops"},
+        ),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     email_account_id = Column(UUID(as_uuid=True), ForeignKey("email_accounts.id", ondelete="CASCADE"), nullable=False)
-    provider_message_id = Column(String(255), unique=True, nullable=False, index=True)
+    provider_message_id = Column(String(255), nullable=False, index=True)
     subject = Column(Text)
     sender_email = Column(String(255))
     sender_name = Column(String(255))
@@ -46,6 +71,14 @@ class EmailItem(Base):
     ai_extracted_dates = Column(JSONB)
     ai_priority_score = Column(Integer, default=0, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    search_vector = deferred(Column(TSVECTOR, Computed(EMAIL_SEARCH_VECTOR_SQL, persisted=True)))
     
     # Relationships
     email_account = relationship("EmailAccount", back_populates="email_items")
+
+
+event.listen(
+    EmailItem.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
@@ -1,5 +1,5 @@
 """Notification model"""
-from sqlalchemy import Column, String, Text, DateTime, Boolean, ForeignKey, func
+from sqlalchemy import Column, String, Text, DateTime, Boolean, ForeignKey, Index, func
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 import uuid
@@ -9,6 +9,9 @@ from app.database import Base
 class Notification(Base):
     """Notification model"""
     __tablename__ = "notifications"
+    __table_args__ = (
+        Index("ix_notifications_user_created", "user_id", "created_at", "id"),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -1,5 +1,5 @@
 """Task model"""
-from sqlalchemy import Column, String, Text, Integer, Float, DateTime, Boolean, ForeignKey, func
+from sqlalchemy import Column, String, Text, Integer, Float, DateTime, Boolean, ForeignKey, Index, func, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -9,6 +9,16 @@ from app.database import Base
 class Task(Base):
     """Task model"""
     __tablename__ = "tasks"
+    __table_args__ = (
+        # Matches the list ordering so keyset pages are index range scans
+        Index(
+            "ix_tasks_user_priority_due",
+            "user_id",
+            text("COALESCE(priority, 0) DESC"),
+            text("due_date ASC NULLS LAST"),
+            "id",
+        ),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
@@ -31,6 +31,8 @@ class DocumentResponse(BaseModel):
     uploaded_at: datetime
     processed_at: Optional[datetime]
     presigned_url: Optional[str] = None
+    search_rank: Optional[float] = None  # Only set for search results
+    search_snippet: Optional[str] = None  # OCR excerpt with <mark> around matches
     
     class Config:
         from_attributes = True
@@ -40,6 +40,8 @@ class EmailItemResponse(BaseModel):
     ai_extracted_dates: Optional[Dict[str, Any]]
     ai_priority_score: Optional[int] = None
     created_at: datetime
+    search_rank: Optional[float] = None  # Only set for search results
+    search_snippet: Optional[str] = None  # Body excerpt with <mark> around matches
     
     @classmethod
     def from_orm(cls, obj):
@@ -23,3 +23,4 @@ class NotificationListResponse(BaseModel):
     notifications: List[NotificationResponse]
     total: int
     unread_count: int
+    next_cursor: Optional[str] = None
@@ -0,0 +1,22 @@
+"""Search schemas"""
+from pydantic import BaseModel
+from typing import Optional, List
+from datetime import datetime
+
+
+class SemanticSearchHit(BaseModel):
+    """One semantically similar item"""
+    type: str  # 'email', 'document', 'task'
+    id: str
+    score: float  # cosine similarity
+    title: Optional[str]
+    subtitle: Optional[str] = None  # sender, document class or task status
+    date: Optional[datetime] = None
+    chunk: int = 0  # matching OCR chunk for documents
+
+
+class SemanticSearchResponse(BaseModel):
+    """Semantic search response schema"""
+    query: str
+    hits: List[SemanticSearchHit]
+    took_ms: float
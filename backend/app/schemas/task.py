@@ -64,3 +64,4 @@ class TaskListResponse(BaseModel):
     total: int
     page: int
     page_size: int
+    next_cursor: Optional[str] = None
@@ -10,6 +10,7 @@ from app.models.user import User
 from app.utils.s3_client import upload_file, generate_presigned_url, delete_file
 from app.ai_engine.ocr_pipeline import ocr_pipeline
 from app.ai_engine.classifier import document_classifier
+from app.services.semantic_search import semantic_search
 import structlog
 
 logger = structlog.get_logger()
@@ -137,6 +138,9 @@ class DocumentService:
             await db.commit()
             await db.refresh(document)
             
+            if success:
+                await semantic_search.index_document(document.user_id, document)
+            
             return document
         except Exception as e:
             logger.error("Document processing error", error=str(e))
@@ -177,49 +181,49 @@ class DocumentService:
         page_size: int = 20,
         search: Optional[str] = None
     ) -> tuple[List[Document], int]:
-        """List user's documents"""
-        from sqlalchemy import or_, func
+        """List user's documents
+
+        Search uses the full-text search_vector (ranked, with an OCR snippet)
+        plus a trigram-indexed substring match on the file name.
+        """
+        from sqlalchemy import func
+        from app.services import text_search
         
         offset = (page - 1) * page_size
+        search = search.strip() if search else None
         
-        # Build base query
-        base_query = select(Document).where(Document.user_id == user.id)
-        
-        # Add search filter
+        # Build filters once for both the count and the page
+        filters = [Document.user_id == user.id]
         if search:
-            search_pattern = f"%{search.lower()}%"
-            base_query = base_query.where(
-                or_(
-                    func.lower(func.coalesce(Document.file_name, '')).like(search_pattern),
-                    func.lower(func.coalesce(Document.ai_summary, '')).like(search_pattern),
-                    func.lower(func.coalesce(Document.ai_classification, '')).like(search_pattern),
-                    func.lower(func.coalesce(Document.ocr_text, '')).like(search_pattern)
-                )
-            )
+            ts_query = text_search.search_query(search)
+            filters.append(text_search.search_filter(
+                Document.search_vector, ts_query, search, [Document.file_name]
+            ))
         
         # Get total count
-        count_query = select(func.count(Document.id)).where(Document.user_id == user.id)
-        if search:
-            search_pattern = f"%{search.lower()}%"
-            count_query = count_query.where(
-                or_(
-                    func.lower(func.coalesce(Document.file_name, '')).like(search_pattern),
-                    func.lower(func.coalesce(Document.ai_summary, '')).like(search_pattern),
-                    func.lower(func.coalesce(Document.ai_classification, '')).like(search_pattern),
-                    func.lower(func.coalesce(Document.ocr_text, '')).like(search_pattern)
-                )
-            )
-        total_result = await db.execute(count_query)
+        total_result = await db.execute(select(func.count(Document.id)).where(*filters))
         total = total_result.scalar_one() or 0
         
-        # Get paginated results
-        result = await db.execute(
-            base_query
-            .order_by(Document.uploaded_at.desc())
-            .offset(offset)
-            .limit(page_size)
-        )
-        documents = result.scalars().all()
+        # Get paginated results, best matches first when searching
+        query = select(Document).where(*filters)
+        if search:
+            rank = text_search.search_rank(Document.search_vector, ts_query)
+            query = query.add_columns(rank).order_by(rank.desc(), Document.uploaded_at.desc())
+        else:
+            query = query.order_by(Document.uploaded_at.desc())
+        result = await db.execute(query.offset(offset).limit(page_size))
+        
+        if search:
+            rows = result.all()
+            documents = [row[0] for row in rows]
+            snippets = await text_search.headlines(
+                db, Document.id, Document.ocr_text, [doc.id for doc in documents], ts_query
+            )
+            for doc, rank_value in rows:
+                doc.search_rank = rank_value
+                doc.search_snippet = snippets.get(doc.id)
+        else:
+            documents = result.scalars().all()
         
         # Generate presigned URLs or local file URLs
         from urllib.parse import quote
@@ -255,6 +259,7 @@ class DocumentService:
             # Delete from database
             await db.delete(document)
             await db.commit()
+            await semantic_search.remove(user.id, "document", document_id)
             return True
         
         return False
@@ -0,0 +1,105 @@
+"""AI processing stage for newly synced emails"""
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional
+from app.config import settings
+from app.models.email import EmailItem
+from app.ai_engine.task_generator import task_generator
+from app.ai_engine.priority_scorer import priority_scorer
+from app.ai_engine.nlp_executor import nlp_executor
+import structlog
+
+logger = structlog.get_logger()
+
+
+class EmailProcessingService:
+    """Run priority scoring, date extraction and task extraction for a sync's new emails"""
+
+    def __init__(self):
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def _semaphore(self, provider: str) -> asyncio.Semaphore:
+        """Per-provider semaphore bounding task-extraction batches in flight"""
+        if provider not in self._semaphores:
+            limit = settings.email_ai_concurrency.get(provider, settings.EMAIL_AI_CONCURRENCY_DEFAULT)
+            self._semaphores[provider] = asyncio.Semaphore(limit)
+        return self._semaphores[provider]
+
+    async def process_new_emails(
+        self,
+        email_items: List[EmailItem],
+        provider: str,
+        on_email_processed: Optional[Callable[[EmailItem, int, int], Awaitable[None]]] = None
+    ) -> None:
+        """Fill the AI fields of unsaved email items in place
+
+        on_email_processed(email_item, index, total) is awaited for each email
+        once its AI fields are set, for progress reporting.
+        """
+        await self.analyze_emails(email_items)
+        await self.extract_tasks(email_items, provider, on_email_processed)
+
+    async def analyze_emails(self, email_items: List[EmailItem]) -> None:
+        """NLP stage: extracted dates and priority score for each email with a body"""
+        items = [email_item for email_item in email_items if email_item.body_text]
+        if not items:
+            return
+
+        # One nlp.pipe pass over the whole sync instead of several parses per email
+        analyses = await nlp_executor.analyze_many([email_item.body_text for email_item in items])
+        for email_item, analysis in zip(items, analyses):
+            self._analyze_email(email_item, analysis)
+
+    async def extract_tasks(
+        self,
+        email_items: List[EmailItem],
+        provider: str,
+        on_email_processed: Optional[Callable[[EmailItem, int, int], Awaitable[None]]] = None
+    ) -> None:
+        """LLM stage: extract tasks with context - batched, with batches running concurrently
+
+        Batches for one provider share its EMAIL_AI_CONCURRENCY limit, on top of
+        the per-backend limits in LLMClient.
+        """
+        items = [email_item for email_item in email_items if email_item.body_text]
+        if not items:
+            return
+
+        extracted = await task_generator.extract_tasks_batch([
+            {
+                "id": email_item.provider_message_id,
+                "text": email_item.body_text,
+                "context": {
+                    "sender_email": email_item.sender_email,
+                    "sender_name": email_item.sender_name,
+                    "subject": email_item.subject,
+                    "received_at": email_item.received_at.isoformat() if email_item.received_at else None
+                }
+            }
+            for email_item in items
+        ], limit=self._semaphore(provider))
+
+        for index, email_item in enumerate(items, start=1):
+            if email_item.provider_message_id in extracted:
+                email_item.ai_extracted_tasks = {"tasks": extracted[email_item.provider_message_id]}
+            if on_email_processed:
+                await on_email_processed(email_item, index, len(items))
+
+        logger.info("Extracted tasks from emails", count=len(items))
+
+    def _analyze_email(self, email_item: EmailItem, analysis: Dict) -> None:
+        """Per-email AI fields: dates from the NLP analysis and priority"""
+        email_item.ai_extracted_dates = {"dates": analysis["dates"]}
+
+        # Calculate priority with enhanced factors
+        email_item.ai_priority_score = priority_scorer.calculate_email_priority(
+            email_item.body_text or "",
+            email_item.received_at,
+            email_item.sender_email,
+            email_item.subject,
+            email_item.is_read,
+            email_item.is_important
+        )
+
+
+# Global email processing service instance
+email_processing_service = EmailProcessingService()
@@ -0,0 +1,541 @@
+"""Email sync orchestration, run as background jobs with progress events"""
+import asyncio
+import copy
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import JSON, DateTime, null, select, tuple_, update
+from sqlalchemy.dialects.postgresql import UUID, insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database import get_async_session_local
+from app.models.user import User
+from app.models.email import EmailAccount, EmailItem
+from app.services.gmail_service import gmail_service
+from app.services.outlook_service import outlook_service
+from app.services.imap_service import imap_service, legacy_message_id
+from app.services.email_processing_service import email_processing_service
+from app.services.sync_progress import sync_progress
+from app.services.seen_messages import seen_messages
+from app.workers.sync_scheduler import record_sync
+from app.services.semantic_search import semantic_search
+import structlog
+
+logger = structlog.get_logger()
+
+# Rows per bulk INSERT statement (keeps bind parameters well under the asyncpg limit)
+INSERT_CHUNK_SIZE = 500
+
+# Account columns a provider service may rewrite when it refreshes OAuth tokens
+TOKEN_FIELDS = ("access_token_encrypted", "refresh_token_encrypted")
+
+
+class EmailSyncService:
+    """Fetch, process and store new emails for a user's accounts"""
+
+    def __init__(self):
+        self._tasks: Set[asyncio.Task] = set()
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def _semaphore(self, provider: str) -> asyncio.Semaphore:
+        """Per-provider semaphore bounding concurrent account fetches"""
+        if provider not in self._semaphores:
+            limit = settings.email_sync_concurrency.get(provider, settings.EMAIL_SYNC_CONCURRENCY_DEFAULT)
+            self._semaphores[provider] = asyncio.Semaphore(limit)
+        return self._semaphores[provider]
+
+    def _provider_service(self, provider: str):
+        """Get appropriate service"""
+        if provider == "gmail":
+            return gmail_service
+        if provider == "outlook":
+            return outlook_service
+        return imap_service
+
+    async def start_job(self, user: User, account_id: Optional[str] = None) -> str:
+        """Start a sync in the background and return its job id"""
+        job_id = await sync_progress.create_job(str(user.id))
+        task = asyncio.get_running_loop().create_task(self.run_job(job_id, str(user.id), account_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job_id
+
+    async def shutdown(self) -> None:
+        """Cancel sync jobs still running at shutdown"""
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def run_job(self, job_id: str, user_id: str, account_id: Optional[str] = None) -> None:
+        """Run one sync job with its own database session"""
+        session_factory = get_async_session_local()
+        async with session_factory() as db:
+            try:
+                user = await db.get(User, uuid.UUID(user_id))
+                result = await self.sync_user(db, user, account_id, job_id)
+                await sync_progress.publish(job_id, "completed", {
+                    **result,
+                    "message": "Sync completed and AI insights generated"
+                })
+            except asyncio.CancelledError:
+                await db.rollback()
+                await sync_progress.publish(job_id, "failed", {"error": "Sync cancelled"})
+                raise
+            except Exception as e:
+                await db.rollback()
+                logger.error("Email sync job failed", job_id=job_id, error=str(e))
+                await sync_progress.publish(job_id, "failed", {"error": str(e)})
+
+    async def _filter_new_items(self, db: AsyncSession, email_items: List[EmailItem]) -> List[EmailItem]:
+        """Drop fetched items already stored for their account or repeated in the fetch
+
+        Ids in the seen-message cache are dropped without a query; the rest are
+        checked with one SELECT on (email_account_id, provider_message_id).
+        IMAP rows stored under the older bare-UID id count as stored and are
+        renamed to the '<uidvalidity>:<uid>' id the first time they are seen.
+        """
+        message_ids: Dict[uuid.UUID, List[str]] = {}
+        for email_item in email_items:
+            message_ids.setdefault(email_item.email_account_id, []).append(email_item.provider_message_id)
+
+        unseen = set()
+        for account_id, ids in message_ids.items():
+            for message_id in await seen_messages.filter_unseen(str(account_id), list(dict.fromkeys(ids))):
+                unseen.add((account_id, message_id))
+
+        stored = set()
+        if unseen:
+            legacy_keys = {}
+            for account_id, message_id in unseen:
+                legacy_id = legacy_message_id(message_id)
+                if legacy_id is not None:
+                    legacy_keys[(account_id, legacy_id)] = (account_id, message_id)
+            result = await db.execute(
+                select(EmailItem.email_account_id, EmailItem.provider_message_id).where(
+                    tuple_(EmailItem.email_account_id, EmailItem.provider_message_id).in_(list(unseen | set(legacy_keys)))
+                )
+            )
+            found = {(row[0], row[1]) for row in result.all()}
+            stored = found & unseen
+            for legacy_key, key in legacy_keys.items():
+                if legacy_key not in found or key in stored:
+                    continue
+                await db.execute(
+                    update(EmailItem)
+                    .where(EmailItem.email_account_id == key[0], EmailItem.provider_message_id == legacy_key[1])
+                    .values(provider_message_id=key[1])
+                )
+                stored.add(key)
+            # Found rows are committed - later syncs can skip the query for them
+            await self._remember_stored(stored)
+
+        new_items = []
+        for email_item in email_items:
+            key = (email_item.email_account_id, email_item.provider_message_id)
+            if key not in unseen or key in stored:
+                continue
+            stored.add(key)
+            new_items.append(email_item)
+        return new_items
+
+    async def _remember_stored(self, keys: Iterable[Tuple[uuid.UUID, str]]) -> None:
+        """Record committed (account id, provider message id) pairs in the seen-message cache"""
+        message_ids: Dict[uuid.UUID, List[str]] = {}
+        for account_id, message_id in keys:
+            message_ids.setdefault(account_id, []).append(message_id)
+        for account_id, ids in message_ids.items():
+            await seen_messages.add(str(account_id), ids)
+
+    async def _insert_new_items(self, db: AsyncSession, email_items: List[EmailItem]) -> List[EmailItem]:
+        """Bulk INSERT ... ON CONFLICT (email_account_id, provider_message_id) DO NOTHING, returning the items inserted
+        
+        Items that hit the unique index (stored meanwhile by another sync) are
+        left out, so their client-side ids are never treated as stored rows.
+        """
+        if not email_items:
+            return []
+        columns = [column for column in EmailItem.__table__.columns if column.server_default is None]
+        rows = []
+        for email_item in email_items:
+            row = {}
+            for column in columns:
+                value = getattr(email_item, column.key)
+                if value is None and column.default is not None:
+                    value = column.default.arg(None) if column.default.is_callable else column.default.arg
+                    # Keep generated ids on the item so callers can reference the stored row
+                    setattr(email_item, column.key, value)
+                elif value is None and isinstance(column.type, JSON):
+                    # A bound None is stored as JSON 'null', which the stages' IS NULL checks never match
+                    value = null()
+                row[column.key] = value
+            rows.append(row)
+
+        inserted_ids = set()
+        for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+            statement = (
+                pg_insert(EmailItem)
+                .values(rows[start:start + INSERT_CHUNK_SIZE])
+                .on_conflict_do_nothing(index_elements=[EmailItem.email_account_id, EmailItem.provider_message_id])
+                .returning(EmailItem.id)
+            )
+            result = await db.execute(statement)
+            inserted_ids.update(row[0] for row in result.all())
+        return [email_item for email_item in email_items if email_item.id in inserted_ids]
+
+    def _detached_copy(self, account: EmailAccount) -> EmailAccount:
+        """Session-less copy of an account for a provider fetch to work on"""
+        values = {column.key: getattr(account, column.key) for column in EmailAccount.__table__.columns}
+        values["sync_state"] = copy.deepcopy(values["sync_state"])
+        return EmailAccount(**values)
+
+    async def _fetch_account(self, account: EmailAccount, user: User) -> Dict[str, Any]:
+        """Fetch one account's new emails under its provider's concurrency limit and timeout
+
+        The provider works on a detached copy of the account: a timed-out
+        Gmail or IMAP fetch keeps running in its executor thread, and must not
+        move the cursor on the row this sync commits. The new cursor is copied
+        back only when the fetch succeeds in time; refreshed tokens always are.
+        """
+        service = self._provider_service(account.provider)
+        fetch_account = self._detached_copy(account)
+        async with self._semaphore(account.provider):
+            started = time.monotonic()
+            try:
+                email_items = await asyncio.wait_for(
+                    service.sync_emails(fetch_account, user),
+                    timeout=settings.EMAIL_SYNC_ACCOUNT_TIMEOUT_SECONDS
+                )
+                account.sync_state = fetch_account.sync_state
+                error = None
+            except asyncio.TimeoutError:
+                email_items, error = [], f"Timed out after {settings.EMAIL_SYNC_ACCOUNT_TIMEOUT_SECONDS:g}s"
+            except Exception as e:
+                email_items, error = [], str(e)
+            fetch_seconds = round(time.monotonic() - started, 3)
+
+        for field in TOKEN_FIELDS:
+            if getattr(fetch_account, field) != getattr(account, field):
+                setattr(account, field, getattr(fetch_account, field))
+        if error:
+            logger.warning("Account fetch failed", account_id=str(account.id), provider=account.provider, error=error)
+        return {"account": account, "email_items": email_items, "error": error, "fetch_seconds": fetch_seconds}
+
+    async def _suggest_for_account(self, db: AsyncSession, user_id: uuid.UUID, account: EmailAccount) -> int:
+        """Add follow-up suggestions for an account's latest emails, skipping ones already suggested"""
+        from app.services.action_service import action_engine
+        from app.models.graph import ActionSuggestion
+
+        # Get latest emails to analyze
+        result = await db.execute(select(EmailItem).where(EmailItem.email_account_id == account.id).limit(10))
+        latest_emails = result.scalars().all()
+
+        suggestions = await action_engine.suggest_follow_ups(str(user_id), latest_emails)
+        if not suggestions:
+            return 0
+
+        result = await db.execute(
+            select(ActionSuggestion.type, ActionSuggestion.source_id).where(
+                ActionSuggestion.user_id == user_id,
+                ActionSuggestion.source_id.in_([uuid.UUID(s["source_id"]) for s in suggestions])
+            )
+        )
+        existing = {(row[0], str(row[1])) for row in result.all()}
+
+        added = 0
+        for s in suggestions:
+            if (s["type"], s["source_id"]) in existing:
+                continue
+            db.add(ActionSuggestion(
+                user_id=user_id,
+                type=s["type"],
+                source_id=uuid.UUID(s["source_id"]),
+                title=s["title"],
+                description=s["description"],
+                draft_content=s["draft_content"],
+                action_label=s["action_label"]
+            ))
+            added += 1
+        return added
+
+    async def sync_user(
+        self,
+        db: AsyncSession,
+        user: User,
+        account_id: Optional[str] = None,
+        job_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Sync emails from connected accounts
+
+        Accounts are fetched concurrently; each is processed and stored as soon
+        as its fetch finishes, one at a time on the shared session. Returns the
+        number of new emails and per-account results with their durations.
+        """
+
+        async def publish(event: str, **data) -> None:
+            if job_id:
+                await sync_progress.publish(job_id, event, data)
+
+        if account_id:
+            result = await db.execute(
+                select(EmailAccount).where(
+                    EmailAccount.id == uuid.UUID(account_id),
+                    EmailAccount.user_id == user.id
+                )
+            )
+            accounts = [account for account in [result.scalar_one_or_none()] if account]
+        else:
+            result = await db.execute(
+                select(EmailAccount).where(
+                    EmailAccount.user_id == user.id,
+                    EmailAccount.sync_enabled == True
+                )
+            )
+            accounts = result.scalars().all()
+
+        await publish("started", accounts=len(accounts))
+
+        started = time.monotonic()
+        fetches = []
+        for account in accounts:
+            await publish("account_started", account_id=str(account.id), provider=account.provider, email_address=account.email_address)
+            fetches.append(asyncio.ensure_future(self._fetch_account(account, user)))
+
+        synced_count = 0
+        synced_accounts = []
+        stored_items = []
+        account_results = []
+        try:
+            # Slow providers don't hold up the others - store in completion order
+            for next_fetch in asyncio.as_completed(fetches):
+                fetch = await next_fetch
+                account = fetch["account"]
+                account_info = {"account_id": str(account.id), "provider": account.provider, "email_address": account.email_address}
+
+                if fetch["error"]:
+                    account_results.append({**account_info, "status": "failed", "new": 0, "fetch_seconds": fetch["fetch_seconds"]})
+                    await publish("account_failed", **account_info, error=fetch["error"], fetch_seconds=fetch["fetch_seconds"])
+                    continue
+
+                email_items = fetch["email_items"]
+
+                # Skip emails we already stored (one query for the whole fetch)
+                new_items = await self._filter_new_items(db, email_items)
+
+                await publish("account_fetched", **account_info, fetched=len(email_items), new=len(new_items), fetch_seconds=fetch["fetch_seconds"])
+
+                async def on_email_processed(email_item: EmailItem, index: int, total: int) -> None:
+                    tasks = (email_item.ai_extracted_tasks or {}).get("tasks", [])
+                    await publish(
+                        "email_processed",
+                        account_id=str(email_item.email_account_id),
+                        subject=email_item.subject,
+                        tasks=len(tasks),
+                        processed=index,
+                        total=total
+                    )
+
+                # AI processing for this account's new emails
+                await email_processing_service.process_new_emails(
+                    new_items,
+                    account.provider,
+                    on_email_processed=on_email_processed if job_id else None
+                )
+
+                # One bulk insert; rows another sync stored meanwhile are skipped by the unique index
+                inserted_items = await self._insert_new_items(db, new_items)
+                inserted = len(inserted_items)
+                synced_count += inserted
+                stored_items.extend(inserted_items)
+
+                # Update the adaptive schedule and last sync time
+                now = datetime.now()
+                record_sync(account, inserted, now)
+                account.last_sync_at = now
+                synced_accounts.append(account)
+
+                duration_seconds = round(time.monotonic() - started, 3)
+                account_results.append({
+                    **account_info,
+                    "status": "completed",
+                    "new": inserted,
+                    "fetch_seconds": fetch["fetch_seconds"],
+                    "duration_seconds": duration_seconds
+                })
+                logger.info(
+                    "Account synced",
+                    account_id=account_info["account_id"],
+                    provider=account.provider,
+                    new=inserted,
+                    fetch_seconds=fetch["fetch_seconds"],
+                    duration_seconds=duration_seconds
+                )
+                await publish("account_completed", **account_info, new=inserted, fetch_seconds=fetch["fetch_seconds"], duration_seconds=duration_seconds)
+        finally:
+            for fetch in fetches:
+                fetch.cancel()
+
+        # Store everything from this sync in one commit
+        await db.commit()
+        await self._remember_stored((email_item.email_account_id, email_item.provider_message_id) for email_item in stored_items)
+        # Only rows this sync inserted - a conflicting item's client-side id was never stored
+        await semantic_search.index_emails(user.id, stored_items)
+
+        # Level 4: Generate Action Suggestions after sync
+        await publish("suggestions_started", accounts=len(synced_accounts))
+        suggestion_count = 0
+        for account in synced_accounts:
+            suggestion_count += await self._suggest_for_account(db, user.id, account)
+        await db.commit()
+        await publish("suggestions_completed", suggestions=suggestion_count)
+
+        return {"synced_count": synced_count, "accounts": account_results}
+
+
+    # Staged pipeline (EMAIL_SYNC_BACKEND=celery) - each stage is run by its own
+    # Celery task and is safe to retry: rows are written with ON CONFLICT DO NOTHING
+    # and later stages only touch rows whose AI fields are still empty.
+
+    async def enqueue_sync(self, db: AsyncSession, user: User, account_id: Optional[str] = None) -> List[str]:
+        """Queue the fetch stage for the user's accounts and return the Celery task ids"""
+        from app.workers.email_sync_worker import sync_email_account
+
+        query = select(EmailAccount.id).where(EmailAccount.user_id == user.id)
+        if account_id:
+            query = query.where(EmailAccount.id == uuid.UUID(account_id))
+        else:
+            query = query.where(EmailAccount.sync_enabled == True)
+        result = await db.execute(query)
+        return [sync_email_account.delay(str(account_id)).id for account_id in result.scalars().all()]
+
+    def _serialize_item(self, email_item: EmailItem) -> Dict[str, Any]:
+        """JSON-safe column values of an unsaved email item"""
+        row = {}
+        for column in EmailItem.__table__.columns:
+            value = getattr(email_item, column.key)
+            if isinstance(value, datetime):
+                value = value.isoformat()
+            elif isinstance(value, uuid.UUID):
+                value = str(value)
+            row[column.key] = value
+        return row
+
+    def _deserialize_item(self, row: Dict[str, Any]) -> EmailItem:
+        """Rebuild an unsaved email item from _serialize_item output"""
+        values = dict(row)
+        for column in EmailItem.__table__.columns:
+            value = values.get(column.key)
+            if value is None:
+                continue
+            if isinstance(column.type, DateTime):
+                values[column.key] = datetime.fromisoformat(value)
+            elif isinstance(column.type, UUID):
+                values[column.key] = uuid.UUID(value)
+        return EmailItem(**values)
+
+    async def fetch_stage(self, db: AsyncSession, account_id: str) -> Optional[Dict[str, Any]]:
+        """Fetch an account's new emails and its advanced sync cursor without writing anything
+
+        The cursor is only stored by persist_stage together with the emails, so
+        a failed pipeline run re-fetches the same messages. OAuth tokens the
+        provider refreshed during the fetch are handed on the same way.
+        """
+        account = await db.get(EmailAccount, uuid.UUID(account_id))
+        if account is None or not account.sync_enabled:
+            return None
+        user = await db.get(User, account.user_id)
+
+        tokens_before = {field: getattr(account, field) for field in TOKEN_FIELDS}
+        fetch = await self._fetch_account(account, user)
+        if fetch["error"]:
+            raise RuntimeError(fetch["error"])
+        new_items = await self._filter_new_items(db, fetch["email_items"])
+        return {
+            "account_id": account_id,
+            "provider": account.provider,
+            "items": [self._serialize_item(email_item) for email_item in new_items],
+            "sync_state": account.sync_state,
+            "tokens": {
+                field: getattr(account, field)
+                for field in TOKEN_FIELDS
+                if getattr(account, field) != tokens_before[field]
+            },
+            "fetch_seconds": fetch["fetch_seconds"]
+        }
+
+    async def persist_stage(
+        self,
+        db: AsyncSession,
+        account_id: str,
+        items: List[Dict[str, Any]],
+        sync_state: Optional[Dict[str, Any]],
+        tokens: Optional[Dict[str, str]] = None
+    ) -> List[str]:
+        """Store fetched emails, the sync cursor and refreshed tokens; returns the ids still awaiting AI processing"""
+        account = await db.get(EmailAccount, uuid.UUID(account_id))
+        if account is None:
+            return []
+        email_items = [self._deserialize_item(row) for row in items]
+        inserted_items = await self._insert_new_items(db, email_items)
+        now = datetime.now()
+        record_sync(account, len(inserted_items), now)
+        account.sync_state = sync_state
+        for field, value in (tokens or {}).items():
+            if field in TOKEN_FIELDS:
+                setattr(account, field, value)
+        account.last_sync_at = now
+        await db.commit()
+        await self._remember_stored((email_item.email_account_id, email_item.provider_message_id) for email_item in inserted_items)
+
+        if not email_items:
+            return []
+        # Includes rows stored by an earlier attempt of this stage that never reached the next one
+        result = await db.execute(
+            select(EmailItem.id).where(
+                EmailItem.email_account_id == account.id,
+                EmailItem.provider_message_id.in_([email_item.provider_message_id for email_item in email_items]),
+                EmailItem.ai_extracted_tasks.is_(None)
+            )
+        )
+        return [str(email_id) for email_id in result.scalars().all()]
+
+    async def _load_items(self, db: AsyncSession, email_ids: List[str], *criteria) -> List[EmailItem]:
+        result = await db.execute(
+            select(EmailItem).where(EmailItem.id.in_([uuid.UUID(email_id) for email_id in email_ids]), *criteria)
+        )
+        return result.scalars().all()
+
+    async def nlp_stage(self, db: AsyncSession, email_ids: List[str]) -> int:
+        """Dates and priority for stored emails not analyzed yet"""
+        email_items = await self._load_items(db, email_ids, EmailItem.ai_extracted_dates.is_(None))
+        await email_processing_service.analyze_emails(email_items)
+        await db.commit()
+        if email_items:
+            account = await db.get(EmailAccount, email_items[0].email_account_id)
+            if account is not None:
+                await semantic_search.index_emails(account.user_id, email_items)
+        return len(email_items)
+
+    async def llm_stage(self, db: AsyncSession, email_ids: List[str]) -> int:
+        """Task extraction for stored emails without extracted tasks"""
+        email_items = await self._load_items(db, email_ids, EmailItem.ai_extracted_tasks.is_(None))
+        if not email_items:
+            return 0
+        account = await db.get(EmailAccount, email_items[0].email_account_id)
+        await email_processing_service.extract_tasks(email_items, account.provider if account else "")
+        await db.commit()
+        return len(email_items)
+
+    async def suggest_stage(self, db: AsyncSession, account_id: str) -> int:
+        """Follow-up suggestions for an account after its emails were processed"""
+        account = await db.get(EmailAccount, uuid.UUID(account_id))
+        if account is None:
+            return 0
+        added = await self._suggest_for_account(db, account.user_id, account)
+        await db.commit()
+        return added
+
+
+# Global email sync service instance
+email_sync_service = EmailSyncService()
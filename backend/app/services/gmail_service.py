@@ -1,8 +1,10 @@
 """Gmail service"""
+import asyncio
 from google.oauth2.credentials import Credentials
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
 from google.auth.transport.requests import Request
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 from app.models.email import EmailAccount, EmailItem
 from app.models.user import User
@@ -13,6 +15,18 @@ import structlog
 
 logger = structlog.get_logger()
 
+# Labels of added messages that a delta sync ignores (messages.list excludes them too)
+SKIPPED_LABELS = {'DRAFT', 'SPAM', 'TRASH'}
+
+# Partial response mask: only the parts of a message that _to_email_item reads
+MESSAGE_FIELDS = (
+    "id,labelIds,"
+    "payload(mimeType,headers(name,value),body/data,parts(mimeType,body/data))"
+)
+
+# messages.get statuses that will not change on retry (deleted message, invalid id)
+PERMANENT_GET_ERRORS = {400, 404}
+
 
 class GmailService(EmailService):
     """Gmail API service"""
@@ -51,65 +65,183 @@ class GmailService(EmailService):
         account: EmailAccount,
         user: User
     ) -> List[EmailItem]:
-        """Sync emails from Gmail"""
+        """Sync emails from Gmail - history delta when a history id is stored, recent messages otherwise"""
         try:
-            creds = self._get_credentials(account)
-            if not creds:
+            # The Google client is blocking - run the whole exchange off the event loop
+            result = await asyncio.get_running_loop().run_in_executor(None, self._sync_blocking, account)
+            if result is None:
                 return []
             
-            service = build('gmail', 'v1', credentials=creds)
+            email_items, history_id = result
+            # Advance the cursor; it is persisted with the sync's commit
+            if history_id:
+                account.sync_state = {**(account.sync_state or {}), "history_id": history_id}
+            return email_items
+        except Exception as e:
+            logger.error("Gmail sync error", error=str(e))
+            return []
+    
+    def _sync_blocking(self, account: EmailAccount) -> Optional[Tuple[List[EmailItem], Optional[str]]]:
+        """List changed messages and fetch them in batches (runs in a worker thread)
+
+        When some messages could not be fetched the previous history id is
+        returned, so the next sync lists them again instead of skipping them.
+        """
+        creds = self._get_credentials(account)
+        if not creds:
+            return None
+        
+        service = build('gmail', 'v1', credentials=creds)
+        
+        message_ids, history_id = self._list_changed_message_ids(service, account)
+        messages, failed = self._get_messages_batched(service, message_ids)
+        if failed:
+            logger.warning(
+                "Gmail messages still failing after retry, keeping history cursor",
+                account_id=str(account.id),
+                failed=len(failed)
+            )
+            history_id = (account.sync_state or {}).get("history_id")
+        
+        email_items = []
+        for message_id in message_ids:
+            message = messages.get(message_id)
+            if message is None:
+                continue
+            try:
+                email_items.append(self._to_email_item(account, message))
+            except Exception as e:
+                logger.warning("Error processing Gmail message", error=str(e))
+        
+        return email_items, history_id
+    
+    def _get_messages_batched(self, service, message_ids: List[str]) -> Tuple[Dict[str, dict], List[str]]:
+        """Fetch messages through the batch endpoint, up to GMAIL_BATCH_SIZE per HTTP call
+
+        Returns the fetched messages and the ids that failed both attempts.
+        Messages that are gone (deleted since they were listed, or an invalid
+        id) are dropped rather than retried, so they never hold the cursor back.
+        """
+        batch_size = max(1, min(settings.GMAIL_BATCH_SIZE, 100))
+        messages: Dict[str, dict] = {}
+        pending = list(message_ids)
+        
+        for attempt in range(2):
+            failed: List[str] = []
             
-            # Get messages - fetch recent emails (last 50)
-            # Changed from only unread/important to recent emails
-            results = service.users().messages().list(
+            def on_response(request_id, response, exception):
+                if isinstance(exception, HttpError) and exception.resp.status in PERMANENT_GET_ERRORS:
+                    logger.info("Gmail message no longer available, skipping", message_id=request_id, status=exception.resp.status)
+                elif exception is not None:
+                    failed.append(request_id)
+                    logger.warning("Gmail batch item failed", message_id=request_id, error=str(exception))
+                else:
+                    messages[request_id] = response
+            
+            for start in range(0, len(pending), batch_size):
+                batch = service.new_batch_http_request(callback=on_response)
+                for message_id in pending[start:start + batch_size]:
+                    batch.add(
+                        service.users().messages().get(
+                            userId='me',
+                            id=message_id,
+                            format='full',
+                            fields=MESSAGE_FIELDS
+                        ),
+                        request_id=message_id
+                    )
+                batch.execute()
+            
+            # Retry transient per-item failures (usually rate limiting) once in a follow-up batch
+            pending = failed
+            if not failed:
+                break
+        
+        return messages, pending
+    
+    def _list_changed_message_ids(self, service, account: EmailAccount) -> Tuple[List[str], str]:
+        """Message ids to fetch and the mailbox history id to resume from next time"""
+        history_id = (account.sync_state or {}).get("history_id")
+        if history_id:
+            try:
+                return self._list_history(service, history_id)
+            except HttpError as e:
+                if e.resp.status != 404:
+                    raise
+                # History ids expire after about a week - fall back to a full resync
+                logger.info("Gmail history id expired, running full resync", account_id=str(account.id))
+        
+        return self._list_recent(service)
+    
+    def _list_recent(self, service) -> Tuple[List[str], str]:
+        """Full resync: the most recent messages and the current mailbox history id"""
+        # Read the history id first so nothing arriving during the listing is skipped next time
+        history_id = service.users().getProfile(userId='me').execute()['historyId']
+        
+        results = service.users().messages().list(
+            userId='me',
+            maxResults=settings.GMAIL_FULL_SYNC_MAX_RESULTS
+        ).execute()
+        
+        return [msg['id'] for msg in results.get('messages', [])], history_id
+    
+    def _list_history(self, service, start_history_id: str) -> Tuple[List[str], str]:
+        """Delta sync: ids of messages added since start_history_id"""
+        message_ids: List[str] = []
+        seen = set()
+        history_id = start_history_id
+        page_token = None
+        
+        while True:
+            response = service.users().history().list(
                 userId='me',
-                maxResults=50
+                startHistoryId=start_history_id,
+                historyTypes=['messageAdded'],
+                pageToken=page_token
             ).execute()
             
-            messages = results.get('messages', [])
-            email_items = []
-            
-            for msg in messages:
-                try:
-                    message = service.users().messages().get(
-                        userId='me',
-                        id=msg['id']
-                    ).execute()
-                    
-                    # Extract email data
-                    headers = message['payload'].get('headers', [])
-                    subject = next((h['value'] for h in headers if h['name'] == 'Subject'), '')
-                    sender = next((h['value'] for h in headers if h['name'] == 'From'), '')
-                    date_str = next((h['value'] for h in headers if h['name'] == 'Date'), '')
-                    
-                    # Parse body
-                    body_text = self._extract_body(message['payload'])
-                    
-                    # Parse date
-                    from email.utils import parsedate_to_datetime
-                    received_at = parsedate_to_datetime(date_str) if date_str else datetime.now()
-                    
-                    email_item = EmailItem(
-                        email_account_id=account.id,
-                        provider_message_id=msg['id'],
-                        subject=subject,
-                        sender_email=self._extract_email(sender),
-                        sender_name=self._extract_name(sender),
-                        body_text=body_text,
-                        received_at=received_at,
-                        is_read='UNREAD' not in message['labelIds'],
-                        is_important='IMPORTANT' in message['labelIds']
-                    )
-                    
-                    email_items.append(email_item)
-                except Exception as e:
-                    logger.warning("Error processing Gmail message", error=str(e))
-                    continue
+            for record in response.get('history', []):
+                for added in record.get('messagesAdded', []):
+                    message = added.get('message', {})
+                    if message.get('id') in seen or SKIPPED_LABELS.intersection(message.get('labelIds', [])):
+                        continue
+                    seen.add(message['id'])
+                    message_ids.append(message['id'])
             
-            return email_items
-        except Exception as e:
-            logger.error("Gmail sync error", error=str(e))
-            return []
+            history_id = response.get('historyId', history_id)
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                break
+        
+        return message_ids, history_id
+    
+    def _to_email_item(self, account: EmailAccount, message: dict) -> EmailItem:
+        """Build an unsaved EmailItem from a full Gmail message"""
+        # Extract email data
+        headers = message['payload'].get('headers', [])
+        subject = next((h['value'] for h in headers if h['name'] == 'Subject'), '')
+        sender = next((h['value'] for h in headers if h['name'] == 'From'), '')
+        date_str = next((h['value'] for h in headers if h['name'] == 'Date'), '')
+        
+        # Parse body
+        body_text = self._extract_body(message['payload'])
+        
+        # Parse date
+        from email.utils import parsedate_to_datetime
+        received_at = parsedate_to_datetime(date_str) if date_str else datetime.now()
+        
+        label_ids = message.get('labelIds', [])
+        return EmailItem(
+            email_account_id=account.id,
+            provider_message_id=message['id'],
+            subject=subject,
+            sender_email=self._extract_email(sender),
+            sender_name=self._extract_name(sender),
+            body_text=body_text,
+            received_at=received_at,
+            is_read='UNREAD' not in label_ids,
+            is_important='IMPORTANT' in label_ids
+        )
     
     def _extract_body(self, payload: dict) -> str:
         """Extract text body from message payload"""
@@ -1,113 +1,288 @@
 """IMAP service for generic email providers"""
 from imapclient import IMAPClient
-from typing import List, Optional
-from datetime import datetime
-from email import message_from_bytes
-from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+from email.header import decode_header, make_header
+import asyncio
+import base64
+import quopri
+import threading
+import time
 from app.models.email import EmailAccount, EmailItem
 from app.models.user import User
 from app.services.email_service import EmailService
 from app.utils.encryption import decrypt_token
+from app.config import settings
 import structlog
 
 logger = structlog.get_logger()
 
 
+def _to_str(value) -> str:
+    """IMAP protocol values arrive as bytes"""
+    if value is None:
+        return ""
+    return value.decode('utf-8', errors='ignore') if isinstance(value, bytes) else str(value)
+
+
+def _decode_header_value(value) -> str:
+    """Decode an RFC 2047 encoded-word header value"""
+    text = _to_str(value)
+    try:
+        return str(make_header(decode_header(text)))
+    except Exception:
+        return text
+
+
+def legacy_message_id(provider_message_id: str) -> Optional[str]:
+    """Bare-UID id that earlier versions stored for a '<uidvalidity>:<uid>' id, or None for other ids"""
+    uidvalidity, sep, uid = provider_message_id.partition(":")
+    if sep and uidvalidity.isdigit() and uid.isdigit():
+        return uid
+    return None
+
+
 class IMAPService(EmailService):
     """IMAP service for generic email providers"""
     
+    def __init__(self):
+        # One reusable connection per account: (client, last used); the lock serialises its use
+        self._connections: Dict[str, Tuple[IMAPClient, float]] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+    
     async def sync_emails(
         self,
         account: EmailAccount,
         user: User
     ) -> List[EmailItem]:
-        """Sync emails via IMAP"""
+        """Sync emails via IMAP - only UIDs above the stored watermark once one exists"""
         try:
             # Decrypt password (stored as access_token for IMAP)
             password = decrypt_token(account.access_token_encrypted)
             
-            # Parse email address to get server
-            email_parts = account.email_address.split('@')
-            domain = email_parts[1] if len(email_parts) > 1 else ''
-            
-            # Common IMAP servers (in production, use a lookup service)
-            imap_servers = {
-                'gmail.com': 'imap.gmail.com',
-                'outlook.com': 'outlook.office365.com',
-                'hotmail.com': 'outlook.office365.com',
-                'yahoo.com': 'imap.mail.yahoo.com',
-            }
-            
-            server = imap_servers.get(domain.lower(), f'imap.{domain}')
-            
-            with IMAPClient(server, ssl=True) as client:
-                client.login(account.email_address, password)
-                client.select_folder('INBOX')
-                
-                # Search for unread or important messages
-                messages = client.search(['UNSEEN', 'OR', 'FLAGGED'])
-                
-                email_items = []
-                for msg_id, msg_data in client.fetch(messages[:50], ['RFC822']).items():
-                    try:
-                        email_msg = message_from_bytes(msg_data[b'RFC822'])
-                        
-                        subject = email_msg.get('Subject', '')
-                        sender = email_msg.get('From', '')
-                        date_str = email_msg.get('Date', '')
-                        
-                        # Parse body
-                        body_text = self._extract_body(email_msg)
-                        
-                        # Parse date
-                        received_at = parsedate_to_datetime(date_str) if date_str else datetime.now()
-                        
-                        email_item = EmailItem(
-                            email_account_id=account.id,
-                            provider_message_id=str(msg_id),
-                            subject=subject,
-                            sender_email=self._extract_email(sender),
-                            sender_name=self._extract_name(sender),
-                            body_text=body_text,
-                            received_at=received_at,
-                            is_read=False,  # We're only fetching unread
-                            is_important='\\Flagged' in email_msg.get('Flags', [])
-                        )
-                        
-                        email_items.append(email_item)
-                    except Exception as e:
-                        logger.warning("Error processing IMAP message", error=str(e))
-                        continue
-                
-                return email_items
+            # IMAPClient is blocking - run the whole exchange off the event loop
+            email_items, sync_state = await asyncio.get_running_loop().run_in_executor(
+                None,
+                self._sync_blocking,
+                account,
+                password
+            )
+            # Advance the watermarks; they are persisted with the sync's commit
+            account.sync_state = sync_state
+            return email_items
         except Exception as e:
             logger.error("IMAP sync error", error=str(e))
             return []
     
-    def _extract_body(self, email_msg) -> str:
-        """Extract text body from email message"""
-        body = ""
-        if email_msg.is_multipart():
-            for part in email_msg.walk():
-                if part.get_content_type() == "text/plain":
-                    body = part.get_payload(decode=True).decode('utf-8', errors='ignore')
-                    break
+    def _server_for(self, email_address: str) -> str:
+        """IMAP host for an address"""
+        # Parse email address to get server
+        email_parts = email_address.split('@')
+        domain = email_parts[1] if len(email_parts) > 1 else ''
+        
+        # Common IMAP servers (in production, use a lookup service)
+        imap_servers = {
+            'gmail.com': 'imap.gmail.com',
+            'outlook.com': 'outlook.office365.com',
+            'hotmail.com': 'outlook.office365.com',
+            'yahoo.com': 'imap.mail.yahoo.com',
+        }
+        
+        return imap_servers.get(domain.lower(), f'imap.{domain}')
+    
+    def _connect(self, account: EmailAccount, password: str) -> IMAPClient:
+        """Open and log in a new connection"""
+        client = IMAPClient(self._server_for(account.email_address), ssl=True, timeout=30)
+        client.login(account.email_address, password)
+        return client
+    
+    def _lock_for(self, key: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+    
+    def _get_connection(self, account: EmailAccount, password: str) -> IMAPClient:
+        """Reuse the account's connection if it is still alive, otherwise reconnect"""
+        key = str(account.id)
+        entry = self._connections.pop(key, None)
+        if entry is not None:
+            client, last_used = entry
+            if time.monotonic() - last_used < settings.IMAP_CONNECTION_IDLE_SECONDS:
+                try:
+                    client.noop()
+                    return client
+                except Exception:
+                    pass
+            self._close(client)
+        return self._connect(account, password)
+    
+    def _close(self, client: IMAPClient) -> None:
+        try:
+            client.logout()
+        except Exception:
+            pass
+    
+    def close_connections(self) -> None:
+        """Log out all pooled connections"""
+        for key in list(self._connections):
+            entry = self._connections.pop(key, None)
+            if entry is not None:
+                self._close(entry[0])
+    
+    def _sync_blocking(self, account: EmailAccount, password: str) -> Tuple[List[EmailItem], Dict[str, Any]]:
+        """Fetch new messages on a pooled connection (runs in a worker thread)"""
+        key = str(account.id)
+        with self._lock_for(key):
+            client = self._get_connection(account, password)
+            try:
+                result = self._fetch_new(client, account)
+            except Exception:
+                # Don't return a connection in an unknown state to the pool
+                self._close(client)
+                raise
+            self._connections[key] = (client, time.monotonic())
+            return result
+    
+    def _fetch_new(self, client: IMAPClient, account: EmailAccount) -> Tuple[List[EmailItem], Dict[str, Any]]:
+        """Compare mailbox watermarks with the stored state and fetch only new UIDs"""
+        state = dict(account.sync_state or {})
+        condstore = client.has_capability('CONDSTORE')
+        
+        # STATUS is cheap and does not need the folder selected
+        status_items = [b'UIDVALIDITY', b'UIDNEXT'] + ([b'HIGHESTMODSEQ'] if condstore else [])
+        status = client.folder_status('INBOX', status_items)
+        uidvalidity = int(status[b'UIDVALIDITY'])
+        uidnext = int(status[b'UIDNEXT'])
+        highestmodseq = int(status[b'HIGHESTMODSEQ']) if b'HIGHESTMODSEQ' in status else None
+        
+        new_state = {"uidvalidity": uidvalidity, "uidnext": uidnext, "highestmodseq": highestmodseq}
+        incremental = state.get("uidvalidity") == uidvalidity and state.get("last_uid") is not None
+        
+        if incremental:
+            last_uid = int(state["last_uid"])
+            unchanged = uidnext == state.get("uidnext") and (
+                highestmodseq is None or highestmodseq == state.get("highestmodseq")
+            )
+            if unchanged or uidnext <= last_uid + 1:
+                # Nothing arrived since the last sync - no SELECT, no SEARCH
+                return [], {**new_state, "last_uid": last_uid}
+            client.select_folder('INBOX', readonly=True)
+            # "n:*" always matches the newest message, so filter on the watermark
+            uids = [uid for uid in client.search(['UID', f'{last_uid + 1}:*']) if uid > last_uid]
         else:
-            if email_msg.get_content_type() == "text/plain":
-                body = email_msg.get_payload(decode=True).decode('utf-8', errors='ignore')
-        return body
+            if state.get("uidvalidity") is not None:
+                logger.info("IMAP UIDVALIDITY changed, running full resync", account_id=str(account.id))
+            client.select_folder('INBOX', readonly=True)
+            since = (datetime.now(timezone.utc) - timedelta(days=settings.IMAP_INITIAL_SYNC_DAYS)).date()
+            uids = client.search(['SINCE', since])[-settings.IMAP_FULL_SYNC_MAX_MESSAGES:]
+            last_uid = uidnext - 1
+        
+        uids = sorted(uids)[:settings.IMAP_MAX_MESSAGES_PER_SYNC]
+        email_items = self._fetch_messages(client, account, uids, uidvalidity)
+        
+        if incremental and uids:
+            # Messages beyond the per-sync cap are picked up next time
+            last_uid = uids[-1]
+        return email_items, {**new_state, "last_uid": last_uid}
+    
+    def _fetch_messages(
+        self,
+        client: IMAPClient,
+        account: EmailAccount,
+        uids: List[int],
+        uidvalidity: int
+    ) -> List[EmailItem]:
+        """Prefetch headers and structure, then download only each message's text/plain part"""
+        if not uids:
+            return []
+        
+        summaries = client.fetch(uids, ['ENVELOPE', 'BODYSTRUCTURE', 'FLAGS', 'INTERNALDATE'])
+        
+        # Group messages by the section holding their text part - one FETCH per distinct section
+        text_parts: Dict[int, Tuple[str, str, str]] = {}
+        by_section: Dict[str, List[int]] = {}
+        for uid, data in summaries.items():
+            part = self._find_text_part(data.get(b'BODYSTRUCTURE'))
+            if part:
+                text_parts[uid] = part
+                by_section.setdefault(part[0], []).append(uid)
+        
+        bodies: Dict[int, str] = {}
+        for section, section_uids in by_section.items():
+            fetched = client.fetch(section_uids, [f'BODY.PEEK[{section}]<0.{settings.IMAP_MAX_BODY_BYTES}>'])
+            prefix = f'BODY[{section}]'.encode()
+            for uid, data in fetched.items():
+                raw = next((value for name, value in data.items() if name.startswith(prefix)), None)
+                if raw is not None:
+                    _, encoding, charset = text_parts[uid]
+                    bodies[uid] = self._decode_part(raw, encoding, charset)
+        
+        email_items = []
+        for uid in uids:
+            data = summaries.get(uid)
+            if data is None:
+                continue
+            try:
+                email_items.append(self._to_email_item(account, uid, uidvalidity, data, bodies.get(uid, "")))
+            except Exception as e:
+                logger.warning("Error processing IMAP message", error=str(e))
+                continue
+        return email_items
+    
+    def _find_text_part(self, structure, section: str = "") -> Optional[Tuple[str, str, str]]:
+        """Locate the first text/plain part in a BODYSTRUCTURE: (section, transfer encoding, charset)"""
+        if not structure:
+            return None
+        if structure.is_multipart:
+            for index, part in enumerate(structure[0], start=1):
+                found = self._find_text_part(part, f"{section}.{index}" if section else str(index))
+                if found:
+                    return found
+            return None
+        
+        mime_type = (_to_str(structure[0]) + "/" + _to_str(structure[1])).lower()
+        if mime_type != "text/plain":
+            return None
+        params = structure[2] or ()
+        charset = "utf-8"
+        for name, value in zip(params[::2], params[1::2]):
+            if _to_str(name).lower() == "charset":
+                charset = _to_str(value)
+        encoding = _to_str(structure[5] or b"7bit").lower()
+        # A non-multipart message's body is section 1
+        return section or "1", encoding, charset
     
-    def _extract_email(self, sender: str) -> str:
-        """Extract email address from sender string"""
-        import re
-        match = re.search(r'[\w\.-]+@[\w\.-]+\.\w+', sender)
-        return match.group(0) if match else sender
+    def _decode_part(self, raw: bytes, encoding: str, charset: str) -> str:
+        """Decode a (possibly truncated) body part"""
+        if encoding == "base64":
+            # Partial fetches can end mid-quantum
+            raw = raw.replace(b"\r", b"").replace(b"\n", b"")
+            raw = base64.b64decode(raw[:len(raw) - len(raw) % 4])
+        elif encoding == "quoted-printable":
+            raw = quopri.decodestring(raw)
+        try:
+            return raw.decode(charset, errors='ignore')
+        except LookupError:
+            return raw.decode('utf-8', errors='ignore')
     
-    def _extract_name(self, sender: str) -> str:
-        """Extract name from sender string"""
-        import re
-        match = re.match(r'(.+?)\s*<', sender)
-        return match.group(1).strip('"') if match else ""
+    def _to_email_item(self, account: EmailAccount, uid: int, uidvalidity: int, data: dict, body_text: str) -> EmailItem:
+        """Build an unsaved EmailItem from prefetched ENVELOPE/FLAGS data"""
+        envelope = data[b'ENVELOPE']
+        flags = data.get(b'FLAGS', ())
+        sender = envelope.from_[0] if envelope.from_ else None
+        
+        return EmailItem(
+            email_account_id=account.id,
+            # UIDs are only stable within one UIDVALIDITY epoch
+            provider_message_id=f"{uidvalidity}:{uid}",
+            subject=_decode_header_value(envelope.subject),
+            sender_email=f"{_to_str(sender.mailbox)}@{_to_str(sender.host)}" if sender else "",
+            sender_name=_decode_header_value(sender.name) if sender else "",
+            body_text=body_text,
+            received_at=envelope.date or data.get(b'INTERNALDATE') or datetime.now(),
+            is_read=b'\\Seen' in flags,
+            is_important=b'\\Flagged' in flags
+        )
     
     async def refresh_token(self, account: EmailAccount) -> bool:
         """IMAP doesn't use tokens, so this always returns True"""
@@ -1,11 +1,12 @@
 """Notification service"""
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
+from sqlalchemy import select, and_, func, tuple_
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 import uuid
 from app.models.notification import Notification
 from app.models.user import User
+from app.utils.pagination import encode_cursor, decode_cursor
 import structlog
 
 logger = structlog.get_logger()
@@ -46,43 +47,52 @@ class NotificationService:
         user: User,
         unread_only: bool = False,
         page: int = 1,
-        page_size: int = 20
-    ) -> tuple[List[Notification], int, int]:
-        """List user's notifications"""
-        offset = (page - 1) * page_size
-        
-        query = select(Notification).where(Notification.user_id == user.id)
-        
-        if unread_only:
-            query = query.where(Notification.is_read == False)
-        
-        # Get total count
-        count_query = select(Notification).where(Notification.user_id == user.id)
+        page_size: int = 20,
+        cursor: Optional[str] = None
+    ) -> tuple[List[Notification], int, int, Optional[str]]:
+        """List user's notifications, newest first
+
+        With a cursor the page starts after that (created_at, id) instead of
+        at an OFFSET; the returned next_cursor is None on the last page.
+        """
+        filters = [Notification.user_id == user.id]
         if unread_only:
-            count_query = count_query.where(Notification.is_read == False)
-        
-        count_result = await db.execute(count_query)
-        total = len(count_result.scalars().all())
+            filters.append(Notification.is_read == False)
         
-        # Get unread count
-        unread_result = await db.execute(
-            select(Notification).where(
-                and_(
-                    Notification.user_id == user.id,
-                    Notification.is_read == False
-                )
-            )
+        # Get total and unread counts in one aggregate
+        unread = func.count().filter(Notification.is_read == False)
+        count_result = await db.execute(
+            select(func.count(), unread).select_from(Notification).where(Notification.user_id == user.id)
         )
-        unread_count = len(unread_result.scalars().all())
+        total, unread_count = count_result.one()
+        if unread_only:
+            total = unread_count
         
         # Get paginated results
-        query = query.order_by(Notification.created_at.desc())
-        query = query.offset(offset).limit(page_size)
+        query = select(Notification).where(*filters)
+        if cursor:
+            last_created, last_id = decode_cursor(cursor, 2)
+            try:
+                last_created = datetime.fromisoformat(last_created)
+                last_id = uuid.UUID(last_id)
+            except (TypeError, ValueError) as e:
+                raise ValueError("Invalid cursor") from e
+            query = query.where(tuple_(Notification.created_at, Notification.id) < (last_created, last_id))
+        else:
+            query = query.offset((page - 1) * page_size)
+        query = query.order_by(Notification.created_at.desc(), Notification.id.desc())
+        query = query.limit(page_size + 1)
         
         result = await db.execute(query)
-        notifications = result.scalars().all()
+        notifications = list(result.scalars().all())
+        
+        next_cursor = None
+        if len(notifications) > page_size:
+            notifications = notifications[:page_size]
+            last = notifications[-1]
+            next_cursor = encode_cursor([last.created_at.isoformat(), str(last.id)])
         
-        return notifications, total, unread_count
+        return notifications, total, unread_count, next_cursor
     
     async def mark_read(
         self,
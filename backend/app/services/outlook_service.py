@@ -1,7 +1,7 @@
 """Outlook/Microsoft Graph service"""
 from msal import ConfidentialClientApplication
-from typing import List, Optional
-from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
 from app.models.email import EmailAccount, EmailItem
 from app.models.user import User
 from app.services.email_service import EmailService
@@ -12,6 +12,11 @@ import structlog
 
 logger = structlog.get_logger()
 
+DELTA_URL = "https://graph.microsoft.com/v1.0/me/mailFolders/inbox/messages/delta"
+
+# Only the fields mapped into EmailItem
+MESSAGE_SELECT = "subject,from,body,bodyPreview,receivedDateTime,isRead,flag"
+
 
 class OutlookService(EmailService):
     """Microsoft Graph API service for Outlook"""
@@ -26,68 +31,100 @@ class OutlookService(EmailService):
         except Exception:
             return None
     
+    def _client(self) -> httpx.AsyncClient:
+        """HTTP client for Graph calls"""
+        return httpx.AsyncClient(timeout=30.0)
+    
+    def _initial_delta_request(self) -> Tuple[str, Dict[str, str]]:
+        """First delta round: inbox messages in the initial sync window, selected fields only"""
+        since = datetime.now(timezone.utc) - timedelta(days=settings.OUTLOOK_INITIAL_SYNC_DAYS)
+        return DELTA_URL, {
+            "$select": MESSAGE_SELECT,
+            "$filter": f"receivedDateTime ge {since.strftime('%Y-%m-%dT%H:%M:%SZ')}",
+        }
+    
     async def sync_emails(
         self,
         account: EmailAccount,
         user: User
     ) -> List[EmailItem]:
-        """Sync emails from Outlook"""
+        """Sync emails from Outlook with a Graph delta query on the inbox"""
         try:
             access_token = self._get_access_token(account)
             if not access_token:
                 return []
             
-            async with httpx.AsyncClient() as client:
-                # Get messages
-                headers = {
-                    "Authorization": f"Bearer {access_token}",
-                    "Content-Type": "application/json"
-                }
-                
-                response = await client.get(
-                    "https://graph.microsoft.com/v1.0/me/messages",
-                    headers=headers,
-                    params={
-                        "$top": 50,
-                        "$filter": "isRead eq false or flag/flagStatus eq 'flagged'",
-                        "$orderby": "receivedDateTime desc"
-                    }
-                )
-                
-                if response.status_code != 200:
-                    logger.warning("Outlook API error", status=response.status_code)
-                    return []
-                
-                data = response.json()
-                messages = data.get('value', [])
-                email_items = []
-                
-                for msg in messages:
-                    try:
-                        email_item = EmailItem(
-                            email_account_id=account.id,
-                            provider_message_id=msg['id'],
-                            subject=msg.get('subject', ''),
-                            sender_email=msg.get('from', {}).get('emailAddress', {}).get('address', ''),
-                            sender_name=msg.get('from', {}).get('emailAddress', {}).get('name', ''),
-                            body_text=msg.get('bodyPreview', ''),
-                            body_html=msg.get('body', {}).get('content', ''),
-                            received_at=datetime.fromisoformat(
-                                msg['receivedDateTime'].replace('Z', '+00:00')
-                            ),
-                            is_read=msg.get('isRead', False),
-                            is_important=msg.get('flag', {}).get('flagStatus') == 'flagged'
-                        )
-                        email_items.append(email_item)
-                    except Exception as e:
-                        logger.warning("Error processing Outlook message", error=str(e))
+            headers = {
+                "Authorization": f"Bearer {access_token}",
+                "Content-Type": "application/json",
+                # Plain-text bodies instead of HTML, and a page size for delta rounds
+                "Prefer": f'outlook.body-content-type="text", odata.maxpagesize={settings.OUTLOOK_PAGE_SIZE}'
+            }
+            
+            # Resume from the stored delta (or unfinished next) link; the link carries $select/$filter
+            link = (account.sync_state or {}).get("delta_link")
+            url, params = (link, None) if link else self._initial_delta_request()
+            
+            email_items = []
+            # Only stored once the pages read so far are returned with their emails
+            resume_link = None
+            async with self._client() as client:
+                for _ in range(settings.OUTLOOK_MAX_PAGES):
+                    response = await client.get(url, headers=headers, params=params)
+                    
+                    if response.status_code == 410 and link:
+                        # Delta token expired - start a fresh initial round
+                        logger.info("Outlook delta token expired, running full resync", account_id=str(account.id))
+                        link = None
+                        url, params = self._initial_delta_request()
                         continue
-                
-                return email_items
+                    
+                    if response.status_code != 200:
+                        logger.warning("Outlook API error", status=response.status_code)
+                        break
+                    
+                    data = response.json()
+                    for msg in data.get('value', []):
+                        if '@removed' in msg:
+                            continue
+                        try:
+                            email_items.append(self._to_email_item(account, msg))
+                        except Exception as e:
+                            logger.warning("Error processing Outlook message", error=str(e))
+                            continue
+                    
+                    # Track progress so the next sync resumes here
+                    next_link = data.get('@odata.nextLink')
+                    delta_link = data.get('@odata.deltaLink')
+                    resume_link = next_link or delta_link
+                    if not next_link:
+                        break
+                    url, params = next_link, None
+            
+            if resume_link:
+                account.sync_state = {**(account.sync_state or {}), "delta_link": resume_link}
+            return email_items
         except Exception as e:
             logger.error("Outlook sync error", error=str(e))
             return []
     
+    def _to_email_item(self, account: EmailAccount, msg: dict) -> EmailItem:
+        """Build an unsaved EmailItem from a Graph message"""
+        sender = msg.get('from') or {}
+        return EmailItem(
+            email_account_id=account.id,
+            provider_message_id=msg['id'],
+            subject=msg.get('subject', ''),
+            sender_email=sender.get('emailAddress', {}).get('address', ''),
+            sender_name=sender.get('emailAddress', {}).get('name', ''),
+            body_text=(msg.get('body') or {}).get('content') or msg.get('bodyPreview', ''),
+            received_at=datetime.fromisoformat(
+                msg['receivedDateTime'].replace('Z', '+00:00')
+            ),
+            is_read=msg.get('isRead', False),
+            is_important=(msg.get('flag') or {}).get('flagStatus') == 'flagged'
+        )
+    
     async def refresh_token(self, account: EmailAccount) -> bool:
         """Refresh Outlook access token"""
         try:
@@ -0,0 +1,115 @@
+"""Per-account cache of provider message ids already stored"""
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List
+from app.config import settings
+import structlog
+
+logger = structlog.get_logger()
+
+
+class SeenMessageCache:
+    """Bounded per-account sets of stored message ids: in-process LRU plus an optional Redis tier
+
+    Only ids known to be committed are added, and entries are exact (no
+    probabilistic filter), so a hit never hides a new email; a miss just
+    falls through to the database check.
+    """
+
+    KEY_PREFIX = "seen_messages:"
+
+    def __init__(self):
+        self.max_per_account = settings.SEEN_MESSAGES_MAX_PER_ACCOUNT
+        self.max_accounts = settings.SEEN_MESSAGES_MAX_ACCOUNTS
+        self._accounts: "OrderedDict[str, OrderedDict[str, None]]" = OrderedDict()
+        self._redis = None
+        self._redis_disabled = not settings.SEEN_MESSAGES_REDIS_ENABLED
+        self._stats = {"memory_hits": 0, "redis_hits": 0, "misses": 0}
+
+    def _get_redis(self):
+        """Get async Redis client (lazy initialization, disabled after a failure)"""
+        if self._redis_disabled:
+            return None
+        if self._redis is None:
+            try:
+                import redis.asyncio as aioredis
+                self._redis = aioredis.from_url(
+                    settings.REDIS_URL,
+                    socket_connect_timeout=2,
+                    socket_timeout=2,
+                )
+            except Exception as e:
+                self._disable_redis(e)
+        return self._redis
+
+    def _disable_redis(self, error: Exception) -> None:
+        logger.warning("Seen message Redis tier disabled", error=str(error))
+        self._redis_disabled = True
+        self._redis = None
+
+    def _remember(self, account_id: str, message_ids: Iterable[str]) -> None:
+        """Add ids to the in-process set, evicting the oldest ids and accounts over the limits"""
+        seen = self._accounts.get(account_id)
+        if seen is None:
+            seen = self._accounts[account_id] = OrderedDict()
+        self._accounts.move_to_end(account_id)
+        for message_id in message_ids:
+            seen[message_id] = None
+            seen.move_to_end(message_id)
+        while len(seen) > self.max_per_account:
+            seen.popitem(last=False)
+        while len(self._accounts) > self.max_accounts:
+            self._accounts.popitem(last=False)
+
+    async def filter_unseen(self, account_id: str, message_ids: List[str]) -> List[str]:
+        """Ids not known to be stored for the account, in their original order"""
+        account_id = str(account_id)
+        seen = self._accounts.get(account_id, {})
+        unseen = [message_id for message_id in message_ids if message_id not in seen]
+        self._stats["memory_hits"] += len(message_ids) - len(unseen)
+
+        redis_client = self._get_redis() if unseen else None
+        if redis_client is not None:
+            try:
+                scores = await redis_client.zmscore(f"{self.KEY_PREFIX}{account_id}", unseen)
+                found = [message_id for message_id, score in zip(unseen, scores) if score is not None]
+                if found:
+                    self._remember(account_id, found)
+                    self._stats["redis_hits"] += len(found)
+                    unseen = [message_id for message_id, score in zip(unseen, scores) if score is None]
+            except Exception as e:
+                self._disable_redis(e)
+
+        self._stats["misses"] += len(unseen)
+        return unseen
+
+    async def add(self, account_id: str, message_ids: List[str]) -> None:
+        """Record ids that are committed for the account"""
+        if not message_ids:
+            return
+        account_id = str(account_id)
+        self._remember(account_id, message_ids)
+
+        redis_client = self._get_redis()
+        if redis_client is not None:
+            key = f"{self.KEY_PREFIX}{account_id}"
+            now = time.time()
+            try:
+                await redis_client.zadd(key, {message_id: now for message_id in message_ids})
+                # Keep only the most recently seen ids
+                await redis_client.zremrangebyrank(key, 0, -(self.max_per_account + 1))
+                await redis_client.expire(key, settings.SEEN_MESSAGES_TTL_SECONDS)
+            except Exception as e:
+                self._disable_redis(e)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters"""
+        return {
+            **self._stats,
+            "accounts": len(self._accounts),
+            "redis_enabled": not self._redis_disabled,
+        }
+
+
+# Global seen message cache instance
+seen_messages = SeenMessageCache()
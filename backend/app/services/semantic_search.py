@@ -0,0 +1,209 @@
+"""Semantic search over emails, documents and tasks"""
+import asyncio
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.ai_engine.embedder import embedder
+from app.config import settings
+from app.models.document import Document
+from app.models.email import EmailAccount, EmailItem
+from app.models.task import Task
+from app.services.vector_index import VectorIndex, vector_indexes
+import structlog
+
+logger = structlog.get_logger()
+
+KINDS = ("email", "document", "task")
+
+
+def email_text(email_item: EmailItem) -> str:
+    return f"{email_item.subject or ''}\n{email_item.body_text or ''}".strip()[:settings.EMBEDDING_MAX_CHARS]
+
+
+def task_text(task: Task) -> str:
+    return (task.title or "")[:settings.EMBEDDING_MAX_CHARS]
+
+
+def document_chunks(document: Document) -> List[str]:
+    """OCR text split on whitespace into ~EMBEDDING_CHUNK_CHARS pieces, file name on the first"""
+    words = (document.ocr_text or "").split()
+    chunks, current, size = [], [], 0
+    for word in words:
+        if current and size + len(word) > settings.EMBEDDING_CHUNK_CHARS:
+            chunks.append(" ".join(current))
+            current, size = [], 0
+            if len(chunks) == settings.EMBEDDING_MAX_DOCUMENT_CHUNKS:
+                break
+        current.append(word)
+        size += len(word) + 1
+    if current and len(chunks) < settings.EMBEDDING_MAX_DOCUMENT_CHUNKS:
+        chunks.append(" ".join(current))
+    if not chunks:
+        return [document.file_name] if document.file_name else []
+    chunks[0] = f"{document.file_name}\n{chunks[0]}" if document.file_name else chunks[0]
+    return chunks
+
+
+def parse_key(key: str) -> Tuple[str, str, int]:
+    """("document", id, chunk) from "document:<id>#<chunk>"; chunk is 0 for single-vector kinds"""
+    kind, rest = key.split(":", 1)
+    item_id, _, chunk = rest.partition("#")
+    return kind, item_id, int(chunk or 0)
+
+
+class SemanticSearchService:
+    """Embeds items into the owner's vector index as they are stored, and answers nearest-neighbour queries
+
+    Indexing is best effort: failures are logged and never fail the sync,
+    upload or task change that triggered them.
+    """
+
+    async def _index(self, user_id) -> Optional[VectorIndex]:
+        if not await embedder.ready():
+            return None
+        return vector_indexes.get(str(user_id), embedder.model_name, embedder.dimension)
+
+    async def _add(self, user_id, keyed_texts: List[Tuple[str, str]], stale_keys: Iterable[str] = ()) -> int:
+        keyed_texts = [(key, text) for key, text in keyed_texts if text]
+        try:
+            index = await self._index(user_id)
+            if index is None:
+                return 0
+            loop = asyncio.get_running_loop()
+            stale_keys = list(stale_keys)
+            if stale_keys:
+                await loop.run_in_executor(None, index.remove, stale_keys)
+            if not keyed_texts:
+                return 0
+            vectors = await embedder.encode_async([text for _, text in keyed_texts])
+            await loop.run_in_executor(None, index.add, [key for key, _ in keyed_texts], vectors)
+            return len(keyed_texts)
+        except Exception as e:
+            logger.warning("Semantic indexing failed", user_id=str(user_id), error=str(e))
+            return 0
+
+    async def index_emails(self, user_id, email_items: List[EmailItem]) -> int:
+        """Embed subject + body of stored emails"""
+        return await self._add(user_id, [(f"email:{item.id}", email_text(item)) for item in email_items if item.id])
+
+    async def index_document(self, user_id, document: Document) -> int:
+        """Embed a document's OCR chunks, dropping chunks left over from a longer earlier version"""
+        chunks = document_chunks(document)
+        stale = [f"document:{document.id}#{n}" for n in range(len(chunks), settings.EMBEDDING_MAX_DOCUMENT_CHUNKS)]
+        keyed = [(f"document:{document.id}#{n}", chunk) for n, chunk in enumerate(chunks)]
+        return await self._add(user_id, keyed, stale)
+
+    async def index_tasks(self, user_id, tasks: List[Task]) -> int:
+        """Embed task titles"""
+        return await self._add(user_id, [(f"task:{task.id}", task_text(task)) for task in tasks if task.id])
+
+    async def remove(self, user_id, kind: str, item_id) -> None:
+        """Drop a deleted item from the index"""
+        if kind == "document":
+            keys = [f"document:{item_id}#{n}" for n in range(settings.EMBEDDING_MAX_DOCUMENT_CHUNKS)]
+        else:
+            keys = [f"{kind}:{item_id}"]
+        await self._add(user_id, [], keys)
+
+    async def index_missing(self, db: AsyncSession, user_id: uuid.UUID, batch_size: int = 256) -> int:
+        """Backfill items stored before semantic search was enabled; already indexed items are skipped"""
+        index = await self._index(user_id)
+        if index is None:
+            return 0
+        await asyncio.get_running_loop().run_in_executor(None, index.refresh)
+        sources = (
+            (select(EmailItem).join(EmailAccount).where(EmailAccount.user_id == user_id), "email", self.index_emails),
+            (select(Task).where(Task.user_id == user_id), "task", self.index_tasks),
+        )
+        indexed = 0
+        for query, kind, index_items in sources:
+            result = await db.stream_scalars(query.execution_options(yield_per=batch_size))
+            async for batch in result.partitions():
+                missing = [item for item in batch if f"{kind}:{item.id}" not in index]
+                indexed += await index_items(user_id, missing)
+        documents = await db.execute(
+            select(Document).where(Document.user_id == user_id, Document.ocr_text.isnot(None))
+        )
+        for document in documents.scalars().all():
+            if f"document:{document.id}#0" not in index:
+                indexed += await self.index_document(user_id, document)
+        return indexed
+
+    async def search(
+        self,
+        db: AsyncSession,
+        user_id: uuid.UUID,
+        query: str,
+        limit: int = 10,
+        kinds: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Nearest items to the query, best first, one hit per item, resolved against rows the user still owns"""
+        index = await self._index(user_id)
+        if index is None:
+            raise RuntimeError("Semantic search is not available")
+        query_vector = (await embedder.encode_async([query]))[0]
+        # Documents can take several rows; over-fetch so `limit` distinct items survive
+        candidates = await asyncio.get_running_loop().run_in_executor(
+            None, index.search, query_vector, limit * 4, kinds
+        )
+
+        best: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for key, score in candidates:
+            kind, item_id, chunk = parse_key(key)
+            if (kind, item_id) not in best:
+                best[(kind, item_id)] = {"type": kind, "id": item_id, "score": round(score, 4), "chunk": chunk}
+        hits = list(best.values())[:limit]
+        return await self._resolve(db, user_id, hits)
+
+    async def _resolve(self, db: AsyncSession, user_id: uuid.UUID, hits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Attach titles and drop hits for rows that were deleted or are not the user's"""
+        ids: Dict[str, List[uuid.UUID]] = {kind: [] for kind in KINDS}
+        for hit in hits:
+            ids[hit["type"]].append(uuid.UUID(hit["id"]))
+
+        details: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        if ids["email"]:
+            result = await db.execute(
+                select(EmailItem.id, EmailItem.subject, EmailItem.sender_name, EmailItem.sender_email, EmailItem.received_at)
+                .join(EmailAccount)
+                .where(EmailAccount.user_id == user_id, EmailItem.id.in_(ids["email"]))
+            )
+            for row in result.all():
+                details[("email", str(row.id))] = {
+                    "title": row.subject or "(no subject)",
+                    "subtitle": row.sender_name or row.sender_email,
+                    "date": row.received_at,
+                }
+        if ids["document"]:
+            result = await db.execute(
+                select(Document.id, Document.file_name, Document.ai_classification, Document.uploaded_at)
+                .where(Document.user_id == user_id, Document.id.in_(ids["document"]))
+            )
+            for row in result.all():
+                details[("document", str(row.id))] = {
+                    "title": row.file_name,
+                    "subtitle": row.ai_classification,
+                    "date": row.uploaded_at,
+                }
+        if ids["task"]:
+            result = await db.execute(
+                select(Task.id, Task.title, Task.status, Task.due_date)
+                .where(Task.user_id == user_id, Task.id.in_(ids["task"]))
+            )
+            for row in result.all():
+                details[("task", str(row.id))] = {
+                    "title": row.title,
+                    "subtitle": row.status,
+                    "date": row.due_date,
+                }
+
+        return [
+            {**hit, **details[(hit["type"], hit["id"])]}
+            for hit in hits
+            if (hit["type"], hit["id"]) in details
+        ]
+
+
+# Global semantic search service instance
+semantic_search = SemanticSearchService()
@@ -0,0 +1,186 @@
+"""Progress events for background email sync jobs"""
+import asyncio
+import json
+import time
+import uuid
+from typing import Any, AsyncIterator, Dict, List, Optional
+from app.config import settings
+import structlog
+
+logger = structlog.get_logger()
+
+TERMINAL_EVENTS = ("completed", "failed")
+
+
+class SyncJob:
+    """In-process event log of one sync job"""
+
+    def __init__(self, job_id: str, user_id: str):
+        self.job_id = job_id
+        self.user_id = user_id
+        self.events: List[Dict[str, Any]] = []
+        self.created_at = time.monotonic()
+        self.updated_at = self.created_at
+        self.changed = asyncio.Event()
+
+
+class SyncProgressBroker:
+    """Append-only event log per sync job, mirrored to Redis so any API worker can stream it"""
+
+    KEY_PREFIX = "sync_job:"
+
+    def __init__(self):
+        self._jobs: Dict[str, SyncJob] = {}
+        self._redis = None
+        self._redis_disabled = False
+
+    def _get_redis(self):
+        """Get async Redis client (lazy initialization, disabled after a failure)"""
+        if self._redis_disabled:
+            return None
+        if self._redis is None:
+            try:
+                import redis.asyncio as aioredis
+                self._redis = aioredis.from_url(
+                    settings.REDIS_URL,
+                    socket_connect_timeout=2,
+                    socket_timeout=2,
+                )
+            except Exception as e:
+                self._disable_redis(e)
+        return self._redis
+
+    def _disable_redis(self, error: Exception) -> None:
+        logger.warning("Sync progress Redis mirror disabled", error=str(error))
+        self._redis_disabled = True
+        self._redis = None
+
+    def _expire_jobs(self) -> None:
+        """Drop jobs with no new event within the retention window
+        
+        Age runs from the last event, so a long sync that keeps reporting
+        progress is never dropped mid-stream.
+        """
+        cutoff = time.monotonic() - settings.SYNC_JOB_TTL_SECONDS
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.updated_at < cutoff]:
+            del self._jobs[job_id]
+
+    async def create_job(self, user_id: str) -> str:
+        """Register a new job and return its id"""
+        self._expire_jobs()
+        job_id = str(uuid.uuid4())
+        self._jobs[job_id] = SyncJob(job_id, user_id)
+
+        redis_client = self._get_redis()
+        if redis_client is not None:
+            try:
+                await redis_client.setex(f"{self.KEY_PREFIX}{job_id}:owner", settings.SYNC_JOB_TTL_SECONDS, user_id)
+            except Exception as e:
+                self._disable_redis(e)
+        return job_id
+
+    async def get_owner(self, job_id: str) -> Optional[str]:
+        """User id that started the job, or None if the job is unknown"""
+        job = self._jobs.get(job_id)
+        if job:
+            return job.user_id
+
+        redis_client = self._get_redis()
+        if redis_client is not None:
+            try:
+                owner = await redis_client.get(f"{self.KEY_PREFIX}{job_id}:owner")
+                if owner is not None:
+                    return owner.decode("utf-8") if isinstance(owner, bytes) else owner
+            except Exception as e:
+                self._disable_redis(e)
+        return None
+
+    async def publish(self, job_id: str, event: str, data: Optional[Dict[str, Any]] = None) -> None:
+        """Append an event to the job's log"""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return
+
+        entry = {"id": len(job.events) + 1, "event": event, "data": data or {}}
+        job.events.append(entry)
+        job.updated_at = time.monotonic()
+        job.changed.set()
+        job.changed = asyncio.Event()
+
+        redis_client = self._get_redis()
+        if redis_client is not None:
+            key = f"{self.KEY_PREFIX}{job_id}:events"
+            try:
+                await redis_client.rpush(key, json.dumps(entry, default=str))
+                await redis_client.expire(key, settings.SYNC_JOB_TTL_SECONDS)
+                await redis_client.expire(f"{self.KEY_PREFIX}{job_id}:owner", settings.SYNC_JOB_TTL_SECONDS)
+            except Exception as e:
+                self._disable_redis(e)
+
+    async def get_events(self, job_id: str, after: int = 0) -> List[Dict[str, Any]]:
+        """Events with an id greater than `after`"""
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job.events[after:]
+
+        redis_client = self._get_redis()
+        if redis_client is not None:
+            try:
+                raw = await redis_client.lrange(f"{self.KEY_PREFIX}{job_id}:events", after, -1)
+                return [json.loads(item) for item in raw]
+            except Exception as e:
+                self._disable_redis(e)
+        return []
+
+    async def get_status(self, job_id: str) -> Dict[str, Any]:
+        """Current job status and its latest event"""
+        events = await self.get_events(job_id)
+        if not events:
+            status = "queued"
+        elif events[-1]["event"] in TERMINAL_EVENTS:
+            status = events[-1]["event"]
+        else:
+            status = "running"
+        return {
+            "job_id": job_id,
+            "status": status,
+            "last_event": events[-1] if events else None,
+        }
+
+    async def stream(self, job_id: str, after: int = 0) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """Yield events as they are published until the job finishes
+
+        Yields None when nothing happened for a heartbeat interval, so callers
+        can keep idle connections alive through proxies.
+        """
+        idle = 0.0
+        while True:
+            job = self._jobs.get(job_id)
+            waiter = job.changed if job is not None else None
+
+            events = await self.get_events(job_id, after)
+            for entry in events:
+                after = entry["id"]
+                yield entry
+                if entry["event"] in TERMINAL_EVENTS:
+                    return
+            if events:
+                idle = 0.0
+                continue
+
+            if waiter is not None:
+                try:
+                    await asyncio.wait_for(waiter.wait(), timeout=settings.SYNC_SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield None
+            else:
+                # Job runs on another worker - poll the Redis mirror
+                await asyncio.sleep(settings.SYNC_SSE_POLL_SECONDS)
+                idle += settings.SYNC_SSE_POLL_SECONDS
+                if idle >= settings.SYNC_SSE_HEARTBEAT_SECONDS:
+                    idle = 0.0
+                    yield None
+
+
+# Global sync progress broker instance
+sync_progress = SyncProgressBroker()
@@ -1,6 +1,6 @@
 """Task service"""
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_
+from sqlalchemy import select, and_, or_, func
 from typing import Optional, List
 from datetime import datetime, date
 import uuid
@@ -8,6 +8,8 @@ from app.models.task import Task
 from app.models.user import User
 from app.schemas.task import TaskCreate, TaskUpdate
 from app.ai_engine.priority_scorer import priority_scorer
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.services.semantic_search import semantic_search
 import structlog
 
 logger = structlog.get_logger()
@@ -57,6 +59,7 @@ class TaskService:
             db.add(task)
             await db.commit()
             await db.refresh(task)
+            await semantic_search.index_tasks(user.id, [task])
             
             return task
         except Exception as e:
@@ -86,43 +89,75 @@ class TaskService:
         due_date: Optional[date] = None,
         is_approved: Optional[bool] = None,
         page: int = 1,
-        page_size: int = 20
-    ) -> tuple[List[Task], int]:
-        """List user's tasks"""
-        offset = (page - 1) * page_size
-        
-        # Build query
-        query = select(Task).where(Task.user_id == user.id)
-        
+        page_size: int = 20,
+        cursor: Optional[str] = None
+    ) -> tuple[List[Task], int, Optional[str]]:
+        """List user's tasks
+
+        Ordered by (priority desc, due_date asc nulls last, id). With a cursor
+        the page starts after that sort key instead of at an OFFSET; the
+        returned next_cursor is None on the last page.
+        """
+        filters = [Task.user_id == user.id]
         if status:
-            query = query.where(Task.status == status)
-        
+            filters.append(Task.status == status)
         if due_date:
-            query = query.where(Task.due_date <= due_date)
-        
+            filters.append(Task.due_date <= due_date)
         if is_approved is not None:
-            query = query.where(Task.is_approved == is_approved)
+            filters.append(Task.is_approved == is_approved)
         
         # Get total count
-        count_query = select(Task).where(Task.user_id == user.id)
-        if status:
-            count_query = count_query.where(Task.status == status)
-        if due_date:
-            count_query = count_query.where(Task.due_date <= due_date)
-        if is_approved is not None:
-            count_query = count_query.where(Task.is_approved == is_approved)
-        
-        count_result = await db.execute(count_query)
-        total = len(count_result.scalars().all())
+        count_result = await db.execute(select(func.count()).select_from(Task).where(*filters))
+        total = count_result.scalar_one()
         
         # Get paginated results
-        query = query.order_by(Task.priority.desc(), Task.due_date.asc())
-        query = query.offset(offset).limit(page_size)
+        priority = func.coalesce(Task.priority, 0)
+        query = select(Task).where(*filters)
+        if cursor:
+            query = query.where(self._after_cursor(priority, cursor))
+        else:
+            query = query.offset((page - 1) * page_size)
+        query = query.order_by(priority.desc(), Task.due_date.asc().nulls_last(), Task.id.asc())
+        query = query.limit(page_size + 1)
         
         result = await db.execute(query)
-        tasks = result.scalars().all()
+        tasks = list(result.scalars().all())
+        
+        next_cursor = None
+        if len(tasks) > page_size:
+            tasks = tasks[:page_size]
+            last = tasks[-1]
+            next_cursor = encode_cursor([
+                last.priority or 0,
+                last.due_date.isoformat() if last.due_date else None,
+                str(last.id),
+            ])
         
-        return tasks, total
+        return tasks, total, next_cursor
+    
+    def _after_cursor(self, priority, cursor: str):
+        """Rows that sort after the cursor's (priority, due_date, id)"""
+        last_priority, last_due, last_id = decode_cursor(cursor, 3)
+        try:
+            last_priority = int(last_priority)
+            last_due = datetime.fromisoformat(last_due) if last_due is not None else None
+            last_id = uuid.UUID(last_id)
+        except (TypeError, ValueError) as e:
+            raise ValueError("Invalid cursor") from e
+        
+        if last_due is None:
+            # Undated tasks sort last within a priority
+            same_priority_after = and_(Task.due_date.is_(None), Task.id > last_id)
+        else:
+            same_priority_after = or_(
+                Task.due_date > last_due,
+                Task.due_date.is_(None),
+                and_(Task.due_date == last_due, Task.id > last_id),
+            )
+        return or_(
+            priority < last_priority,
+            and_(priority == last_priority, same_priority_after),
+        )
     
     async def update_task(
         self,
@@ -137,6 +172,7 @@ class TaskService:
             return None
         
         # Update fields
+        title_changed = task_data.title is not None and task_data.title != task.title
         if task_data.title is not None:
             task.title = task_data.title
         if task_data.description is not None:
@@ -171,6 +207,8 @@ class TaskService:
         task.updated_at = datetime.now()
         await db.commit()
         await db.refresh(task)
+        if title_changed:
+            await semantic_search.index_tasks(user.id, [task])
         
         return task
     
@@ -185,6 +223,7 @@ class TaskService:
         if task:
             await db.delete(task)
             await db.commit()
+            await semantic_search.remove(user.id, "task", task_id)
             return True
         return False
     
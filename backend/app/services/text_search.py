@@ -0,0 +1,47 @@
+"""Postgres full-text search helpers for emails and documents"""
+from typing import Any, Dict, List
+from sqlalchemy import func, literal_column, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Must match the configuration in the generated search_vector columns
+SEARCH_CONFIG = literal_column("'english'::regconfig")
+
+HEADLINE_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxFragments=2, MaxWords=20, MinWords=5"
+
+
+def search_query(term: str):
+    """Parse user input (quotes, OR, -negation) into a tsquery; never raises on bad syntax"""
+    return func.websearch_to_tsquery(SEARCH_CONFIG, term)
+
+
+def like_pattern(term: str) -> str:
+    """Substring ILIKE pattern with LIKE wildcards in the term escaped"""
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def search_filter(search_vector, query, term: str, substring_columns: List[Any]):
+    """Full-text match, or a trigram-indexed substring match on the given columns"""
+    pattern = like_pattern(term)
+    return or_(
+        search_vector.op("@@")(query),
+        *[column.ilike(pattern, escape="\\") for column in substring_columns],
+    )
+
+
+def search_rank(search_vector, query):
+    """Cover-density rank; substring-only matches rank 0"""
+    return func.ts_rank_cd(search_vector, query)
+
+
+async def headlines(db: AsyncSession, id_column, text_column, ids: List[Any], query) -> Dict[Any, str]:
+    """Highlighted snippets for one page of rows (ts_headline re-parses the text, so never for the whole match set)"""
+    if not ids:
+        return {}
+    result = await db.execute(
+        select(
+            id_column,
+            func.ts_headline(SEARCH_CONFIG, func.coalesce(text_column, ""), query, HEADLINE_OPTIONS),
+        ).where(id_column.in_(ids))
+    )
+    return {row_id: snippet for row_id, snippet in result.all() if snippet}
@@ -0,0 +1,164 @@
+"""Short-lived cache of authenticated user snapshots"""
+import asyncio
+import json
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+from sqlalchemy import event
+from app.config import settings
+from app.models.user import User
+import structlog
+
+logger = structlog.get_logger()
+
+
+class UserSnapshot:
+    """The user fields routes need from authentication, without an ORM instance"""
+
+    __slots__ = ("id", "is_active", "timezone")
+
+    def __init__(self, id: uuid.UUID, is_active: bool, timezone: Optional[str]):
+        self.id = id
+        self.is_active = is_active
+        self.timezone = timezone
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserSnapshot":
+        return cls(user.id, bool(user.is_active), user.timezone)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"id": str(self.id), "is_active": self.is_active, "timezone": self.timezone}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "UserSnapshot":
+        return cls(uuid.UUID(data["id"]), data["is_active"], data.get("timezone"))
+
+
+class UserCache:
+    """In-process TTL cache of user snapshots plus an optional Redis tier
+
+    Entries live USER_CACHE_TTL_SECONDS, which bounds how long another API
+    worker can serve a snapshot after the user changed.
+    """
+
+    KEY_PREFIX = "auth_user:"
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, UserSnapshot]]" = OrderedDict()
+        self._redis = None
+        self._redis_disabled = not settings.USER_CACHE_REDIS_ENABLED
+        self._tasks: Set[asyncio.Task] = set()
+        self._stats = {"memory_hits": 0, "redis_hits": 0, "misses": 0}
+
+    def _get_redis(self):
+        """Get async Redis client (lazy initialization, disabled after a failure)"""
+        if self._redis_disabled:
+            return None
+        if self._redis is None:
+            try:
+                import redis.asyncio as aioredis
+                self._redis = aioredis.from_url(
+                    settings.REDIS_URL,
+                    socket_connect_timeout=2,
+                    socket_timeout=2,
+                )
+            except Exception as e:
+                self._disable_redis(e)
+        return self._redis
+
+    def _disable_redis(self, error: Exception) -> None:
+        logger.warning("User cache Redis tier disabled", error=str(error))
+        self._redis_disabled = True
+        self._redis = None
+
+    def _remember(self, snapshot: UserSnapshot) -> None:
+        key = str(snapshot.id)
+        self._entries[key] = (self._clock() + settings.USER_CACHE_TTL_SECONDS, snapshot)
+        self._entries.move_to_end(key)
+        while len(self._entries) > settings.USER_CACHE_MAX_ENTRIES:
+            self._entries.popitem(last=False)
+
+    async def get(self, user_id: str) -> Optional[UserSnapshot]:
+        """Cached snapshot, or None"""
+        user_id = str(user_id)
+        entry = self._entries.get(user_id)
+        if entry is not None:
+            if self._clock() < entry[0]:
+                self._stats["memory_hits"] += 1
+                return entry[1]
+            del self._entries[user_id]
+
+        redis_client = self._get_redis()
+        if redis_client is not None:
+            try:
+                raw = await redis_client.get(f"{self.KEY_PREFIX}{user_id}")
+                if raw is not None:
+                    snapshot = UserSnapshot.from_dict(json.loads(raw))
+                    self._remember(snapshot)
+                    self._stats["redis_hits"] += 1
+                    return snapshot
+            except Exception as e:
+                self._disable_redis(e)
+
+        self._stats["misses"] += 1
+        return None
+
+    async def set(self, snapshot: UserSnapshot) -> None:
+        """Store a snapshot in both tiers"""
+        self._remember(snapshot)
+
+        redis_client = self._get_redis()
+        if redis_client is not None:
+            try:
+                await redis_client.setex(
+                    f"{self.KEY_PREFIX}{snapshot.id}",
+                    int(settings.USER_CACHE_TTL_SECONDS),
+                    json.dumps(snapshot.to_dict()),
+                )
+            except Exception as e:
+                self._disable_redis(e)
+
+    def invalidate_local(self, user_id: str) -> None:
+        """Drop a user from the in-process tier"""
+        self._entries.pop(str(user_id), None)
+
+    async def invalidate(self, user_id: str) -> None:
+        """Drop a user from both tiers, e.g. after deactivation"""
+        self.invalidate_local(user_id)
+        redis_client = self._get_redis()
+        if redis_client is not None:
+            try:
+                await redis_client.delete(f"{self.KEY_PREFIX}{user_id}")
+            except Exception as e:
+                self._disable_redis(e)
+
+    def _invalidate_soon(self, user_id: str) -> None:
+        """Invalidate from synchronous code: local tier now, Redis on the running loop"""
+        self.invalidate_local(user_id)
+        if self._redis_disabled:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        task = loop.create_task(self.invalidate(user_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters"""
+        return {**self._stats, "entries": len(self._entries), "redis_enabled": not self._redis_disabled}
+
+
+# Global user cache instance
+user_cache = UserCache()
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_changed_user(mapper, connection, target) -> None:
+    """Any flushed change to a user (is_active, timezone, ...) drops its cached snapshot"""
+    if target.id is not None:
+        user_cache._invalidate_soon(str(target.id))
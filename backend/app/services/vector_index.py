@@ -0,0 +1,303 @@
+"""Per-user on-disk vector index: a memory-mapped float16 matrix plus a key map"""
+import json
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from app.config import settings
+import structlog
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process use only
+    fcntl = None
+
+logger = structlog.get_logger()
+
+SEARCH_BLOCK_ROWS = 16384
+
+
+class VectorIndex:
+    """Append-only matrix of unit vectors, one key ("kind:id") per row
+
+    Files in the index directory:
+      vectors.f16  rows of `dim` float16 values, appended as items are indexed
+      keys.jsonl   one [key, row] line per write; a later line for the same key
+                   supersedes the earlier row and row -1 deletes the key
+      meta.json    model, dim, rows, version (bumped on every write) and
+                   generation (bumped when the files are rewritten)
+    Superseded rows stay in the matrix and are masked out at query time until
+    they outnumber the live ones and the files are rewritten. Writers hold an
+    exclusive flock, readers a shared one while refreshing, so API and worker
+    processes can share a directory.
+    """
+
+    def __init__(self, path: str, model: str, dim: int):
+        self.path = path
+        self.model = model
+        self.dim = dim
+        self._lock = threading.Lock()
+        self._reset_state()
+
+    def _reset_state(self) -> None:
+        self._version = -1
+        self._generation = -1
+        self._rows = 0
+        self._keys_offset = 0
+        self._key_rows: Dict[str, int] = {}
+        self._row_keys: List[Optional[str]] = []
+        self._row_kinds = np.zeros(0, dtype=np.uint8)
+        self._alive = np.zeros(0, dtype=bool)
+        self._kind_codes: Dict[str, int] = {}
+        self._matrix: Optional[np.memmap] = None
+        self._decoded = np.zeros((0, self.dim), dtype=np.float32)
+        self._decoded_rows = 0
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool):
+        os.makedirs(self.path, exist_ok=True)
+        with open(self._file("index.lock"), "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_meta(self) -> Optional[Dict]:
+        try:
+            with open(self._file("meta.json")) as meta_file:
+                return json.load(meta_file)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, rows: int, keys_bytes: int, version: int, generation: int) -> None:
+        meta = {
+            "model": self.model,
+            "dim": self.dim,
+            "rows": rows,
+            "keys_bytes": keys_bytes,
+            "version": version,
+            "generation": generation,
+        }
+        tmp_path = self._file("meta.json.tmp")
+        with open(tmp_path, "w") as meta_file:
+            json.dump(meta, meta_file)
+        os.replace(tmp_path, self._file("meta.json"))
+
+    def _kind_code(self, key: str) -> int:
+        kind = key.split(":", 1)[0]
+        if kind not in self._kind_codes:
+            self._kind_codes[kind] = len(self._kind_codes)
+        return self._kind_codes[kind]
+
+    def _apply(self, key: str, row: int) -> None:
+        """Point a key at a row (or delete it with -1), updating the alive mask"""
+        previous = self._key_rows.pop(key, None)
+        if previous is not None:
+            self._alive[previous] = False
+        if row >= 0:
+            self._key_rows[key] = row
+            self._row_keys[row] = key
+            self._row_kinds[row] = self._kind_code(key)
+            self._alive[row] = True
+
+    def _grow(self, rows: int) -> None:
+        extra = rows - len(self._row_keys)
+        if extra > 0:
+            self._row_keys.extend([None] * extra)
+            self._row_kinds = np.concatenate([self._row_kinds, np.zeros(extra, dtype=np.uint8)])
+            self._alive = np.concatenate([self._alive, np.zeros(extra, dtype=bool)])
+
+    def _load(self) -> None:
+        """Bring the in-memory key map and matrix up to date with the files (caller holds a file lock)"""
+        meta = self._read_meta()
+        if meta is None or meta.get("model") != self.model or meta.get("dim") != self.dim:
+            if self._version != -1:
+                self._reset_state()
+            return
+        if meta["version"] == self._version and meta["generation"] == self._generation:
+            return
+        if meta["generation"] != self._generation:
+            self._reset_state()
+            self._generation = meta["generation"]
+
+        self._grow(meta["rows"])
+        with open(self._file("keys.jsonl"), "rb") as keys_file:
+            keys_file.seek(self._keys_offset)
+            # Only lines covered by meta.json; anything after it is an unfinished write
+            for line in keys_file.read(meta["keys_bytes"] - self._keys_offset).splitlines():
+                key, row = json.loads(line)
+                self._apply(key, row)
+        self._keys_offset = meta["keys_bytes"]
+
+        if meta["rows"] != self._rows or self._matrix is None:
+            self._rows = meta["rows"]
+            self._matrix = (
+                np.memmap(self._file("vectors.f16"), dtype=np.float16, mode="r", shape=(self._rows, self.dim))
+                if self._rows else None
+            )
+        self._version = meta["version"]
+
+    def refresh(self) -> None:
+        """Pick up rows written by other processes"""
+        with self._lock, self._file_lock(exclusive=False):
+            self._load()
+
+    def _ensure_files(self) -> None:
+        """Start a fresh index when none exists or it was built with another model"""
+        meta = self._read_meta()
+        if meta is not None and meta.get("model") == self.model and meta.get("dim") == self.dim:
+            return
+        if meta is not None:
+            logger.info("Embedding model changed, resetting vector index", path=self.path, model=self.model)
+        self._reset_state()
+        open(self._file("vectors.f16"), "wb").close()
+        open(self._file("keys.jsonl"), "wb").close()
+        self._write_meta(0, 0, 0, (meta or {}).get("generation", -1) + 1)
+
+    def _append(self, keys_lines: List[str], vectors: Optional[np.ndarray] = None) -> None:
+        """Append rows and key lines, then publish them through meta.json (caller holds the exclusive lock)"""
+        row_bytes = self._rows * self.dim * np.dtype(np.float16).itemsize
+        # Drop the tail of a write that crashed before meta.json was updated
+        with open(self._file("vectors.f16"), "r+b") as vectors_file:
+            vectors_file.truncate(row_bytes)
+            if vectors is not None:
+                vectors_file.seek(row_bytes)
+                vectors_file.write(vectors.tobytes())
+        with open(self._file("keys.jsonl"), "r+b") as keys_file:
+            keys_file.truncate(self._keys_offset)
+            keys_file.seek(self._keys_offset)
+            keys_file.write("".join(keys_lines).encode())
+            keys_bytes = keys_file.tell()
+        rows = self._rows + (len(vectors) if vectors is not None else 0)
+        self._write_meta(rows, keys_bytes, self._version + 1, self._generation)
+        self._load()
+        self._compact_if_sparse()
+
+    def add(self, keys: Sequence[str], vectors: np.ndarray) -> None:
+        """Append vectors, superseding earlier rows for the same keys"""
+        if len(keys) == 0:
+            return
+        vectors = np.asarray(vectors, dtype=np.float16).reshape(len(keys), self.dim)
+        with self._lock, self._file_lock(exclusive=True):
+            self._ensure_files()
+            self._load()
+            lines = [json.dumps([key, self._rows + offset]) + "\n" for offset, key in enumerate(keys)]
+            self._append(lines, vectors)
+
+    def remove(self, keys: Iterable[str]) -> None:
+        """Delete keys (their rows are masked out)"""
+        with self._lock, self._file_lock(exclusive=True):
+            self._load()
+            present = [key for key in dict.fromkeys(keys) if key in self._key_rows]
+            if present:
+                self._append([json.dumps([key, -1]) + "\n" for key in present])
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._key_rows
+
+    def __len__(self) -> int:
+        return len(self._key_rows)
+
+    def _compact_if_sparse(self) -> None:
+        dead = self._rows - len(self._key_rows)
+        if dead > settings.EMBEDDING_INDEX_MIN_COMPACT_ROWS and dead > len(self._key_rows):
+            self._compact()
+
+    def _compact(self) -> None:
+        """Rewrite the files with only live rows (caller holds the exclusive lock)"""
+        live = sorted(self._key_rows.items(), key=lambda item: item[1])
+        rows = np.asarray([row for _, row in live], dtype=np.int64)
+        vectors = np.asarray(self._matrix[rows]) if len(rows) else np.zeros((0, self.dim), dtype=np.float16)
+        keys_data = "".join(json.dumps([key, new_row]) + "\n" for new_row, (key, _) in enumerate(live)).encode()
+
+        with open(self._file("vectors.f16.tmp"), "wb") as vectors_file:
+            vectors_file.write(vectors.tobytes())
+        with open(self._file("keys.jsonl.tmp"), "wb") as keys_file:
+            keys_file.write(keys_data)
+        # Readers keep their old memmap (and inode) until they see the new generation
+        os.replace(self._file("vectors.f16.tmp"), self._file("vectors.f16"))
+        os.replace(self._file("keys.jsonl.tmp"), self._file("keys.jsonl"))
+        self._write_meta(len(live), len(keys_data), 0, self._generation + 1)
+        self._load()
+        logger.info("Vector index compacted", path=self.path, rows=len(live))
+
+    def _scores(self, matrix: np.memmap, rows: int, query: np.ndarray) -> np.ndarray:
+        """Dot products of every row with the query
+
+        float16 -> float32 conversion dominates a scan, so indexes up to
+        EMBEDDING_INDEX_DECODED_MAX_ROWS keep a float32 copy that only decodes
+        newly appended rows; larger ones are streamed from the memmap in blocks.
+        """
+        if rows <= settings.EMBEDDING_INDEX_DECODED_MAX_ROWS:
+            with self._lock:
+                if self._decoded_rows < rows and matrix is self._matrix:
+                    if len(self._decoded) < rows:
+                        # Grow by doubling so appends don't copy the whole buffer each time
+                        grown = np.empty((min(max(rows, 2 * len(self._decoded)), settings.EMBEDDING_INDEX_DECODED_MAX_ROWS), self.dim), dtype=np.float32)
+                        grown[:self._decoded_rows] = self._decoded[:self._decoded_rows]
+                        self._decoded = grown
+                    self._decoded[self._decoded_rows:rows] = matrix[self._decoded_rows:rows]
+                    self._decoded_rows = rows
+                decoded, decoded_rows = self._decoded, self._decoded_rows
+            if decoded_rows >= rows:
+                return decoded[:rows] @ query
+        scores = np.empty(rows, dtype=np.float32)
+        for start in range(0, rows, SEARCH_BLOCK_ROWS):
+            end = min(start + SEARCH_BLOCK_ROWS, rows)
+            scores[start:end] = matrix[start:end].astype(np.float32) @ query
+        return scores
+
+    def search(self, query: np.ndarray, limit: int, kinds: Optional[Iterable[str]] = None) -> List[Tuple[str, float]]:
+        """Top keys by cosine similarity to a unit query vector"""
+        self.refresh()
+        with self._lock:
+            matrix, rows = self._matrix, self._rows
+            if matrix is None or limit <= 0:
+                return []
+            mask = self._alive[:rows].copy()
+            if kinds is not None:
+                codes = [self._kind_codes[kind] for kind in kinds if kind in self._kind_codes]
+                mask &= np.isin(self._row_kinds[:rows], codes)
+            row_keys = self._row_keys
+
+        limit = min(limit, int(mask.sum()))
+        if limit == 0:
+            return []
+        query = np.asarray(query, dtype=np.float32).reshape(self.dim)
+        scores = np.where(mask, self._scores(matrix, rows, query), -np.inf)
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top])]
+        return [(row_keys[row], float(scores[row])) for row in top]
+
+
+class VectorIndexStore:
+    """Open per-user indexes under EMBEDDING_INDEX_DIR, least recently used closed first"""
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or settings.EMBEDDING_INDEX_DIR
+        self._indexes: "OrderedDict[str, VectorIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str, model: str, dim: int) -> VectorIndex:
+        user_id = str(user_id)
+        with self._lock:
+            index = self._indexes.get(user_id)
+            if index is None or index.model != model or index.dim != dim:
+                index = VectorIndex(os.path.join(self.root, user_id), model, dim)
+                self._indexes[user_id] = index
+            self._indexes.move_to_end(user_id)
+            while len(self._indexes) > settings.EMBEDDING_INDEX_CACHE_SIZE:
+                self._indexes.popitem(last=False)
+            return index
+
+
+# Global vector index store instance
+vector_indexes = VectorIndexStore()
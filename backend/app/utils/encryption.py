@@ -1,17 +1,17 @@
 """Encryption utilities for sensitive data"""
-from cryptography.fernet import Fernet
+from cryptography.fernet import Fernet, MultiFernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from cryptography.hazmat.backends import default_backend
+from functools import lru_cache
+from typing import Tuple
 import base64
-import os
 from app.config import settings
 
 
-def get_encryption_key() -> bytes:
-    """Get or generate encryption key"""
-    encryption_key = settings.ENCRYPTION_KEY.encode()
-    
+@lru_cache(maxsize=16)
+def derive_key(secret: str) -> bytes:
+    """Derive a Fernet key from a secret with PBKDF2 (once per secret per process)"""
     # Derive a 32-byte key using PBKDF2
     kdf = PBKDF2HMAC(
         algorithm=hashes.SHA256(),
@@ -20,19 +20,42 @@ def get_encryption_key() -> bytes:
         iterations=100000,
         backend=default_backend()
     )
-    key = base64.urlsafe_b64encode(kdf.derive(encryption_key))
-    return key
+    return base64.urlsafe_b64encode(kdf.derive(secret.encode()))
+
+
+def _configured_secrets() -> Tuple[str, ...]:
+    """Primary secret first, then the older ones still accepted for decryption"""
+    previous = [secret.strip() for secret in settings.ENCRYPTION_KEYS.split(',') if secret.strip()]
+    return tuple(dict.fromkeys([settings.ENCRYPTION_KEY, *previous]))
+
+
+@lru_cache(maxsize=4)
+def _fernet_for(secrets: Tuple[str, ...]) -> MultiFernet:
+    return MultiFernet([Fernet(derive_key(secret)) for secret in secrets])
+
+
+def get_fernet() -> MultiFernet:
+    """Cached MultiFernet: encrypts with the primary key, decrypts with any configured key"""
+    return _fernet_for(_configured_secrets())
+
+
+def get_encryption_key() -> bytes:
+    """Get the derived primary encryption key"""
+    return derive_key(settings.ENCRYPTION_KEY)
 
 
 def encrypt_token(token: str) -> str:
     """Encrypt a token"""
-    f = Fernet(get_encryption_key())
-    encrypted = f.encrypt(token.encode())
+    encrypted = get_fernet().encrypt(token.encode())
     return encrypted.decode()
 
 
 def decrypt_token(encrypted_token: str) -> str:
     """Decrypt a token"""
-    f = Fernet(get_encryption_key())
-    decrypted = f.decrypt(encrypted_token.encode())
+    decrypted = get_fernet().decrypt(encrypted_token.encode())
     return decrypted.decode()
+
+
+def rotate_token(encrypted_token: str) -> str:
+    """Re-encrypt a token under the primary key (keeps its original timestamp)"""
+    return get_fernet().rotate(encrypted_token.encode()).decode()
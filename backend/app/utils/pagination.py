@@ -0,0 +1,22 @@
+"""Keyset pagination cursors"""
+import base64
+import json
+from typing import Any, List
+
+
+def encode_cursor(values: List[Any]) -> str:
+    """Opaque cursor for the sort key of the last row on a page"""
+    raw = json.dumps(values, separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """Sort key values from a cursor, ValueError if it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Invalid cursor")
+    return values
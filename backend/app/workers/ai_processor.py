@@ -1,12 +1,43 @@
 """AI processing worker"""
 from app.workers.celery_app import celery_app
+from app.workers.runtime import run_async
+from app.database import get_async_session_local
+from app.models.email import EmailAccount, EmailItem
+from app.services.email_sync_service import email_sync_service
+from app.services.semantic_search import semantic_search
+import uuid
+
+
+async def _process_email(email_id: str) -> bool:
+    """Fill a stored email's missing NLP and task extraction fields"""
+    session_factory = get_async_session_local()
+    async with session_factory() as db:
+        email_item = await db.get(EmailItem, uuid.UUID(email_id))
+        if not email_item:
+            return False
+        account = await db.get(EmailAccount, email_item.email_account_id)
+        await email_sync_service.nlp_stage(db, [email_id], account.provider)
+        await email_sync_service.llm_stage(db, [email_id])
+        return True
 
 @celery_app.task(name="process_email_with_ai")
 def process_email_with_ai(email_id: str):
     """Process email with AI for task extraction"""
-    # Placeholder for AI processing
+    if not run_async(_process_email(email_id)):
+        return {"status": "error", "reason": "Email not found"}
     return {"status": "success", "email_id": email_id}
 
+async def _index_user(user_id: str) -> int:
+    session_factory = get_async_session_local()
+    async with session_factory() as db:
+        return await semantic_search.index_missing(db, uuid.UUID(user_id))
+
+@celery_app.task(name="build_semantic_index")
+def build_semantic_index(user_id: str):
+    """Embed a user's emails, documents and tasks that are not in their vector index yet"""
+    indexed = run_async(_index_user(user_id))
+    return {"status": "success", "user_id": user_id, "indexed": indexed}
+
 @celery_app.task(name="generate_daily_plan")
 def generate_daily_plan(user_id: str, target_date: str):
     """Generate daily plan for user"""
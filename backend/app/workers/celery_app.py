@@ -1,5 +1,6 @@
 """Celery application configuration"""
 from celery import Celery
+from celery.signals import worker_process_init, worker_process_shutdown
 from app.config import settings
 
 celery_app = Celery(
@@ -18,4 +19,37 @@ celery_app.conf.update(
     task_track_started=True,
     task_time_limit=30 * 60,  # 30 minutes
     task_soft_time_limit=25 * 60,  # 25 minutes
+    # Email sync pipeline stages get their own queues (and worker pools)
+    task_routes={
+        "sync_email_account": {"queue": "email_fetch"},
+        "sync_all_emails": {"queue": "email_fetch"},
+        "schedule_email_syncs": {"queue": "email_fetch"},
+        "persist_emails": {"queue": "email_persist"},
+        "analyze_emails": {"queue": "email_nlp"},
+        "build_semantic_index": {"queue": "email_nlp"},
+        "extract_email_tasks": {"queue": "email_llm"},
+        "suggest_email_actions": {"queue": "email_suggest"},
+    },
+    worker_prefetch_multiplier=1,  # Long LLM tasks shouldn't sit behind each other in one worker
+    beat_schedule={
+        "schedule-email-syncs": {
+            "task": "schedule_email_syncs",
+            "schedule": settings.SYNC_SCHEDULER_TICK_SECONDS,
+            "options": {"expires": settings.SYNC_SCHEDULER_TICK_SECONDS},
+        },
+    },
 )
+
+
+@worker_process_init.connect
+def init_worker_process(**kwargs):
+    """Start the process's event loop and open long-lived clients on it"""
+    from app.workers.runtime import worker_runtime
+    worker_runtime.start()
+
+
+@worker_process_shutdown.connect
+def shutdown_worker_process(**kwargs):
+    """Close long-lived clients and stop the event loop when the worker process exits"""
+    from app.workers.runtime import worker_runtime
+    worker_runtime.shutdown()
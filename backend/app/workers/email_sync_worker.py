@@ -1,55 +1,90 @@
-"""Email sync worker"""
+"""Email sync worker
+
+Sync runs as a pipeline of tasks, each on its own queue so fetch and LLM
+throughput scale on separate worker pools:
+
+    sync_email_account (email_fetch) -> persist_emails (email_persist)
+    -> analyze_emails (email_nlp) -> extract_email_tasks (email_llm)
+    -> suggest_email_actions (email_suggest)
+
+Every stage is idempotent, so failures are retried with backoff.
+"""
+import time
+from typing import Optional
+from app.config import settings
 from app.workers.celery_app import celery_app
-from app.database import SessionLocal
+from app.workers.runtime import run_async
+from app.workers.sync_scheduler import is_due, tick_window
+from app.database import SessionLocal, get_async_session_local
 from app.models.email import EmailAccount
-from app.models.user import User
-from app.services.gmail_service import gmail_service
-from app.services.outlook_service import outlook_service
-from app.services.imap_service import imap_service
+from app.services.email_sync_service import email_sync_service
 from sqlalchemy import select
-import uuid
-from datetime import datetime
 
-@celery_app.task(name="sync_email_account")
-def sync_email_account(account_id: str):
-    """Sync emails for a specific account"""
-    db = SessionLocal()
-    try:
-        result = db.execute(
-            select(EmailAccount).where(EmailAccount.id == uuid.UUID(account_id))
-        )
-        account = result.scalar_one_or_none()
-        
-        if not account or not account.sync_enabled:
-            return {"status": "skipped", "reason": "Account not found or disabled"}
-        
-        # Get user
-        result = db.execute(
-            select(User).where(User.id == account.user_id)
-        )
-        user = result.scalar_one_or_none()
-        
-        if not user:
-            return {"status": "error", "reason": "User not found"}
-        
-        # Get appropriate service
-        if account.provider == "gmail":
-            service = gmail_service
-        elif account.provider == "outlook":
-            service = outlook_service
-        else:
-            service = imap_service
-        
-        # Sync emails (would need async wrapper in production)
-        # For now, this is a placeholder
-        account.last_sync_at = datetime.now()
-        db.commit()
-        
-        return {"status": "success", "account_id": account_id}
-    except Exception as e:
-        return {"status": "error", "error": str(e)}
-    finally:
-        db.close()
+PIPELINE_TASK_OPTIONS = {
+    "bind": True,
+    "acks_late": True,
+    "autoretry_for": (Exception,),
+    "retry_backoff": True,
+    "retry_backoff_max": 600,
+    "retry_jitter": True,
+    "max_retries": 5,
+}
+
+
+async def _run_stage(stage, *args):
+    """Run a sync service stage with its own database session"""
+    session_factory = get_async_session_local()
+    async with session_factory() as db:
+        return await stage(db, *args)
+
+
+@celery_app.task(name="sync_email_account", **PIPELINE_TASK_OPTIONS)
+def sync_email_account(self, account_id: str):
+    """Fetch stage: new emails from the provider"""
+    fetched = run_async(_run_stage(email_sync_service.fetch_stage, account_id))
+    if fetched is None:
+        return {"status": "skipped", "reason": "Account not found or disabled"}
+
+    persist_emails.delay(account_id, fetched["items"], fetched["sync_state"], fetched["tokens"])
+    return {
+        "status": "success",
+        "account_id": account_id,
+        "fetched": len(fetched["items"]),
+        "fetch_seconds": fetched["fetch_seconds"]
+    }
+
+
+@celery_app.task(name="persist_emails", **PIPELINE_TASK_OPTIONS)
+def persist_emails(self, account_id: str, items: list, sync_state: dict, tokens: Optional[dict] = None):
+    """Persist stage: store fetched emails, advance the account's sync cursor and keep refreshed tokens"""
+    email_ids = run_async(_run_stage(email_sync_service.persist_stage, account_id, items, sync_state, tokens))
+    if email_ids:
+        analyze_emails.delay(account_id, email_ids)
+    return {"status": "success", "account_id": account_id, "pending": len(email_ids)}
+
+
+@celery_app.task(name="analyze_emails", **PIPELINE_TASK_OPTIONS)
+def analyze_emails(self, account_id: str, email_ids: list):
+    """NLP stage: dates and priority"""
+    analyzed = run_async(_run_stage(email_sync_service.nlp_stage, email_ids))
+    extract_email_tasks.delay(account_id, email_ids)
+    return {"status": "success", "account_id": account_id, "analyzed": analyzed}
+
+
+@celery_app.task(name="extract_email_tasks", **PIPELINE_TASK_OPTIONS)
+def extract_email_tasks(self, account_id: str, email_ids: list):
+    """LLM stage: task extraction"""
+    extracted = run_async(_run_stage(email_sync_service.llm_stage, email_ids))
+    suggest_email_actions.delay(account_id)
+    return {"status": "success", "account_id": account_id, "extracted": extracted}
+
+
+@celery_app.task(name="suggest_email_actions", **PIPELINE_TASK_OPTIONS)
+def suggest_email_actions(self, account_id: str):
+    """Suggestion stage: follow-up action cards"""
+    added = run_async(_run_stage(email_sync_service.suggest_stage, account_id))
+    return {"status": "success", "account_id": account_id, "suggestions": added}
+
 
 @celery_app.task(name="sync_all_emails")
 def sync_all_emails():
@@ -60,10 +95,30 @@ def sync_all_emails():
             select(EmailAccount).where(EmailAccount.sync_enabled == True)
         )
         accounts = result.scalars().all()
-        
+
         for account in accounts:
             sync_email_account.delay(str(account.id))
-        
+
         return {"status": "success", "accounts_synced": len(accounts)}
     finally:
         db.close()
+
+
+@celery_app.task(name="schedule_email_syncs")
+def schedule_email_syncs():
+    """Beat tick: queue the accounts whose staggered sync time falls in this tick"""
+    window_start, window_end = tick_window(time.time(), settings.SYNC_SCHEDULER_TICK_SECONDS)
+    db = SessionLocal()
+    try:
+        result = db.execute(
+            select(EmailAccount.id, EmailAccount.sync_interval_seconds).where(EmailAccount.sync_enabled == True)
+        )
+        queued = 0
+        for account_id, interval in result.all():
+            if is_due(str(account_id), interval or settings.SYNC_INTERVAL_DEFAULT_SECONDS, window_start, window_end):
+                sync_email_account.delay(str(account_id))
+                queued += 1
+
+        return {"status": "success", "accounts_queued": queued}
+    finally:
+        db.close()
@@ -1,20 +1,24 @@
 """Reminder worker"""
 from app.workers.celery_app import celery_app
-from app.database import SessionLocal
+from app.workers.runtime import run_async
+from app.database import get_async_session_local
 from app.models.reminder import Reminder
 from app.services.notification_service import notification_service
 from sqlalchemy import select, and_
+from sqlalchemy.orm import selectinload
 from datetime import datetime
 
-@celery_app.task(name="check_and_send_reminders")
-def check_and_send_reminders():
-    """Check for due reminders and send notifications"""
-    db = SessionLocal()
-    try:
+
+async def _send_due_reminders() -> int:
+    """Create notifications for due reminders and mark them sent"""
+    session_factory = get_async_session_local()
+    async with session_factory() as db:
         now = datetime.now()
         
-        result = db.execute(
-            select(Reminder).where(
+        result = await db.execute(
+            select(Reminder)
+            .options(selectinload(Reminder.user))
+            .where(
                 and_(
                     Reminder.trigger_at <= now,
                     Reminder.is_sent == False
@@ -25,22 +29,29 @@ def check_and_send_reminders():
         
         sent_count = 0
         for reminder in reminders:
+            # Marked first so the notification's commit also records it as sent
+            reminder.is_sent = True
+            reminder.sent_at = now
+            
             # Create notification
-            notification_service.create_notification(
+            await notification_service.create_notification(
                 db,
                 reminder.user,
                 "reminder",
                 reminder.title,
                 reminder.message
             )
-            
-            reminder.is_sent = True
-            reminder.sent_at = now
             sent_count += 1
         
-        db.commit()
+        await db.commit()
+        return sent_count
+
+
+@celery_app.task(name="check_and_send_reminders")
+def check_and_send_reminders():
+    """Check for due reminders and send notifications"""
+    try:
+        sent_count = run_async(_send_due_reminders())
         return {"status": "success", "reminders_sent": sent_count}
     except Exception as e:
         return {"status": "error", "error": str(e)}
-    finally:
-        db.close()
@@ -0,0 +1,102 @@
+"""Async runtime for Celery worker processes
+
+Each worker process keeps one event loop running in a background thread.
+Tasks submit coroutines to it, so the async database engine, the shared LLM
+HTTP client and loop-bound primitives (semaphores, locks) are created once
+and reused across tasks instead of per task.
+"""
+import asyncio
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Awaitable, Optional
+import structlog
+
+logger = structlog.get_logger()
+
+
+class WorkerRuntime:
+    """Long-lived event loop owned by one worker process"""
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """Start the loop thread and open long-lived clients on it (idempotent)"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run_loop() -> None:
+                asyncio.set_event_loop(self._loop)
+                self._loop.call_soon(ready.set)
+                self._loop.run_forever()
+
+            self._thread = threading.Thread(target=run_loop, name="worker-event-loop", daemon=True)
+            self._thread.start()
+            ready.wait()
+
+        self.run(self._open_clients())
+        logger.info("Worker runtime started")
+
+    async def _open_clients(self) -> None:
+        from app.ai_engine.llm_client import llm_client
+        llm_client.open()
+
+    async def _close_clients(self) -> None:
+        from app.ai_engine.llm_client import llm_client
+        from app import database
+
+        await llm_client.aclose()
+        # Pooled asyncpg connections belong to this loop
+        if database._async_engine is not None:
+            await database._async_engine.dispose()
+            database._async_engine = None
+            database._AsyncSessionLocal = None
+
+    def run(self, coro: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the worker loop and wait for its result"""
+        if self._thread is None or not self._thread.is_alive():
+            # No worker_process_init (e.g. solo pool or eager tasks) - start on first use
+            self.start()
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("WorkerRuntime.run() called from the runtime's own loop")
+
+        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise TimeoutError("Worker coroutine timed out")
+        except BaseException:
+            # e.g. Celery's SoftTimeLimitExceeded raised while waiting
+            future.cancel()
+            raise
+
+    def shutdown(self) -> None:
+        """Close clients, then stop and join the loop thread"""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        try:
+            self.run(self._close_clients(), timeout=10)
+        except Exception as e:
+            logger.warning("Error closing worker clients", error=str(e))
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=10)
+        if not self._loop.is_running():
+            self._loop.close()
+        self._thread = None
+        self._loop = None
+        logger.info("Worker runtime stopped")
+
+
+# Global worker runtime instance (one per worker process)
+worker_runtime = WorkerRuntime()
+
+
+def run_async(coro: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+    """Run an async service call from a Celery task"""
+    return worker_runtime.run(coro, timeout)
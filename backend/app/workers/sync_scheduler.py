@@ -0,0 +1,68 @@
+"""Staggered, adaptive scheduling of periodic email syncs
+
+Each account syncs on its own grid: every `interval` seconds, shifted by a
+phase derived from a hash of its id, so accounts sharing an interval are
+spread across it instead of all firing at once. The interval follows an
+EWMA of the account's message arrival rate.
+"""
+import hashlib
+import math
+from datetime import datetime
+from typing import Optional, Tuple
+from app.config import settings
+
+
+def phase_offset(account_id: str, interval_seconds: float) -> float:
+    """Stable offset of an account's syncs within its interval"""
+    digest = hashlib.sha1(str(account_id).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") / 2 ** 64 * interval_seconds
+
+
+def is_due(account_id: str, interval_seconds: float, window_start: float, window_end: float) -> bool:
+    """Whether one of the account's sync times falls in (window_start, window_end]"""
+    phase = phase_offset(account_id, interval_seconds)
+    return math.floor((window_end - phase) / interval_seconds) > math.floor((window_start - phase) / interval_seconds)
+
+
+def tick_window(now: float, tick_seconds: float) -> Tuple[float, float]:
+    """The tick-aligned window a beat tick at `now` is responsible for
+
+    Aligning to the tick grid keeps consecutive windows adjacent even when
+    a beat tick fires or runs a little late.
+    """
+    window_end = math.floor(now / tick_seconds) * tick_seconds
+    return window_end - tick_seconds, window_end
+
+
+def update_rate(previous_rate: Optional[float], new_messages: int, elapsed_seconds: float) -> float:
+    """EWMA of the arrival rate in messages per hour"""
+    elapsed_hours = max(elapsed_seconds, settings.SYNC_SCHEDULER_TICK_SECONDS) / 3600
+    observed = new_messages / elapsed_hours
+    if previous_rate is None:
+        return observed
+    alpha = settings.SYNC_RATE_EWMA_ALPHA
+    return alpha * observed + (1 - alpha) * previous_rate
+
+
+def interval_for_rate(rate: Optional[float]) -> int:
+    """Sync interval that collects about SYNC_TARGET_MESSAGES_PER_SYNC new messages per sync"""
+    if rate is None:
+        return settings.SYNC_INTERVAL_DEFAULT_SECONDS
+    if rate <= 0:
+        return settings.SYNC_INTERVAL_MAX_SECONDS
+    interval = settings.SYNC_TARGET_MESSAGES_PER_SYNC / rate * 3600
+    interval = min(max(interval, settings.SYNC_INTERVAL_MIN_SECONDS), settings.SYNC_INTERVAL_MAX_SECONDS)
+    # Whole ticks, so each sync time lands in exactly one beat window
+    tick = settings.SYNC_SCHEDULER_TICK_SECONDS
+    return int(max(1, round(interval / tick)) * tick)
+
+
+def record_sync(account, new_messages: int, now: datetime) -> None:
+    """Update an account's arrival rate and interval after a sync (before last_sync_at is moved)"""
+    if account.last_sync_at is None:
+        return
+    elapsed_seconds = now.timestamp() - account.last_sync_at.timestamp()
+    if elapsed_seconds <= 0:
+        return
+    account.message_rate = update_rate(account.message_rate, new_messages, elapsed_seconds)
+    account.sync_interval_seconds = interval_for_rate(account.message_rate)
@@ -9,6 +9,8 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app.config import settings
 from app.models.task import Task
+from app.models.email import EMAIL_SEARCH_VECTOR_SQL
+from app.models.document import DOCUMENT_SEARCH_VECTOR_SQL
 from app.models.graph import Base as GraphBase
 from app.database import Base
 
@@ -60,6 +62,69 @@ async def migrate():
             else:
                 print(f"  - Note: Could not add goal_id FK (might already exist): {e}")
 
+        # 4. Incremental email sync state (provider delta cursors)
+        await conn.execute(text("ALTER TABLE email_accounts ADD COLUMN IF NOT EXISTS sync_state JSONB"))
+        print("  - Ensured column 'sync_state' on 'email_accounts'")
+
+        # 5. Adaptive periodic sync schedule
+        await conn.execute(text("ALTER TABLE email_accounts ADD COLUMN IF NOT EXISTS sync_interval_seconds INTEGER"))
+        await conn.execute(text("ALTER TABLE email_accounts ADD COLUMN IF NOT EXISTS message_rate FLOAT"))
+        print("  - Ensured columns 'sync_interval_seconds', 'message_rate' on 'email_accounts'")
+
+        # 6. Dedup emails per account instead of on the provider id alone
+        await conn.execute(text(
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_email_items_account_message "
+            "ON email_items (email_account_id, provider_message_id)"
+        ))
+        # The baseline model made provider_message_id unique through its index, not a table constraint
+        result = await conn.execute(text(
+            "SELECT i.indisunique FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = 'ix_email_items_provider_message_id'"
+        ))
+        if result.scalar() is True:
+            await conn.execute(text("DROP INDEX ix_email_items_provider_message_id"))
+            print("  - Dropped global unique index 'ix_email_items_provider_message_id'")
+        await conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_email_items_provider_message_id ON email_items (provider_message_id)"
+        ))
+        # Hand-made schemas may carry a UNIQUE constraint instead
+        await conn.execute(text("ALTER TABLE email_items DROP CONSTRAINT IF EXISTS email_items_provider_message_id_key"))
+        print("  - Ensured unique index on 'email_items' (email_account_id, provider_message_id)")
+
+        # 7. Listing indexes matching the keyset pagination order
+        await conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_tasks_user_priority_due "
+            "ON tasks (user_id, COALESCE(priority, 0) DESC, due_date ASC NULLS LAST, id)"
+        ))
+        await conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_notifications_user_created "
+            "ON notifications (user_id, created_at, id)"
+        ))
+        print("  - Ensured listing indexes on 'tasks' and 'notifications'")
+
+        # 8. Full-text search vectors plus trigram indexes for substring matches
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        for table, vector_sql in (("email_items", EMAIL_SEARCH_VECTOR_SQL), ("documents", DOCUMENT_SEARCH_VECTOR_SQL)):
+            await conn.execute(text(
+                f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+                f"GENERATED ALWAYS AS ({vector_sql}) STORED"
+            ))
+            await conn.execute(text(
+                f"CREATE INDEX IF NOT EXISTS ix_{table}_search_vector ON {table} USING gin (search_vector)"
+            ))
+        for table, column in (("email_items", "sender_email"), ("email_items", "sender_name"), ("documents", "file_name")):
+            await conn.execute(text(
+                f"CREATE INDEX IF NOT EXISTS ix_{table}_{column}_trgm ON {table} USING gin ({column} gin_trgm_ops)"
+            ))
+        print("  - Ensured search_vector columns and search indexes on 'email_items' and 'documents'")
+
+        # 9. Pipeline inserts stored missing AI fields as JSON 'null' instead of SQL NULL
+        for column in ("ai_extracted_tasks", "ai_extracted_dates"):
+            await conn.execute(text(
+                f"UPDATE email_items SET {column} = NULL WHERE {column} = 'null'::jsonb"
+            ))
+        print("  - Reset JSON 'null' AI fields on 'email_items' to SQL NULL")
+
     print("\nMigration complete! Your database is now ready for AI-LOS Advanced features.")
     await engine.dispose()
 
@@ -0,0 +1,344 @@
+"""Email sync service tests"""
+import asyncio
+import uuid
+from datetime import datetime, timezone
+import pytest
+from sqlalchemy.dialects import postgresql
+from app.config import settings
+from app.models.email import EmailAccount, EmailItem
+from app.services import email_sync_service as sync_module
+from app.services.email_sync_service import EmailSyncService
+
+
+class FakeResult:
+    """Minimal stand-in for an AsyncSession result"""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self.rows
+
+
+class FakeSession:
+    """Records executed statements and answers from a queue of results"""
+
+    def __init__(self, results):
+        self.results = list(results)
+        self.statements = []
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        return FakeResult(self.results.pop(0) if self.results else [])
+
+    async def commit(self):
+        pass
+
+
+def make_item(message_id, account_id=None):
+    """Unsaved email item"""
+    return EmailItem(
+        email_account_id=account_id or uuid.uuid4(),
+        provider_message_id=message_id,
+        subject="Subject",
+        received_at=datetime.now(timezone.utc),
+    )
+
+
+@pytest.mark.asyncio
+async def test_existence_check_is_one_query():
+    """Test stored and repeated message ids are dropped with a single SELECT"""
+    account_id = uuid.uuid4()
+    db = FakeSession([[(account_id, "m1")]])
+    items = [make_item(message_id, account_id) for message_id in ["m1", "m2", "m2", "m3"]]
+
+    new_items = await EmailSyncService()._filter_new_items(db, items)
+
+    assert [item.provider_message_id for item in new_items] == ["m2", "m3"]
+    assert len(db.statements) == 1
+
+
+@pytest.mark.asyncio
+async def test_dedup_is_scoped_to_the_account():
+    """Test the same provider id on another account is a new email"""
+    account_id, other_account_id = uuid.uuid4(), uuid.uuid4()
+    db = FakeSession([[(account_id, "1")]])
+    items = [make_item("1", account_id), make_item("1", other_account_id)]
+
+    new_items = await EmailSyncService()._filter_new_items(db, items)
+
+    assert [item.email_account_id for item in new_items] == [other_account_id]
+
+
+@pytest.mark.asyncio
+async def test_legacy_imap_ids_match_and_are_renamed():
+    """Test an IMAP row stored under its bare UID is not imported again and gets the new id"""
+    account_id = uuid.uuid4()
+    db = FakeSession([[(account_id, "42")]])
+    items = [make_item("7:42", account_id), make_item("7:43", account_id)]
+
+    new_items = await EmailSyncService()._filter_new_items(db, items)
+
+    assert [item.provider_message_id for item in new_items] == ["7:43"]
+    assert len(db.statements) == 2
+    rename = db.statements[1].compile(dialect=postgresql.dialect())
+    assert str(rename).startswith("UPDATE email_items")
+    assert sorted(rename.params.values(), key=str) == sorted([account_id, "42", "7:42"], key=str)
+
+
+@pytest.mark.asyncio
+async def test_seen_cache_skips_query_for_stored_ids():
+    """Test ids found stored once are filtered from the cache without another SELECT"""
+    service = EmailSyncService()
+    account_id = uuid.uuid4()
+    await service._filter_new_items(FakeSession([[(account_id, "m1"), (account_id, "m2")]]), [make_item("m1", account_id), make_item("m2", account_id)])
+
+    db = FakeSession([])
+    new_items = await service._filter_new_items(db, [make_item("m1", account_id), make_item("m2", account_id)])
+
+    assert new_items == []
+    assert db.statements == []
+
+
+@pytest.mark.asyncio
+async def test_bulk_insert_skips_conflicts():
+    """Test new rows go in with one INSERT ... ON CONFLICT DO NOTHING and only RETURNING rows count as stored"""
+    items = [make_item("m2"), make_item("m3")]
+    items[1].id = uuid.uuid4()
+    db = FakeSession([[(items[1].id,)]])
+
+    inserted = await EmailSyncService()._insert_new_items(db, items)
+
+    assert inserted == [items[1]]
+    assert len(db.statements) == 1
+    sql = str(db.statements[0].compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (email_account_id, provider_message_id) DO NOTHING" in sql
+    assert "RETURNING" in sql
+    params = db.statements[0].compile(dialect=postgresql.dialect()).params
+    assert params["is_read_m0"] is False
+    assert isinstance(params["id_m1"], uuid.UUID)
+
+
+@pytest.mark.asyncio
+async def test_bulk_insert_stores_missing_ai_fields_as_sql_null():
+    """Test unset JSONB columns are written as NULL, so the pipeline's IS NULL checks find them"""
+    db = FakeSession([])
+    item = make_item("m1")
+    item.ai_extracted_dates = {"dates": []}
+
+    await EmailSyncService()._insert_new_items(db, [item])
+
+    compiled = db.statements[0].compile(dialect=postgresql.dialect())
+    assert "ai_extracted_tasks_m0" not in compiled.params
+    assert compiled.params["ai_extracted_dates_m0"] == {"dates": []}
+    assert "NULL" in str(compiled)
+
+
+class SlowService:
+    """Provider service that returns one item after a delay"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.running = 0
+        self.max_running = 0
+
+    async def sync_emails(self, account, user):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.running -= 1
+        return [make_item(f"{account.email_address}-1")]
+
+
+@pytest.mark.asyncio
+async def test_fetch_respects_provider_limit_and_timeout(monkeypatch):
+    """Test account fetches share a per-provider semaphore and time out individually"""
+    monkeypatch.setattr(settings, "EMAIL_SYNC_CONCURRENCY", "imap:1")
+    monkeypatch.setattr(settings, "EMAIL_SYNC_ACCOUNT_TIMEOUT_SECONDS", 0.2)
+    service = EmailSyncService()
+    fast, slow = SlowService(0.01), SlowService(1)
+    monkeypatch.setattr(service, "_provider_service", lambda provider: slow if provider == "outlook" else fast)
+    accounts = [
+        EmailAccount(id=uuid.uuid4(), provider="imap", email_address=f"user{i}@example.com") for i in range(3)
+    ] + [EmailAccount(id=uuid.uuid4(), provider="outlook", email_address="slow@example.com")]
+
+    fetches = await asyncio.gather(*(service._fetch_account(account, None) for account in accounts))
+
+    assert fast.max_running == 1
+    assert [len(fetch["email_items"]) for fetch in fetches] == [1, 1, 1, 0]
+    assert fetches[3]["error"].startswith("Timed out")
+    assert fetches[3]["fetch_seconds"] < 1
+
+
+@pytest.mark.asyncio
+async def test_timed_out_fetch_cannot_move_cursor(monkeypatch):
+    """Test a fetch thread still running after the timeout only changes its own copy of the cursor"""
+    import time
+    monkeypatch.setattr(settings, "EMAIL_SYNC_ACCOUNT_TIMEOUT_SECONDS", 0.05)
+    service = EmailSyncService()
+    account = EmailAccount(id=uuid.uuid4(), provider="imap", email_address="me@example.com", sync_state={"uid": 1})
+    finished = []
+
+    class BlockingService:
+        def fetch(self, account):
+            time.sleep(0.2)
+            account.sync_state["uid"] = 2
+            finished.append(True)
+
+        async def sync_emails(self, account, user):
+            await asyncio.get_running_loop().run_in_executor(None, self.fetch, account)
+            return []
+
+    monkeypatch.setattr(service, "_provider_service", lambda provider: BlockingService())
+
+    fetch = await service._fetch_account(account, None)
+    while not finished:
+        await asyncio.sleep(0.05)
+
+    assert fetch["error"].startswith("Timed out")
+    assert account.sync_state == {"uid": 1}
+
+
+@pytest.mark.asyncio
+async def test_sync_user_stores_accounts_in_completion_order(monkeypatch):
+    """Test a slow account does not hold up storing a fast one, and durations are reported"""
+    service = EmailSyncService()
+    slow_account = EmailAccount(id=uuid.uuid4(), provider="imap", email_address="slow@example.com")
+    fast_account = EmailAccount(id=uuid.uuid4(), provider="gmail", email_address="fast@example.com")
+    services = {"imap": SlowService(0.1), "gmail": SlowService(0.01)}
+    monkeypatch.setattr(service, "_provider_service", lambda provider: services[provider])
+
+    async def filter_new(db, items):
+        return items
+
+    async def insert_new(db, items):
+        return items
+
+    async def process(items, provider, on_email_processed=None):
+        pass
+
+    async def no_suggestions(user_id, emails):
+        return []
+
+    events = []
+
+    async def publish(job_id, event, data=None):
+        events.append((event, data))
+
+    monkeypatch.setattr(service, "_filter_new_items", filter_new)
+    monkeypatch.setattr(service, "_insert_new_items", insert_new)
+    monkeypatch.setattr(sync_module.email_processing_service, "process_new_emails", process)
+    monkeypatch.setattr(sync_module.sync_progress, "publish", publish)
+    from app.services.action_service import action_engine
+    monkeypatch.setattr(action_engine, "suggest_follow_ups", no_suggestions)
+
+    class FakeUser:
+        id = uuid.uuid4()
+
+    result = await service.sync_user(FakeSession([[slow_account, fast_account]]), FakeUser(), job_id="job")
+
+    completed = [data["email_address"] for event, data in events if event == "account_completed"]
+    assert completed == ["fast@example.com", "slow@example.com"]
+    assert result["synced_count"] == 2
+    assert [account["email_address"] for account in result["accounts"]] == completed
+    assert all(account["duration_seconds"] >= account["fetch_seconds"] for account in result["accounts"])
+
+
+@pytest.mark.asyncio
+async def test_sync_user_indexes_only_inserted_rows(monkeypatch):
+    """Test items that hit ON CONFLICT are neither counted nor embedded"""
+    service = EmailSyncService()
+    account = EmailAccount(id=uuid.uuid4(), provider="gmail", email_address="me@example.com")
+
+    class TwoItemService:
+        async def sync_emails(self, account, user):
+            return [make_item("m1", account.id), make_item("m2", account.id)]
+
+    async def filter_new(db, items):
+        return items
+
+    async def insert_new(db, items):
+        # m1 was stored by a concurrent sync
+        return items[1:]
+
+    async def process(items, provider, on_email_processed=None):
+        pass
+
+    async def no_suggestions(user_id, emails):
+        return []
+
+    indexed = []
+
+    async def index_emails(user_id, items):
+        indexed.extend(item.provider_message_id for item in items)
+        return len(items)
+
+    monkeypatch.setattr(service, "_provider_service", lambda provider: TwoItemService())
+    monkeypatch.setattr(service, "_filter_new_items", filter_new)
+    monkeypatch.setattr(service, "_insert_new_items", insert_new)
+    monkeypatch.setattr(sync_module.email_processing_service, "process_new_emails", process)
+    monkeypatch.setattr(sync_module.semantic_search, "index_emails", index_emails)
+    from app.services.action_service import action_engine
+    monkeypatch.setattr(action_engine, "suggest_follow_ups", no_suggestions)
+
+    class FakeUser:
+        id = uuid.uuid4()
+
+    result = await service.sync_user(FakeSession([[account]]), FakeUser())
+
+    assert result["synced_count"] == 1
+    assert indexed == ["m2"]
+
+
+def test_pipeline_items_survive_json_round_trip():
+    """Test fetched items can be passed between pipeline stages as JSON"""
+    import json
+    service = EmailSyncService()
+    item = make_item("m1")
+    item.is_important = True
+
+    restored = service._deserialize_item(json.loads(json.dumps(service._serialize_item(item))))
+
+    assert restored.provider_message_id == "m1" and restored.is_important
+    assert restored.email_account_id == item.email_account_id
+    assert restored.received_at == item.received_at
+
+
+@pytest.mark.asyncio
+async def test_fetch_stage_leaves_cursor_to_persist_stage(monkeypatch):
+    """Test the fetch stage returns the advanced cursor and refreshed tokens without committing them"""
+    service = EmailSyncService()
+    account = EmailAccount(
+        id=uuid.uuid4(), user_id=uuid.uuid4(), provider="gmail", email_address="me@example.com", sync_enabled=True,
+        sync_state={"history_id": "1"}, access_token_encrypted="old-access", refresh_token_encrypted="refresh"
+    )
+
+    class CursorService:
+        async def sync_emails(self, account, user):
+            account.sync_state = {"history_id": "2"}
+            account.access_token_encrypted = "new-access"
+            return [make_item("m1", account.id), make_item("m2", account.id)]
+
+    class StageSession(FakeSession):
+        commits = 0
+
+        async def get(self, model, key):
+            return account if model is EmailAccount else object()
+
+        async def commit(self):
+            self.commits += 1
+
+    monkeypatch.setattr(service, "_provider_service", lambda provider: CursorService())
+    db = StageSession([[(account.id, "m1")]])
+
+    fetched = await service.fetch_stage(db, str(account.id))
+
+    assert [row["provider_message_id"] for row in fetched["items"]] == ["m2"]
+    assert fetched["sync_state"] == {"history_id": "2"}
+    assert fetched["tokens"] == {"access_token_encrypted": "new-access"}
+    assert db.commits == 0
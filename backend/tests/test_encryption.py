@@ -0,0 +1,36 @@
+"""Token encryption tests"""
+from cryptography.fernet import Fernet
+from app.config import settings
+from app.utils import encryption
+from app.utils.encryption import decrypt_token, derive_key, encrypt_token, rotate_token
+
+
+def test_key_is_derived_once_per_process():
+    """Test repeated encrypt/decrypt calls reuse the cached derived key"""
+    derive_key.cache_clear()
+
+    for _ in range(5):
+        assert decrypt_token(encrypt_token("secret-token")) == "secret-token"
+
+    assert derive_key.cache_info().misses == 1
+
+
+def test_ciphertext_format_is_unchanged():
+    """Test tokens are plain Fernet tokens under the PBKDF2-derived key"""
+    token = encrypt_token("secret-token")
+    assert Fernet(derive_key(settings.ENCRYPTION_KEY)).decrypt(token.encode()) == b"secret-token"
+
+
+def test_rotation_accepts_previous_keys(monkeypatch):
+    """Test tokens from a retired key still decrypt and can be rotated to the new primary"""
+    old_token = encrypt_token("secret-token")
+    old_key = settings.ENCRYPTION_KEY
+    monkeypatch.setattr(settings, "ENCRYPTION_KEY", "new-encryption-key-for-rotation-test")
+    monkeypatch.setattr(settings, "ENCRYPTION_KEYS", old_key)
+
+    assert decrypt_token(old_token) == "secret-token"
+    rotated = rotate_token(old_token)
+
+    monkeypatch.setattr(settings, "ENCRYPTION_KEYS", "")
+    assert decrypt_token(rotated) == "secret-token"
+    assert encryption.get_fernet() is encryption.get_fernet()
@@ -0,0 +1,217 @@
+"""Gmail sync tests"""
+import uuid
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+from app.models.email import EmailAccount
+from app.services import gmail_service as gmail_module
+from app.services.gmail_service import GmailService
+
+
+class Call:
+    """Deferred Gmail API call"""
+
+    def __init__(self, fn):
+        self.fn = fn
+
+    def execute(self):
+        return self.fn()
+
+
+class FakeBatch:
+    """Batch request that runs its calls on execute, like BatchHttpRequest"""
+
+    def __init__(self, gmail, callback):
+        self.gmail = gmail
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, request_id=None):
+        self.requests.append((request_id, request))
+
+    def execute(self):
+        self.gmail.batch_sizes.append(len(self.requests))
+        for request_id, request in self.requests:
+            try:
+                self.callback(request_id, request.execute(), None)
+            except HttpError as e:
+                self.callback(request_id, None, e)
+
+
+class FakeGmail:
+    """In-memory stand-in for the Gmail API resource"""
+
+    def __init__(self, history=None, history_expired=False, recent=None, flaky=(), broken=(), deleted=()):
+        self.history_pages = history or []
+        self.history_expired = history_expired
+        self.recent = recent or ["m1", "m2"]
+        self.flaky = set(flaky)
+        self.broken = set(broken)
+        self.deleted = set(deleted)
+        self.batch_sizes = []
+        self.calls = []
+
+    def new_batch_http_request(self, callback=None):
+        return FakeBatch(self, callback)
+
+    def users(self):
+        return self
+
+    def messages(self):
+        return self
+
+    def history(self):
+        return self
+
+    def getProfile(self, userId):
+        self.calls.append("getProfile")
+        return Call(lambda: {"historyId": "500"})
+
+    def list(self, userId, maxResults=None, startHistoryId=None, historyTypes=None, pageToken=None):
+        if startHistoryId is None:
+            self.calls.append("messages.list")
+            return Call(lambda: {"messages": [{"id": message_id} for message_id in self.recent]})
+
+        self.calls.append(f"history.list:{pageToken}")
+
+        def run():
+            if self.history_expired:
+                raise HttpError(httplib2.Response({"status": 404}), b"not found")
+            return self.history_pages[int(pageToken or 0)]
+        return Call(run)
+
+    def get(self, userId, id, format=None, fields=None):
+        self.calls.append(f"get:{id}")
+
+        def run():
+            if id in self.deleted:
+                raise HttpError(httplib2.Response({"status": 404}), b"not found")
+            if id in self.broken:
+                raise HttpError(httplib2.Response({"status": 429}), b"rate limited")
+            if id in self.flaky:
+                # Fail the first attempt only
+                self.flaky.discard(id)
+                raise HttpError(httplib2.Response({"status": 429}), b"rate limited")
+            return self.message(id)
+        return Call(run)
+
+    def message(self, id):
+        return {
+            "id": id,
+            "labelIds": ["UNREAD"],
+            "payload": {
+                "mimeType": "text/plain",
+                "headers": [{"name": "Subject", "value": f"Subject {id}"}, {"name": "From", "value": "A <a@example.com>"}],
+                "body": {},
+            },
+        }
+
+
+@pytest.fixture
+def gmail(monkeypatch):
+    """Gmail service with credentials stubbed and the API replaced by the given fake"""
+    service = GmailService()
+    monkeypatch.setattr(service, "_get_credentials", lambda account: object())
+
+    def use(fake):
+        monkeypatch.setattr(gmail_module, "build", lambda *args, **kwargs: fake)
+        return service
+    return use
+
+
+@pytest.mark.asyncio
+async def test_first_sync_lists_recent_and_stores_history_id(gmail):
+    """Test a full sync stores the mailbox history id"""
+    fake = FakeGmail()
+    account = EmailAccount(id=uuid.uuid4(), provider="gmail", email_address="me@example.com")
+
+    items = await gmail(fake).sync_emails(account, None)
+
+    assert [item.provider_message_id for item in items] == ["m1", "m2"]
+    assert account.sync_state == {"history_id": "500"}
+    assert fake.calls[0] == "getProfile"
+
+
+@pytest.mark.asyncio
+async def test_delta_sync_fetches_only_added_messages(gmail):
+    """Test history pages are followed and drafts and repeats are skipped"""
+    fake = FakeGmail(history=[
+        {"history": [{"messagesAdded": [{"message": {"id": "m3", "labelIds": ["INBOX"]}}]}], "nextPageToken": "1"},
+        {"history": [{"messagesAdded": [
+            {"message": {"id": "m3", "labelIds": ["INBOX"]}},
+            {"message": {"id": "d1", "labelIds": ["DRAFT"]}},
+            {"message": {"id": "m4", "labelIds": ["INBOX"]}},
+        ]}], "historyId": "620"},
+    ])
+    account = EmailAccount(id=uuid.uuid4(), provider="gmail", email_address="me@example.com", sync_state={"history_id": "500"})
+
+    items = await gmail(fake).sync_emails(account, None)
+
+    assert [item.provider_message_id for item in items] == ["m3", "m4"]
+    assert account.sync_state == {"history_id": "620"}
+    assert "messages.list" not in fake.calls
+
+
+@pytest.mark.asyncio
+async def test_expired_history_id_triggers_full_resync(gmail):
+    """Test a 404 from history.list falls back to listing recent messages"""
+    fake = FakeGmail(history_expired=True)
+    account = EmailAccount(id=uuid.uuid4(), provider="gmail", email_address="me@example.com", sync_state={"history_id": "1"})
+
+    items = await gmail(fake).sync_emails(account, None)
+
+    assert [item.provider_message_id for item in items] == ["m1", "m2"]
+    assert account.sync_state == {"history_id": "500"}
+
+
+@pytest.mark.asyncio
+async def test_messages_are_fetched_in_batches(gmail, monkeypatch):
+    """Test message gets are grouped into batch calls and failed items are retried"""
+    from app.config import settings
+    monkeypatch.setattr(settings, "GMAIL_BATCH_SIZE", 50)
+    monkeypatch.setattr(settings, "GMAIL_FULL_SYNC_MAX_RESULTS", 120)
+    recent = [f"m{i}" for i in range(120)]
+    fake = FakeGmail(recent=recent, flaky={"m7", "m99"})
+    account = EmailAccount(id=uuid.uuid4(), provider="gmail", email_address="me@example.com")
+
+    items = await gmail(fake).sync_emails(account, None)
+
+    assert [item.provider_message_id for item in items] == recent
+    assert fake.batch_sizes == [50, 50, 20, 2]
+
+
+@pytest.mark.asyncio
+async def test_unfetched_messages_keep_history_cursor(gmail):
+    """Test messages failing both batch attempts leave the history id where it was"""
+    fake = FakeGmail(
+        history=[{"history": [{"messagesAdded": [
+            {"message": {"id": "m3", "labelIds": ["INBOX"]}},
+            {"message": {"id": "m4", "labelIds": ["INBOX"]}},
+        ]}], "historyId": "620"}],
+        broken={"m4"},
+    )
+    account = EmailAccount(id=uuid.uuid4(), provider="gmail", email_address="me@example.com", sync_state={"history_id": "500"})
+
+    items = await gmail(fake).sync_emails(account, None)
+
+    assert [item.provider_message_id for item in items] == ["m3"]
+    assert account.sync_state == {"history_id": "500"}
+
+
+@pytest.mark.asyncio
+async def test_deleted_messages_do_not_hold_history_cursor(gmail):
+    """Test a message deleted before it could be fetched is skipped and the cursor still advances"""
+    fake = FakeGmail(
+        history=[{"history": [{"messagesAdded": [
+            {"message": {"id": "m3", "labelIds": ["INBOX"]}},
+            {"message": {"id": "m4", "labelIds": ["INBOX"]}},
+        ]}], "historyId": "620"}],
+        deleted={"m4"},
+    )
+    account = EmailAccount(id=uuid.uuid4(), provider="gmail", email_address="me@example.com", sync_state={"history_id": "500"})
+
+    items = await gmail(fake).sync_emails(account, None)
+
+    assert [item.provider_message_id for item in items] == ["m3"]
+    assert account.sync_state == {"history_id": "620"}
+    assert fake.calls.count("get:m4") == 1
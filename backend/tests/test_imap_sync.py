@@ -0,0 +1,177 @@
+"""IMAP sync tests"""
+import base64
+import uuid
+from datetime import datetime
+import pytest
+from imapclient.response_types import Address, BodyData, Envelope
+from app.models.email import EmailAccount
+from app.services import imap_service as imap_module
+from app.services.imap_service import IMAPService
+
+UIDVALIDITY = 7
+
+
+def envelope(uid):
+    """Envelope of a test message"""
+    return Envelope(
+        datetime(2026, 1, 5, 9, 0), f"Subject {uid}".encode(), (Address(b"Alice", None, b"alice", b"example.com"),),
+        None, None, None, None, None, None, f"<{uid}@example.com>".encode()
+    )
+
+
+def plain_structure():
+    """Single-part text/plain message"""
+    return BodyData((b"text", b"plain", (b"charset", b"utf-8"), None, None, b"7bit", 10, 1))
+
+
+def multipart_structure():
+    """multipart/mixed with an HTML alternative, a base64 text part and an attachment"""
+    alternative = BodyData.create((
+        (b"text", b"html", (b"charset", b"utf-8"), None, None, b"7bit", 20, 1),
+        (b"text", b"plain", (b"charset", b"utf-8"), None, None, b"base64", 20, 1),
+        b"alternative",
+    ))
+    return BodyData(([alternative, BodyData((b"application", b"pdf", None, None, None, b"base64", 9000))], b"mixed"))
+
+
+class FakeIMAPClient:
+    """Records commands against an INBOX of {uid: (structure, body part bytes, flags)}"""
+
+    def __init__(self, messages, capabilities=(b"CONDSTORE",), highestmodseq=100):
+        self.messages = messages
+        self.capabilities = capabilities
+        self.highestmodseq = highestmodseq
+        self.commands = []
+
+    def has_capability(self, capability):
+        return capability.encode() in self.capabilities
+
+    def noop(self):
+        self.commands.append("NOOP")
+
+    def logout(self):
+        self.commands.append("LOGOUT")
+
+    def folder_status(self, folder, what):
+        self.commands.append("STATUS")
+        status = {b"UIDVALIDITY": UIDVALIDITY, b"UIDNEXT": max(self.messages, default=0) + 1}
+        if b"HIGHESTMODSEQ" in what:
+            status[b"HIGHESTMODSEQ"] = self.highestmodseq
+        return status
+
+    def select_folder(self, folder, readonly=False):
+        assert readonly
+        self.commands.append("SELECT")
+
+    def search(self, criteria):
+        self.commands.append(("SEARCH", criteria[0]))
+        uids = sorted(self.messages)
+        if criteria[0] == "UID":
+            start = int(criteria[1].split(":")[0])
+            # Like a real server, "n:*" matches the highest UID even when it is below n
+            return [uid for uid in uids if uid >= start] or uids[-1:]
+        return uids
+
+    def fetch(self, uids, data):
+        self.commands.append(("FETCH", tuple(uids), data[0]))
+        response = {}
+        for uid in uids:
+            structure, body, flags = self.messages[uid]
+            if data[0].startswith("BODY.PEEK["):
+                section = data[0][len("BODY.PEEK["):data[0].index("]")]
+                response[uid] = {f"BODY[{section}]<0>".encode(): body}
+            else:
+                response[uid] = {
+                    b"ENVELOPE": envelope(uid),
+                    b"BODYSTRUCTURE": structure,
+                    b"FLAGS": flags,
+                    b"INTERNALDATE": datetime(2026, 1, 5, 9, 0),
+                }
+        return response
+
+
+@pytest.fixture
+def imap(monkeypatch):
+    """IMAP service whose connections go to the given fake client"""
+    monkeypatch.setattr(imap_module, "decrypt_token", lambda value: "password")
+    service = IMAPService()
+    connects = []
+
+    def use(client):
+        def connect(account, password):
+            connects.append(account.email_address)
+            return client
+        monkeypatch.setattr(service, "_connect", connect)
+        return service, connects
+    return use
+
+
+@pytest.mark.asyncio
+async def test_initial_sync_fetches_only_text_parts(imap):
+    """Test the first sync prefetches structure and downloads just the text/plain section"""
+    client = FakeIMAPClient({
+        3: (plain_structure(), b"Plain body 3", (b"\\Seen",)),
+        4: (multipart_structure(), base64.b64encode(b"Encoded body 4"), (b"\\Flagged",)),
+    })
+    service, _ = imap(client)
+    account = EmailAccount(id=uuid.uuid4(), provider="imap", email_address="me@example.com")
+
+    items = await service.sync_emails(account, None)
+
+    assert [item.provider_message_id for item in items] == [f"{UIDVALIDITY}:3", f"{UIDVALIDITY}:4"]
+    assert items[0].body_text == "Plain body 3" and items[0].is_read and not items[0].is_important
+    assert items[1].body_text == "Encoded body 4" and items[1].is_important
+    assert items[0].sender_email == "alice@example.com" and items[0].subject == "Subject 3"
+    body_fetches = sorted(command[2] for command in client.commands if command[0] == "FETCH" and "PEEK" in command[2])
+    assert body_fetches == ["BODY.PEEK[1.2]<0.65536>", "BODY.PEEK[1]<0.65536>"]
+    assert account.sync_state == {"uidvalidity": UIDVALIDITY, "uidnext": 5, "highestmodseq": 100, "last_uid": 4}
+
+
+@pytest.mark.asyncio
+async def test_unchanged_mailbox_skips_select_and_reuses_connection(imap):
+    """Test an unchanged UIDNEXT/HIGHESTMODSEQ ends the sync after STATUS on the pooled connection"""
+    client = FakeIMAPClient({3: (plain_structure(), b"Plain body 3", ())})
+    service, connects = imap(client)
+    account = EmailAccount(id=uuid.uuid4(), provider="imap", email_address="me@example.com")
+    await service.sync_emails(account, None)
+    client.commands.clear()
+
+    items = await service.sync_emails(account, None)
+
+    assert items == []
+    assert client.commands == ["NOOP", "STATUS"]
+    assert connects == ["me@example.com"]
+
+
+@pytest.mark.asyncio
+async def test_incremental_sync_fetches_uids_above_watermark(imap):
+    """Test only UIDs above the stored last_uid are fetched"""
+    client = FakeIMAPClient({5: (plain_structure(), b"New body 5", ())})
+    service, _ = imap(client)
+    account = EmailAccount(
+        id=uuid.uuid4(), provider="imap", email_address="me@example.com",
+        sync_state={"uidvalidity": UIDVALIDITY, "uidnext": 4, "highestmodseq": 90, "last_uid": 3}
+    )
+
+    items = await service.sync_emails(account, None)
+
+    assert [item.provider_message_id for item in items] == [f"{UIDVALIDITY}:5"]
+    assert ("SEARCH", "UID") in client.commands
+    assert account.sync_state["last_uid"] == 5
+
+
+@pytest.mark.asyncio
+async def test_uidvalidity_change_runs_full_resync(imap):
+    """Test a new UIDVALIDITY discards the watermark and searches the initial window"""
+    client = FakeIMAPClient({2: (plain_structure(), b"Body 2", ())}, capabilities=())
+    service, _ = imap(client)
+    account = EmailAccount(
+        id=uuid.uuid4(), provider="imap", email_address="me@example.com",
+        sync_state={"uidvalidity": 1, "uidnext": 40, "highestmodseq": None, "last_uid": 39}
+    )
+
+    items = await service.sync_emails(account, None)
+
+    assert [item.provider_message_id for item in items] == [f"{UIDVALIDITY}:2"]
+    assert ("SEARCH", "SINCE") in client.commands
+    assert account.sync_state == {"uidvalidity": UIDVALIDITY, "uidnext": 3, "highestmodseq": None, "last_uid": 2}
@@ -0,0 +1,83 @@
+"""Task and notification listing tests"""
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+import pytest
+from sqlalchemy.dialects import postgresql
+from app.services.notification_service import notification_service
+from app.services.task_service import task_service
+
+
+class ListingSession:
+    """Answers a count query then a page query, recording the compiled SQL"""
+
+    def __init__(self, counts, rows):
+        self.results = [
+            SimpleNamespace(scalar_one=lambda: counts[0], one=lambda: counts),
+            SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: rows)),
+        ]
+        self.statements = []
+
+    async def execute(self, statement):
+        self.statements.append(str(statement.compile(dialect=postgresql.dialect())))
+        return self.results[len(self.statements) - 1]
+
+
+def make_tasks(count):
+    due = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return [SimpleNamespace(id=uuid.uuid4(), priority=50, due_date=due) for _ in range(count)]
+
+
+@pytest.mark.asyncio
+async def test_task_total_is_a_count_query():
+    """Test the total comes from count(*) and one extra row decides next_cursor"""
+    user = SimpleNamespace(id=uuid.uuid4())
+    db = ListingSession((42,), make_tasks(3))
+
+    tasks, total, next_cursor = await task_service.list_tasks(db, user, status="pending", page_size=2)
+
+    assert total == 42
+    assert len(tasks) == 2 and next_cursor is not None
+    assert "count(*)" in db.statements[0] and "tasks.title" not in db.statements[0]
+    assert "LIMIT" in db.statements[1]
+
+
+@pytest.mark.asyncio
+async def test_task_cursor_replaces_offset():
+    """Test a cursor page filters on the sort key instead of skipping rows"""
+    user = SimpleNamespace(id=uuid.uuid4())
+    _, _, next_cursor = await task_service.list_tasks(ListingSession((3,), make_tasks(3)), user, page_size=2)
+
+    db = ListingSession((3,), make_tasks(1))
+    tasks, _, last_cursor = await task_service.list_tasks(db, user, page=9, page_size=2, cursor=next_cursor)
+
+    assert len(tasks) == 1 and last_cursor is None
+    assert "OFFSET" not in db.statements[1]
+    assert "tasks.due_date IS NULL" in db.statements[1]
+
+    with pytest.raises(ValueError):
+        await task_service.list_tasks(ListingSession((3,), []), user, cursor="not-a-cursor")
+
+
+@pytest.mark.asyncio
+async def test_notification_counts_share_one_aggregate():
+    """Test total and unread come from a single filtered count and paging is keyset on (created_at, id)"""
+    user = SimpleNamespace(id=uuid.uuid4())
+    rows = [
+        SimpleNamespace(id=uuid.uuid4(), created_at=datetime(2026, 1, day, tzinfo=timezone.utc))
+        for day in (3, 2, 1)
+    ]
+    db = ListingSession((10, 4), rows)
+
+    notifications, total, unread_count, next_cursor = await notification_service.list_notifications(
+        db, user, unread_only=True, page_size=2
+    )
+
+    assert (total, unread_count) == (4, 4)
+    assert len(notifications) == 2
+    assert "FILTER (WHERE" in db.statements[0]
+
+    db = ListingSession((10, 4), rows[2:])
+    await notification_service.list_notifications(db, user, page_size=2, cursor=next_cursor)
+    assert "(notifications.created_at, notifications.id) <" in db.statements[1]
+    assert "OFFSET" not in db.statements[1]
@@ -0,0 +1,51 @@
+"""LLM response cache tests"""
+import pytest
+from app.ai_engine.llm_cache import LRUResponseCache, LLMResponseCache, make_cache_key
+
+
+def test_cache_key_covers_generation_inputs():
+    """Test key changes with any input that affects the response"""
+    base = make_cache_key("prompt", "system", "ollama:llama3", 0.3, "json")
+    assert base == make_cache_key("prompt", "system", "ollama:llama3", 0.3, "json")
+    assert base != make_cache_key("prompt", "system", "ollama:llama3", 0.7, "json")
+    assert base != make_cache_key("prompt", None, "ollama:llama3", 0.3, "json")
+    assert base != make_cache_key("prompt", "system", "ollama:mistral", 0.3, "json")
+    assert base != make_cache_key("prompt", "system", "ollama:llama3", 0.3, None)
+
+
+def test_lru_evicts_least_recently_used():
+    """Test size limit evicts the oldest untouched entry"""
+    cache = LRUResponseCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    cache.get("a")
+    cache.set("c", "3")
+    assert cache.get("a") == "1"
+    assert cache.get("b") is None
+    assert cache.evictions == 1
+
+
+def test_lru_expires_entries():
+    """Test TTL expiry"""
+    now = [0.0]
+    cache = LRUResponseCache(max_entries=10, ttl_seconds=5, clock=lambda: now[0])
+    cache.set("a", "1")
+    now[0] = 4.9
+    assert cache.get("a") == "1"
+    now[0] = 5.0
+    assert cache.get("a") is None
+
+
+@pytest.mark.asyncio
+async def test_response_cache_counts_hits_and_misses():
+    """Test hit/miss counters on the memory tier"""
+    cache = LLMResponseCache()
+    cache.enabled = True
+    assert await cache.get("key") is None
+    await cache.set("key", "value")
+    assert await cache.get("key") == "value"
+
+    stats = cache.stats()
+    assert stats["misses"] == 1
+    assert stats["memory_hits"] == 1
+    assert stats["stores"] == 1
@@ -0,0 +1,100 @@
+"""LLM health monitor tests"""
+import pytest
+from app.ai_engine.llm_health import CircuitBreaker, LLMHealthMonitor
+
+
+class FakeClock:
+    """Manually advanced monotonic clock"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_breaker_opens_after_threshold():
+    """Test breaker opens after N consecutive failures"""
+    breaker = CircuitBreaker("ollama", failure_threshold=3, reset_timeout=60, clock=FakeClock())
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.is_available()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+
+
+def test_breaker_half_open_allows_single_trial():
+    """Test half-open state lets one trial through and closes on success"""
+    clock = FakeClock()
+    breaker = CircuitBreaker("gemini", failure_threshold=1, reset_timeout=30, clock=clock)
+    breaker.record_failure()
+    assert not breaker.is_available()
+
+    clock.now = 31
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow_request()
+
+
+def test_breaker_reopens_on_failed_trial():
+    """Test a failed half-open trial reopens the breaker"""
+    clock = FakeClock()
+    breaker = CircuitBreaker("gemini", failure_threshold=2, reset_timeout=30, clock=clock)
+    breaker.record_failure()
+    breaker.record_failure()
+    clock.now = 30
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+
+def test_unresolved_trial_expires():
+    """Test a trial that never reports back reopens the breaker instead of blocking it for good"""
+    clock = FakeClock()
+    breaker = CircuitBreaker("ollama", failure_threshold=1, reset_timeout=30, clock=clock)
+    breaker.record_failure()
+    clock.now = 30
+    assert breaker.allow_request()
+
+    clock.now = 59
+    assert not breaker.is_available()
+    clock.now = 60
+    assert breaker.state == CircuitBreaker.OPEN
+    clock.now = 90
+    assert breaker.allow_request()
+
+
+def test_released_trial_can_be_retried():
+    """Test a trial handed back without a health signal frees the half-open slot"""
+    clock = FakeClock()
+    breaker = CircuitBreaker("ollama", failure_threshold=1, reset_timeout=30, clock=clock)
+    breaker.record_failure()
+    clock.now = 30
+    assert breaker.allow_request()
+    breaker.release_trial()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
+
+@pytest.mark.asyncio
+async def test_monitor_probe_updates_availability():
+    """Test probes feed the per-backend breakers"""
+    async def healthy():
+        return True
+
+    async def down():
+        raise ConnectionError("refused")
+
+    monitor = LLMHealthMonitor({"gemini": down, "ollama": healthy})
+    for _ in range(monitor.breakers["gemini"].failure_threshold):
+        await monitor.probe("gemini")
+    await monitor.probe("ollama")
+
+    assert not monitor.is_available("gemini")
+    assert monitor.is_available("ollama")
+    assert monitor.is_available()
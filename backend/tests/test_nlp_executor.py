@@ -0,0 +1,29 @@
+"""NLP executor tests"""
+import pytest
+from app.config import settings
+from app.ai_engine.nlp_executor import NLPExecutor
+
+
+@pytest.mark.asyncio
+async def test_thread_mode_when_pool_disabled(monkeypatch):
+    """Test extraction still runs when the process pool is disabled"""
+    monkeypatch.setattr(settings, "NLP_PROCESS_POOL_SIZE", 0)
+    executor = NLPExecutor()
+
+    dates = await executor.parse_dates("Submit the form by 12/31/2030.")
+
+    assert executor._pool is None
+    assert dates and dates[0]["parsed"].startswith("2030-12-31")
+
+
+@pytest.mark.asyncio
+async def test_process_pool_returns_results(monkeypatch):
+    """Test extraction results come back from a worker process"""
+    monkeypatch.setattr(settings, "NLP_PROCESS_POOL_SIZE", 1)
+    executor = NLPExecutor()
+    try:
+        dates = await executor.parse_dates("Submit the form by 12/31/2030.")
+        assert executor._pool is not None
+        assert dates and dates[0]["parsed"].startswith("2030-12-31")
+    finally:
+        executor.shutdown()
@@ -0,0 +1,47 @@
+"""NLP extractor tests"""
+import spacy
+from app.ai_engine.nlp_extractor import NLPExtractor
+
+TEXT = "Please pay the invoice of $120.50 by 12/31/2030. Thanks for your help."
+
+
+class CountingPipeline:
+    """Wraps a spaCy pipeline and counts parses"""
+
+    def __init__(self):
+        self.inner = spacy.blank("en")
+        self.inner.add_pipe("sentencizer")
+        self.calls = 0
+
+    def __call__(self, text):
+        self.calls += 1
+        return self.inner(text)
+
+    def pipe(self, texts, batch_size=32):
+        texts = list(texts)
+        self.calls += len(texts)
+        return self.inner.pipe(texts, batch_size=batch_size)
+
+
+def test_analyze_parses_once():
+    """Test analyze reuses one Doc and matches the individual extractors"""
+    extractor = NLPExtractor()
+    extractor._nlp = CountingPipeline()
+
+    analysis = extractor.analyze(TEXT)
+
+    assert extractor._nlp.calls == 1
+    assert analysis["dates"] == extractor.extract_dates(TEXT)
+    assert analysis["amounts"] == extractor.extract_amounts(TEXT)
+    assert analysis["entities"] == extractor.extract_entities(TEXT)
+    assert analysis["action_items"] == extractor.extract_action_items(TEXT)
+    assert [d["text"] for d in analysis["dates"]] == ["12/31/2030"]
+
+
+def test_analyze_many_matches_analyze():
+    """Test the nlp.pipe batch variant returns the same results in order"""
+    extractor = NLPExtractor()
+    extractor._nlp = CountingPipeline()
+    texts = [TEXT, "Meeting moved to 3 Mar 2031.", ""]
+
+    assert extractor.analyze_many(texts) == [extractor.analyze(text) for text in texts]
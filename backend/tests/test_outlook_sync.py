@@ -0,0 +1,96 @@
+"""Outlook sync tests"""
+import uuid
+import httpx
+import pytest
+from app.models.email import EmailAccount
+from app.services import outlook_service as outlook_module
+from app.services.outlook_service import OutlookService, DELTA_URL
+
+NEXT_LINK = f"{DELTA_URL}?$skiptoken=page2"
+DELTA_LINK = f"{DELTA_URL}?$deltatoken=abc"
+
+
+def graph_message(message_id):
+    """Graph message with the selected fields"""
+    return {
+        "id": message_id,
+        "subject": f"Subject {message_id}",
+        "from": {"emailAddress": {"address": "a@example.com", "name": "A"}},
+        "body": {"contentType": "text", "content": f"Body {message_id}"},
+        "receivedDateTime": "2026-01-05T09:00:00Z",
+        "isRead": False,
+        "flag": {"flagStatus": "flagged"},
+    }
+
+
+@pytest.fixture
+def outlook(monkeypatch):
+    """Outlook service whose Graph calls go to the given handler"""
+    service = OutlookService()
+    monkeypatch.setattr(service, "_get_access_token", lambda account: "token")
+
+    def use(handler):
+        requests = []
+
+        def record(request):
+            requests.append(request)
+            return handler(request)
+        monkeypatch.setattr(service, "_client", lambda: httpx.AsyncClient(transport=httpx.MockTransport(record)))
+        return service, requests
+    return use
+
+
+@pytest.mark.asyncio
+async def test_initial_delta_follows_paging_and_stores_delta_link(outlook):
+    """Test the first sync pages through the delta round and keeps the delta link"""
+    def handler(request):
+        if "skiptoken" in str(request.url):
+            return httpx.Response(200, json={"value": [graph_message("m2"), {"id": "gone", "@removed": {}}], "@odata.deltaLink": DELTA_LINK})
+        return httpx.Response(200, json={"value": [graph_message("m1")], "@odata.nextLink": NEXT_LINK})
+
+    service, requests = outlook(handler)
+    account = EmailAccount(id=uuid.uuid4(), provider="outlook", email_address="me@example.com")
+
+    items = await service.sync_emails(account, None)
+
+    assert [item.provider_message_id for item in items] == ["m1", "m2"]
+    assert items[0].body_text == "Body m1" and items[0].is_important
+    assert account.sync_state == {"delta_link": DELTA_LINK}
+    assert "%24select=" in str(requests[0].url) and "receivedDateTime" in requests[0].url.params["$filter"]
+    assert 'outlook.body-content-type="text"' in requests[0].headers["Prefer"]
+
+
+@pytest.mark.asyncio
+async def test_expired_delta_link_restarts(outlook):
+    """Test a 410 on the stored link falls back to a fresh delta round"""
+    def handler(request):
+        if "deltatoken=old" in str(request.url):
+            return httpx.Response(410, json={"error": {"code": "SyncStateNotFound"}})
+        return httpx.Response(200, json={"value": [graph_message("m3")], "@odata.deltaLink": DELTA_LINK})
+
+    service, requests = outlook(handler)
+    account = EmailAccount(
+        id=uuid.uuid4(), provider="outlook", email_address="me@example.com",
+        sync_state={"delta_link": f"{DELTA_URL}?$deltatoken=old"}
+    )
+
+    items = await service.sync_emails(account, None)
+
+    assert [item.provider_message_id for item in items] == ["m3"]
+    assert account.sync_state == {"delta_link": DELTA_LINK}
+    assert len(requests) == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_page_keeps_stored_cursor(outlook):
+    """Test a page failing mid-round leaves the stored delta link where it was"""
+    def handler(request):
+        if "skiptoken" in str(request.url):
+            raise httpx.ConnectError("connection reset")
+        return httpx.Response(200, json={"value": [graph_message("m1")], "@odata.nextLink": NEXT_LINK})
+
+    service, _ = outlook(handler)
+    account = EmailAccount(id=uuid.uuid4(), provider="outlook", email_address="me@example.com", sync_state={"delta_link": DELTA_LINK})
+
+    assert await service.sync_emails(account, None) == []
+    assert account.sync_state == {"delta_link": DELTA_LINK}
@@ -0,0 +1,58 @@
+"""Prompt budget tests"""
+from app.ai_engine.prompt_budget import PromptBudget, OMISSION_MARKER
+
+
+def test_count_tokens_is_model_aware(monkeypatch):
+    """Test token counts depend on the backend's model family"""
+    from app.config import settings
+    budget = PromptBudget()
+    text = "payments " * 10
+
+    monkeypatch.setattr(settings, "OLLAMA_MODEL", "llama3:8b")
+    llama3_tokens = budget.count_tokens(text, "ollama")
+    monkeypatch.setattr(settings, "OLLAMA_MODEL", "mistral:7b")
+    mistral_tokens = budget.count_tokens(text, "ollama")
+
+    assert budget.count_tokens("") == 0
+    assert budget.count_tokens("Pay the bill.") == 4
+    assert mistral_tokens > llama3_tokens
+
+
+def test_short_text_is_unchanged():
+    """Test text within budget is passed through"""
+    budget = PromptBudget()
+    fitted = budget.fit_text("Please call the bank.", 100)
+
+    assert fitted["text"] == "Please call the bank."
+    assert fitted["truncated"] is False
+
+
+def test_fit_keeps_deadline_at_the_bottom():
+    """Test a date near the end survives truncation while filler is dropped"""
+    budget = PromptBudget()
+    filler = " ".join(f"This is filler sentence number {i} about nothing." for i in range(200))
+    text = f"Hi team, quick update on the renewal.\n{filler}\nThe invoice of $450 must be paid by 12/31/2030."
+
+    fitted = budget.fit_text(text, 60)
+
+    assert fitted["truncated"] is True
+    assert fitted["tokens"] <= 60
+    assert fitted["original_tokens"] > 60
+    assert "12/31/2030" in fitted["text"]
+    assert fitted["text"].startswith("Hi team")
+    assert OMISSION_MARKER in fitted["text"]
+
+
+def test_quoted_reply_is_dropped_first():
+    """Test quoted history is cut at the reply boundary"""
+    budget = PromptBudget()
+    body, quoted = budget.split_quoted_reply(
+        "Sounds good, see you then.\n\nOn Mon, Jan 5, 2026 at 9:00 AM Alice <a@example.com> wrote:\n> Lunch on Friday?\n"
+    )
+
+    assert body.strip() == "Sounds good, see you then."
+    assert quoted.startswith("On Mon")
+
+    text = "Sounds good, see you then. " * 5 + "\n> " + "old thread text " * 100
+    fitted = budget.fit_text(text, 60)
+    assert "old thread" not in fitted["text"]
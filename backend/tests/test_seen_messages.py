@@ -0,0 +1,19 @@
+"""Seen message cache tests"""
+import pytest
+from app.services.seen_messages import SeenMessageCache
+
+
+@pytest.mark.asyncio
+async def test_cache_is_bounded_per_account_and_by_accounts():
+    """Test the oldest ids and least recently used accounts are evicted"""
+    cache = SeenMessageCache()
+    cache.max_per_account = 3
+    cache.max_accounts = 2
+
+    await cache.add("a", ["1", "2", "3", "4"])
+    assert await cache.filter_unseen("a", ["1", "2", "4"]) == ["1"]
+
+    await cache.add("b", ["x"])
+    await cache.add("c", ["y"])
+    assert await cache.filter_unseen("a", ["4"]) == ["4"]
+    assert await cache.filter_unseen("c", ["y", "z"]) == ["z"]
@@ -0,0 +1,67 @@
+"""Sync progress broker tests"""
+import asyncio
+import pytest
+from app.services.sync_progress import SyncProgressBroker
+
+
+@pytest.fixture
+def broker():
+    """Broker without the Redis mirror"""
+    broker = SyncProgressBroker()
+    broker._redis_disabled = True
+    return broker
+
+
+@pytest.mark.asyncio
+async def test_stream_follows_job_until_completed(broker):
+    """Test events published while streaming are delivered in order"""
+    job_id = await broker.create_job("user-1")
+
+    async def run_job():
+        await broker.publish(job_id, "started", {"accounts": 1})
+        await asyncio.sleep(0)
+        await broker.publish(job_id, "account_completed", {"new": 3})
+        await broker.publish(job_id, "completed", {"synced_count": 3})
+
+    job = asyncio.create_task(run_job())
+    events = [entry async for entry in broker.stream(job_id)]
+    await job
+
+    assert [entry["event"] for entry in events] == ["started", "account_completed", "completed"]
+    assert [entry["id"] for entry in events] == [1, 2, 3]
+    assert (await broker.get_status(job_id))["status"] == "completed"
+
+
+@pytest.mark.asyncio
+async def test_stream_resumes_after_last_event_id(broker):
+    """Test reconnecting with Last-Event-ID skips delivered events"""
+    job_id = await broker.create_job("user-1")
+    await broker.publish(job_id, "started")
+    await broker.publish(job_id, "account_started")
+    await broker.publish(job_id, "failed", {"error": "boom"})
+
+    events = [entry async for entry in broker.stream(job_id, after=2)]
+
+    assert [entry["event"] for entry in events] == ["failed"]
+    assert await broker.get_owner(job_id) == "user-1"
+    assert await broker.get_owner("unknown") is None
+
+
+@pytest.mark.asyncio
+async def test_running_job_outlives_ttl_while_reporting(broker, monkeypatch):
+    """Test expiry counts from the last event, not from when the job started"""
+    from app.config import settings
+    from app.services import sync_progress
+    now = [1000.0]
+    monkeypatch.setattr(sync_progress.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(settings, "SYNC_JOB_TTL_SECONDS", 60)
+    running = await broker.create_job("user-1")
+    idle = await broker.create_job("user-2")
+
+    now[0] += 50
+    await broker.publish(running, "account_started")
+    now[0] += 20
+    await broker.create_job("user-3")
+
+    assert await broker.get_owner(running) == "user-1"
+    assert await broker.get_owner(idle) is None
@@ -0,0 +1,66 @@
+"""Periodic sync scheduler tests"""
+import uuid
+from datetime import datetime, timedelta, timezone
+from app.config import settings
+from app.models.email import EmailAccount
+from app.workers.sync_scheduler import interval_for_rate, is_due, phase_offset, record_sync, tick_window, update_rate
+
+
+def test_each_account_is_due_once_per_interval():
+    """Test consecutive tick windows queue every account exactly once per interval"""
+    account_ids = [str(uuid.uuid4()) for _ in range(200)]
+    interval, tick = 900, 60
+    due_counts = {account_id: 0 for account_id in account_ids}
+    per_tick = []
+    for window_end in range(60, interval + 60, tick):
+        due = [account_id for account_id in account_ids if is_due(account_id, interval, window_end - tick, window_end)]
+        per_tick.append(len(due))
+        for account_id in due:
+            due_counts[account_id] += 1
+
+    assert set(due_counts.values()) == {1}
+    # Spread over the interval rather than all at once (expected ~13 per tick)
+    assert max(per_tick) < 40
+
+
+def test_phase_is_stable_and_within_interval():
+    """Test the phase is a deterministic offset inside the interval"""
+    account_id = str(uuid.uuid4())
+    assert phase_offset(account_id, 900) == phase_offset(account_id, 900)
+    assert 0 <= phase_offset(account_id, 900) < 900
+
+
+def test_tick_window_is_aligned():
+    """Test ticks that run late still cover adjacent grid windows"""
+    assert tick_window(6_030.5, 60) == (5_940, 6_000)
+    assert tick_window(6_001.0, 60) == (5_940, 6_000)
+    assert tick_window(6_059.9, 60) == (5_940, 6_000)
+
+
+def test_interval_adapts_to_arrival_rate():
+    """Test busy inboxes sync more often and dormant ones back off to the maximum"""
+    assert interval_for_rate(None) == settings.SYNC_INTERVAL_DEFAULT_SECONDS
+    assert interval_for_rate(0) == settings.SYNC_INTERVAL_MAX_SECONDS
+    assert interval_for_rate(1000) == settings.SYNC_INTERVAL_MIN_SECONDS
+    busy, quiet = interval_for_rate(30), interval_for_rate(3)
+    assert busy < quiet
+    assert busy % settings.SYNC_SCHEDULER_TICK_SECONDS == 0
+
+
+def test_rate_is_smoothed_with_ewma():
+    """Test one quiet sync only partly lowers an established rate"""
+    rate = update_rate(None, 10, 3600)
+    assert rate == 10
+    rate = update_rate(rate, 0, 3600)
+    assert 0 < rate < 10
+
+
+def test_record_sync_updates_account_schedule():
+    """Test a sync updates the account's rate and interval from the time since the last sync"""
+    now = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+    account = EmailAccount(id=uuid.uuid4(), last_sync_at=now - timedelta(hours=2))
+
+    record_sync(account, 20, now)
+
+    assert account.message_rate == 10
+    assert account.sync_interval_seconds == interval_for_rate(10)
@@ -0,0 +1,173 @@
+"""Task generator tests"""
+import json
+import pytest
+from app.ai_engine.task_generator import TaskGenerator, IncrementalJSONArrayParser, BATCH_SYSTEM_PROMPT
+from app.ai_engine.prompt_budget import prompt_budget
+from app.ai_engine.llm_client import llm_client
+from app.config import settings
+
+
+@pytest.fixture
+def generator(monkeypatch):
+    """Task generator with the LLM marked available"""
+    monkeypatch.setattr(settings, "NLP_PROCESS_POOL_SIZE", 0)
+    monkeypatch.setattr(llm_client, "is_available", lambda backend=None: True)
+    return TaskGenerator()
+
+
+@pytest.mark.asyncio
+async def test_batch_extraction_uses_one_call(generator, monkeypatch):
+    """Test several items are answered by a single LLM call"""
+    calls = []
+
+    async def fake_generate(prompt, **kwargs):
+        calls.append(prompt)
+        return json.dumps({
+            "1": [{"title": "Pay electricity bill", "priority": 80}],
+            "2": [],
+        })
+
+    monkeypatch.setattr(llm_client, "generate", fake_generate)
+
+    results = await generator.extract_tasks_batch([
+        {"id": "msg-a", "text": "Please pay the electricity bill by Friday."},
+        {"id": "msg-b", "text": "Thanks for coming to the party."},
+    ])
+
+    assert len(calls) == 1
+    assert [t["title"] for t in results["msg-a"]] == ["Pay electricity bill"]
+    assert results["msg-b"] == []
+
+
+@pytest.mark.asyncio
+async def test_batch_falls_back_per_item_on_bad_json(generator, monkeypatch):
+    """Test an unparseable batch response triggers per-item calls"""
+    calls = []
+
+    async def fake_generate(prompt, **kwargs):
+        calls.append(prompt)
+        if len(calls) == 1:
+            return "not json"
+        return json.dumps([{"title": "Renew passport"}])
+
+    monkeypatch.setattr(llm_client, "generate", fake_generate)
+
+    results = await generator.extract_tasks_batch([
+        {"id": "a", "text": "Your passport expires soon."},
+        {"id": "b", "text": "Renew your passport this month."},
+    ])
+
+    assert len(calls) == 3
+    assert results["a"][0]["title"] == "Renew passport"
+    assert results["b"][0]["title"] == "Renew passport"
+
+
+@pytest.mark.asyncio
+async def test_batch_limit_bounds_calls_in_flight(generator, monkeypatch):
+    """Test batches hold the caller's semaphore while they call the LLM"""
+    import asyncio
+    monkeypatch.setattr(settings, "AI_BATCH_MAX_ITEMS", 2)
+    running, peak = [0], [0]
+
+    async def fake_generate(prompt, **kwargs):
+        running[0] += 1
+        peak[0] = max(peak[0], running[0])
+        await asyncio.sleep(0.01)
+        running[0] -= 1
+        return json.dumps({"1": [], "2": []})
+
+    monkeypatch.setattr(llm_client, "generate", fake_generate)
+
+    results = await generator.extract_tasks_batch(
+        [{"id": str(i), "text": f"Email number {i}"} for i in range(6)],
+        limit=asyncio.Semaphore(1)
+    )
+
+    assert len(results) == 6
+    assert peak[0] == 1
+
+
+def test_batches_respect_token_budget(generator, monkeypatch):
+    """Test packing splits items once the token budget is reached"""
+    system_tokens = prompt_budget.count_tokens(BATCH_SYSTEM_PROMPT, llm_client.primary_backend())
+    monkeypatch.setattr(settings, "AI_BATCH_TOKEN_BUDGET", 600 + system_tokens)
+    monkeypatch.setattr(settings, "AI_PROMPT_TOKEN_BUDGET_OLLAMA", 10000)
+    monkeypatch.setattr(settings, "AI_PROMPT_TOKEN_BUDGET_GEMINI", 10000)
+    monkeypatch.setattr(settings, "AI_BATCH_OUTPUT_TOKENS_PER_ITEM", 0)
+    items = [{"id": str(i), "text": "word " * 250} for i in range(5)]
+
+    batches = generator._pack_batches(items, "email")
+
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+
+
+def test_batches_fit_backend_budget_with_output_reserved(generator, monkeypatch):
+    """Test the backend's prompt budget, system prompt and reserved output all bound a batch"""
+    system_tokens = prompt_budget.count_tokens(BATCH_SYSTEM_PROMPT, llm_client.primary_backend())
+    monkeypatch.setattr(settings, "AI_PROMPT_TOKEN_BUDGET_OLLAMA", system_tokens + 700)
+    monkeypatch.setattr(settings, "AI_PROMPT_TOKEN_BUDGET_GEMINI", system_tokens + 700)
+    monkeypatch.setattr(settings, "AI_BATCH_OUTPUT_TOKENS_PER_ITEM", 200)
+    items = [{"id": str(i), "text": "word " * 100} for i in range(4)]
+
+    batches = generator._pack_batches(items, "email")
+
+    assert [len(batch) for batch in batches] == [2, 2]
+    assert generator._batch_output_tokens(2) == 400
+
+
+def test_incremental_parser_emits_objects_as_they_complete():
+    """Test each array element is returned by the chunk that closes it"""
+    parser = IncrementalJSONArrayParser()
+
+    assert parser.feed('```json\n[{"title": "Pay rent", "note": "use [brackets] and \\"quotes\\"}"') == []
+    assert parser.feed('}, {"title": "Call ') == [{"title": "Pay rent", "note": 'use [brackets] and "quotes"}'}]
+    assert parser.feed('bank"}]\n```') == [{"title": "Call bank"}]
+    assert parser.close() == []
+
+
+def test_incremental_parser_handles_single_object():
+    """Test a bare object response is returned on close"""
+    parser = IncrementalJSONArrayParser()
+
+    assert parser.feed('{"title": "Renew passport"}') == []
+    assert parser.close() == [{"title": "Renew passport"}]
+
+
+@pytest.mark.asyncio
+async def test_extract_tasks_stream_yields_validated_tasks(generator, monkeypatch):
+    """Test streamed tasks are validated and de-duplicated"""
+    async def fake_generate_stream(prompt, **kwargs):
+        for chunk in ['[{"title": "Pay electricity', ' bill", "priority": 80},', ' {"title": "Pay electricity bill"}, {"title": "ok"}]']:
+            yield chunk
+
+    monkeypatch.setattr(llm_client, "generate_stream", fake_generate_stream)
+
+    tasks = [task async for task in generator.extract_tasks_stream("Please pay the electricity bill.")]
+
+    assert [task["title"] for task in tasks] == ["Pay electricity bill"]
+    assert tasks[0]["priority"] == 80
+
+
+@pytest.mark.asyncio
+async def test_stream_and_batch_drop_the_same_near_duplicates(generator, monkeypatch):
+    """Test streamed tasks use the same fuzzy title check as the non-streaming path"""
+    tasks = [
+        {"title": "Pay the electricity bill today"},
+        {"title": "Pay the electricity bill today please"},
+        {"title": "Book dentist appointment"},
+    ]
+
+    async def fake_generate_stream(prompt, **kwargs):
+        yield json.dumps(tasks)
+
+    async def fake_generate(prompt, **kwargs):
+        return json.dumps(tasks)
+
+    monkeypatch.setattr(llm_client, "generate_stream", fake_generate_stream)
+    monkeypatch.setattr(llm_client, "generate", fake_generate)
+
+    streamed = [task["title"] async for task in generator.extract_tasks_stream("Pay the bill and see the dentist.")]
+    extracted = [task["title"] for task in await generator.extract_tasks("Pay the bill and see the dentist.")]
+
+    assert streamed == ["Pay the electricity bill today", "Book dentist appointment"]
+    assert sorted(extracted) == sorted(streamed)
@@ -0,0 +1,49 @@
+"""Full-text search tests"""
+import uuid
+from types import SimpleNamespace
+import pytest
+from sqlalchemy.dialects import postgresql
+from app.models.document import Document
+from app.services.document_service import document_service
+from app.services.text_search import like_pattern
+
+
+class SearchSession:
+    """Answers count, page and headline queries in order, recording the compiled SQL"""
+
+    def __init__(self, total, rows, snippets):
+        self.results = [
+            SimpleNamespace(scalar_one=lambda: total),
+            SimpleNamespace(all=lambda: rows),
+            SimpleNamespace(all=lambda: snippets),
+        ]
+        self.statements = []
+
+    async def execute(self, statement):
+        self.statements.append(str(statement.compile(dialect=postgresql.dialect())))
+        return self.results[len(self.statements) - 1]
+
+
+def test_like_pattern_escapes_wildcards():
+    """Test user input cannot inject LIKE wildcards into the substring fallback"""
+    assert like_pattern("50%_off") == "%50\\%\\_off%"
+
+
+@pytest.mark.asyncio
+async def test_document_search_uses_index_and_ranks():
+    """Test search filters on search_vector/trigram, ranks results and highlights only the page"""
+    user = SimpleNamespace(id=uuid.uuid4())
+    doc = Document(id=uuid.uuid4(), user_id=user.id, file_name="invoice.pdf", file_type="pdf", s3_key="local:invoice.pdf")
+    db = SearchSession(7, [(doc, 0.5)], [(doc.id, "<mark>invoice</mark> due")])
+
+    documents, total = await document_service.list_documents(db, user, search=' "unpaid invoice" ')
+
+    count_sql, page_sql, headline_sql = db.statements
+    assert total == 7
+    assert "documents.search_vector @@ websearch_to_tsquery('english'::regconfig" in count_sql
+    assert "documents.file_name ILIKE" in count_sql
+    assert "lower(" not in count_sql
+    assert "ORDER BY ts_rank_cd(documents.search_vector" in page_sql
+    assert "ts_headline" in headline_sql and "documents.id IN" in headline_sql
+    assert documents[0].search_rank == 0.5
+    assert documents[0].search_snippet == "<mark>invoice</mark> due"
@@ -0,0 +1,72 @@
+"""Authenticated user cache tests"""
+import uuid
+from types import SimpleNamespace
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from jose import jwt
+from app.config import settings
+from app.dependencies import get_current_user
+from app.models.user import User
+from app.services.user_cache import UserCache, UserSnapshot, _invalidate_changed_user
+
+
+class UserRowSession:
+    """Answers the snapshot query with one row and counts queries"""
+
+    def __init__(self, user_id, is_active=True):
+        self.row = SimpleNamespace(id=user_id, is_active=is_active, timezone="Europe/Paris")
+        self.queries = 0
+
+    async def execute(self, statement):
+        self.queries += 1
+        return SimpleNamespace(one_or_none=lambda: self.row)
+
+
+def credentials_for(user_id):
+    """Bearer credentials for a user id"""
+    token = jwt.encode({"sub": str(user_id)}, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+
+@pytest.mark.asyncio
+async def test_user_is_loaded_once_then_served_from_cache():
+    """Test repeated authentications reuse the snapshot instead of querying users"""
+    user_id = uuid.uuid4()
+    db = UserRowSession(user_id)
+
+    first = await get_current_user(credentials_for(user_id), db)
+    second = await get_current_user(credentials_for(user_id), db)
+
+    assert db.queries == 1
+    assert first.id == second.id == user_id
+    assert second.timezone == "Europe/Paris"
+
+
+@pytest.mark.asyncio
+async def test_inactive_user_is_rejected_and_change_invalidates():
+    """Test an inactive snapshot is refused and a flushed user change drops the cached entry"""
+    user_id = uuid.uuid4()
+    db = UserRowSession(user_id, is_active=False)
+
+    with pytest.raises(HTTPException) as error:
+        await get_current_user(credentials_for(user_id), db)
+    assert error.value.status_code == 403
+
+    _invalidate_changed_user(None, None, User(id=user_id))
+    db.row.is_active = True
+    assert (await get_current_user(credentials_for(user_id), db)).is_active
+    assert db.queries == 2
+
+
+@pytest.mark.asyncio
+async def test_snapshots_expire_after_ttl():
+    """Test entries older than the TTL are treated as misses"""
+    now = [0.0]
+    cache = UserCache(clock=lambda: now[0])
+    snapshot = UserSnapshot(uuid.uuid4(), True, "UTC")
+    await cache.set(snapshot)
+
+    assert await cache.get(str(snapshot.id)) is snapshot
+    now[0] += settings.USER_CACHE_TTL_SECONDS + 1
+    assert await cache.get(str(snapshot.id)) is None
@@ -0,0 +1,98 @@
+"""Vector index and semantic search tests"""
+import os
+import uuid
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from app.services import semantic_search as semantic_module
+from app.services.semantic_search import SemanticSearchService, document_chunks
+from app.services.vector_index import VectorIndex, VectorIndexStore
+
+
+def unit(*values):
+    vector = np.asarray(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def test_index_appends_supersedes_and_reloads(tmp_path, monkeypatch):
+    """Test rows are stored as float16 on disk, later writes win and another instance sees them"""
+    index = VectorIndex(str(tmp_path), "test-model", 3)
+    index.add(["email:a", "task:b"], np.stack([unit(1, 0, 0), unit(0, 1, 0)]))
+    index.add(["email:a"], np.stack([unit(0, 0, 1)]))
+
+    assert os.path.getsize(tmp_path / "vectors.f16") == 3 * 3 * 2
+    assert [key for key, _ in index.search(unit(0, 0, 1), 5)] == ["email:a", "task:b"]
+
+    reader = VectorIndex(str(tmp_path), "test-model", 3)
+    reader.refresh()
+    assert len(reader) == 2
+    assert reader.search(unit(0, 1, 0), 1, kinds=["email"])[0][0] == "email:a"
+
+    index.remove(["task:b"])
+    assert [key for key, _ in reader.search(unit(0, 1, 0), 5)] == ["email:a"]
+
+    # Large indexes scan the float16 memmap instead of a float32 copy
+    monkeypatch.setattr(semantic_module.settings, "EMBEDDING_INDEX_DECODED_MAX_ROWS", 0)
+    assert VectorIndex(str(tmp_path), "test-model", 3).search(unit(0, 0, 1), 5)[0][0] == "email:a"
+
+
+def test_index_resets_for_another_model(tmp_path):
+    """Test vectors from a different embedding model are never mixed into results"""
+    VectorIndex(str(tmp_path), "old-model", 3).add(["task:a"], np.stack([unit(1, 0, 0)]))
+
+    index = VectorIndex(str(tmp_path), "new-model", 3)
+    assert index.search(unit(1, 0, 0), 5) == []
+    index.add(["task:b"], np.stack([unit(1, 0, 0)]))
+    assert [key for key, _ in index.search(unit(1, 0, 0), 5)] == ["task:b"]
+
+
+def test_compaction_drops_superseded_rows(tmp_path, monkeypatch):
+    """Test rewriting the files once dead rows outnumber live ones keeps every live key"""
+    monkeypatch.setattr(semantic_module.settings, "EMBEDDING_INDEX_MIN_COMPACT_ROWS", 2)
+    index = VectorIndex(str(tmp_path), "test-model", 3)
+    for _ in range(4):
+        index.add(["task:a", "task:b"], np.stack([unit(1, 0, 0), unit(0, 1, 0)]))
+
+    assert os.path.getsize(tmp_path / "vectors.f16") < 8 * 3 * 2
+    assert sorted(key for key, _ in index.search(unit(1, 1, 0), 5)) == ["task:a", "task:b"]
+
+
+class FakeEmbedder:
+    """Bag-of-letters vectors, enough to rank related words above unrelated ones"""
+
+    model_name = "fake"
+    dimension = 26
+
+    async def ready(self):
+        return True
+
+    async def encode_async(self, texts):
+        vectors = np.zeros((len(texts), 26), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for letter in text.lower():
+                if "a" <= letter <= "z":
+                    vectors[row, ord(letter) - 97] += 1
+        return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-9)
+
+
+@pytest.mark.asyncio
+async def test_search_returns_one_hit_per_item(tmp_path, monkeypatch):
+    """Test document chunks collapse to their best hit and unresolved ids are dropped"""
+    monkeypatch.setattr(semantic_module, "embedder", FakeEmbedder())
+    monkeypatch.setattr(semantic_module, "vector_indexes", VectorIndexStore(str(tmp_path)))
+    monkeypatch.setattr(semantic_module.settings, "EMBEDDING_CHUNK_CHARS", 10)
+    service = SemanticSearchService()
+    user_id = uuid.uuid4()
+    document = SimpleNamespace(id=uuid.uuid4(), file_name="lease.pdf", ocr_text="rent deposit landlord rent")
+    task = SimpleNamespace(id=uuid.uuid4(), title="zzz quiz")
+
+    assert len(document_chunks(document)) > 1
+    await service.index_document(user_id, document)
+    await service.index_tasks(user_id, [task])
+
+    async def resolve(db, owner_id, hits):
+        return [hit for hit in hits if hit["type"] == "document"]
+    monkeypatch.setattr(service, "_resolve", resolve)
+
+    hits = await service.search(None, user_id, "rent", limit=5)
+    assert [(hit["type"], hit["id"]) for hit in hits] == [("document", str(document.id))]
@@ -0,0 +1,89 @@
+"""Worker runtime tests"""
+import asyncio
+import pytest
+from app.workers.runtime import WorkerRuntime
+
+
+@pytest.fixture
+def runtime(monkeypatch):
+    """Runtime without the global LLM client and database engine"""
+    runtime = WorkerRuntime()
+
+    async def noop():
+        pass
+
+    monkeypatch.setattr(runtime, "_open_clients", noop)
+    monkeypatch.setattr(runtime, "_close_clients", noop)
+    yield runtime
+    runtime.shutdown()
+
+
+def test_tasks_share_one_event_loop(runtime):
+    """Test consecutive calls run on the same loop, so loop-bound objects survive between tasks"""
+    async def current_loop():
+        return asyncio.get_running_loop()
+
+    semaphore_holder = {}
+
+    async def contend():
+        # A semaphore is bound to the loop the first time it has to wait
+        semaphore = semaphore_holder.setdefault("semaphore", asyncio.Semaphore(1))
+        async with semaphore:
+            await asyncio.sleep(0.01)
+
+    async def contend_twice():
+        await asyncio.gather(contend(), contend())
+
+    first = runtime.run(current_loop())
+    runtime.run(contend_twice())
+    runtime.run(contend_twice())
+
+    assert runtime.run(current_loop()) is first
+    assert first.is_running()
+
+
+def test_errors_propagate_and_loop_survives(runtime):
+    """Test a failing coroutine raises in the task and leaves the loop usable"""
+    async def fail():
+        raise ValueError("boom")
+
+    async def answer():
+        return 42
+
+    with pytest.raises(ValueError):
+        runtime.run(fail())
+    assert runtime.run(answer()) == 42
+
+
+def test_timeout_cancels_coroutine(runtime):
+    """Test a timed-out call cancels the coroutine on the loop"""
+    cancelled = asyncio.Event()
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    async def was_cancelled():
+        await asyncio.wait_for(cancelled.wait(), 1)
+        return cancelled.is_set()
+
+    with pytest.raises(TimeoutError):
+        runtime.run(slow(), timeout=0.05)
+    assert runtime.run(was_cancelled())
+
+
+def test_shutdown_stops_loop_thread(runtime):
+    """Test shutdown joins the loop thread and a later call starts a new one"""
+    async def answer():
+        return 1
+
+    runtime.run(answer())
+    thread = runtime._thread
+
+    runtime.shutdown()
+
+    assert not thread.is_alive()
+    assert runtime.run(answer()) == 1
@@ -2,7 +2,7 @@ import { useState, useEffect } from 'react'
 import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query'
 import { useLocation, useNavigate } from 'react-router-dom'
 import Navigation from '../components/Navigation'
-import api from '../services/api'
+import api, { followSyncJob, SyncProgressEvent } from '../services/api'
 import { format } from 'date-fns'
 import { Mail, RefreshCw, Plus, Search, Star, Filter, CheckCircle2, Loader2 } from 'lucide-react'
 
@@ -47,6 +47,7 @@ export default function EmailInbox() {
   const [searchQuery, setSearchQuery] = useState('')
   const [showConnectModal, setShowConnectModal] = useState(false)
   const [successMessage, setSuccessMessage] = useState<string | null>(null)
+  const [syncProgress, setSyncProgress] = useState<string | null>(null)
   const [filters, setFilters] = useState({
     unreadOnly: false,
     importantOnly: false,
@@ -108,14 +109,41 @@ export default function EmailInbox() {
   })
 
   const connectedAccounts = accountsData || []
+  const describeSyncEvent = (event: SyncProgressEvent) => {
+    switch (event.event) {
+      case 'account_started':
+        return `Fetching ${event.data.email_address}...`
+      case 'account_fetched':
+        return `${event.data.new} new emails from ${event.data.email_address}`
+      case 'account_failed':
+        return `Could not sync ${event.data.email_address}: ${event.data.error}`
+      case 'email_processed':
+        return `Analyzing emails ${event.data.processed}/${event.data.total}`
+      case 'suggestions_started':
+        return 'Generating AI insights...'
+      default:
+        return 'Syncing...'
+    }
+  }
+
   const syncMutation = useMutation({
     mutationFn: async () => {
       const response = await api.post('/emails/sync', {})
-      return response.data
+      // Syncs queued to the worker pipeline have no progress stream
+      if (!response.data.job_id) return response.data
+      setSyncProgress('Sync started...')
+      const result = await followSyncJob(response.data.job_id, (event) => setSyncProgress(describeSyncEvent(event)))
+      if (result.event === 'failed') {
+        throw new Error(result.data.error || 'Sync failed')
+      }
+      return result.data
     },
     onSuccess: () => {
       queryClient.invalidateQueries({ queryKey: ['emails'] })
     },
+    onSettled: () => {
+      setSyncProgress(null)
+    },
   })
 
   const emails = data?.emails || []
@@ -149,7 +177,7 @@ export default function EmailInbox() {
                   className="flex items-center space-x-2 px-6 py-3 bg-white/20 backdrop-blur-sm text-white rounded-xl hover:bg-white/30 transition-all duration-300 hover:scale-105 hover:shadow-lg disabled:opacity-50 group"
                 >
                   <RefreshCw className={`w-5 h-5 ${syncMutation.isPending ? 'animate-spin' : 'group-hover:rotate-180'} transition-transform duration-500`} />
-                  <span>Sync</span>
+                  <span>{syncProgress || 'Sync'}</span>
                 </button>
               </div>
             </div>
@@ -54,4 +54,54 @@ api.interceptors.response.use(
   }
 )
 
+export interface SyncProgressEvent {
+  id: number
+  event: string
+  data: Record<string, any>
+}
+
+// Follow a background email sync job over its server-sent events stream
+export async function followSyncJob(
+  jobId: string,
+  onEvent: (event: SyncProgressEvent) => void
+): Promise<SyncProgressEvent> {
+  const token = localStorage.getItem('access_token')
+  const response = await fetch(`/api/v1/emails/sync/${jobId}/events`, {
+    headers: token ? { Authorization: `Bearer ${token}` } : {},
+  })
+  if (!response.ok || !response.body) {
+    throw new Error(`Sync progress unavailable (${response.status})`)
+  }
+
+  const reader = response.body.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ''
+  while (true) {
+    const { value, done } = await reader.read()
+    if (done) break
+    buffer += decoder.decode(value, { stream: true })
+
+    let boundary = buffer.indexOf('\n\n')
+    while (boundary >= 0) {
+      const block = buffer.slice(0, boundary)
+      buffer = buffer.slice(boundary + 2)
+      boundary = buffer.indexOf('\n\n')
+
+      const fields: Record<string, string> = {}
+      for (const line of block.split('\n')) {
+        // Lines starting with ':' are keep-alive comments
+        if (!line || line.startsWith(':')) continue
+        const separator = line.indexOf(':')
+        fields[line.slice(0, separator)] = line.slice(separator + 1).trimStart()
+      }
+      if (!fields.event) continue
+
+      const event = { id: Number(fields.id), event: fields.event, data: JSON.parse(fields.data || '{}') }
+      onEvent(event)
+      if (event.event === 'completed' || event.event === 'failed') return event
+    }
+  }
+  throw new Error('Sync progress stream closed early')
+}
+
 export default api